@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试
+在合成的章节库（默认10、1000、10000章）上测量数据库操作、提示词构建、
+项目导出、AI客户端、编辑器和章节列表的延迟与吞吐量，结果保存为JSON并可与基线对比。
+
+用法：
+    python -m benchmarks run [--sizes 10,1000,10000] [--suites database,prompt,export,ai,editor,chapter_list]
+    python -m benchmarks compare baseline.json current.json [--threshold 0.2]
+"""
+
+import sys
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试命令行入口
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import benchmarks  # noqa: F401  添加src目录到Python路径
+from utils.logger import logger
+from benchmarks import (bench_ai, bench_chapter_list, bench_database, bench_editor,
+                        bench_export, bench_prompt)
+from benchmarks.fixtures import build_library
+from benchmarks.harness import (BenchmarkContext, compare_results, load_results,
+                                save_results)
+
+SUITES = {
+    'database': bench_database.run,
+    'prompt': bench_prompt.run,
+    'export': bench_export.run,
+    'ai': bench_ai.run,
+    'editor': bench_editor.run,
+    'chapter_list': bench_chapter_list.run
+}
+
+DEFAULT_SIZES = "10,1000,10000"
+
+def run_benchmarks(args) -> int:
+    """运行基准测试并保存结果"""
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    suites = [name for name in args.suites.split(",") if name]
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        print(f"未知的测试集: {', '.join(unknown)}（可选: {', '.join(SUITES)}）")
+        return 2
+    
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        for size in sizes:
+            workdir = Path(tmp) / f"size_{size}"
+            workdir.mkdir()
+            print(f"章节库: {size}章")
+            db_path = str(workdir / "library.db")
+            library = build_library(db_path, size, chapter_chars=args.chapter_chars, seed=args.seed)
+            library['db_path'] = db_path
+            ctx = BenchmarkContext(workdir, size, repeat=args.repeat)
+            for name in suites:
+                SUITES[name](ctx, library)
+            results.extend(ctx.results)
+    
+    path = save_results(results, args.output, metadata={
+        'sizes': sizes,
+        'suites': suites,
+        'repeat': args.repeat,
+        'chapter_chars': args.chapter_chars,
+        'seed': args.seed
+    })
+    print(f"结果已保存到: {path}")
+    return 0
+
+def compare_benchmarks(args) -> int:
+    """与基线对比，存在回归时返回1"""
+    rows = compare_results(load_results(args.baseline), load_results(args.current),
+                           threshold=args.threshold, metric=args.metric)
+    regressions = 0
+    for row in rows:
+        if row['change'] is None:
+            print(f"{row['status']:<11} {row['key']}")
+            continue
+        print(f"{row['status']:<11} {row['key']:<50} {row['baseline']:>10.3f} -> "
+              f"{row['current']:>10.3f} ms ({row['change']:+.1%})")
+        regressions += row['status'] == 'regression'
+    print(f"{regressions}项回归（阈值 {args.threshold:.0%}，指标 {args.metric}）")
+    return 1 if regressions else 0
+
+def main(argv=None) -> int:
+    """命令行入口函数"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="AI写作助手性能基准测试")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subparsers.add_parser('run', help="运行基准测试")
+    run_parser.add_argument('--sizes', default=DEFAULT_SIZES, help="章节库大小，逗号分隔")
+    run_parser.add_argument('--suites', default=",".join(SUITES), help="测试集，逗号分隔")
+    run_parser.add_argument('--repeat', type=int, default=5, help="默认重复次数")
+    run_parser.add_argument('--chapter-chars', type=int, default=2000, help="每章字数")
+    run_parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    run_parser.add_argument('--output', help="结果文件路径")
+    run_parser.set_defaults(func=run_benchmarks)
+    
+    compare_parser = subparsers.add_parser('compare', help="与基线对比")
+    compare_parser.add_argument('baseline', help="基线结果文件")
+    compare_parser.add_argument('current', help="当前结果文件")
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help="允许的相对变慢比例")
+    compare_parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms', 'min_ms'])
+    compare_parser.set_defaults(func=compare_benchmarks)
+    
+    args = parser.parse_args(argv)
+    # 基准测试期间只输出警告以上的日志，避免日志输出干扰计时
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
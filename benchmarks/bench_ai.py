@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI客户端基准测试
+DeepSeekAIService 请求本地模拟服务的开销（请求体序列化、HTTP往返和响应解析）
+"""
+
+
+from ai_services.deepseek import DeepSeekAIService
+from benchmarks.fixtures import generate_text
+from benchmarks.harness import BenchmarkContext
+from tools.stub_llm_server import StubLLMServer
+
+SUITE = "ai"
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行AI客户端基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（未使用）
+    """
+    # 上下文长度随章节库大小增长（每章10字），历史对话固定为20条
+    context = generate_text(0, ctx.size * 10)
+    history = [
+        {'role': "user" if i % 2 == 0 else "assistant", 'content': generate_text(i + 1, 200)}
+        for i in range(20)
+    ]
+    # 模拟服务不加延迟、不限速，只测量客户端和本地往返的开销
+    with StubLLMServer() as server:
+        service = DeepSeekAIService("bench", api_url=server.url)
+        repeat = ctx.repeat * 4
+        
+        def check(result):
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        
+        ctx.bench(SUITE, "chat", lambda: check(service.chat([{'role': "user", 'content': "你好"}])),
+                  repeat=repeat)
+        ctx.bench(SUITE, "generate_content_with_context",
+                  lambda: check(service.generate_content("续写", context=context)),
+                  items=len(context), repeat=repeat)
+        ctx.bench(SUITE, "generate_content_with_history",
+                  lambda: check(service.generate_content("续写", context=context, history=history)),
+                  repeat=repeat)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+章节列表基准测试
+打开项目（加载第一页）、滚动加载全部章节和拖动排序的延迟
+"""
+
+import os
+
+# 没有显示环境时使用离屏平台
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QModelIndex
+
+from database.operations import DatabaseManager
+from benchmarks.harness import BenchmarkContext
+from gui import chapter_list
+from gui.chapter_list import ChapterList
+
+SUITE = "chapter_list"
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行章节列表基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（含 db_path）
+    """
+    app = QApplication.instance() or QApplication([])
+    db = DatabaseManager(library['db_path'])
+    project_id = library['project_id']
+    chapters = len(library['chapter_ids'])
+    
+    # 章节列表自行创建默认路径的 DatabaseManager，这里换成章节库
+    original_manager = chapter_list.DatabaseManager
+    chapter_list.DatabaseManager = lambda: db
+    try:
+        widget = ChapterList()
+    finally:
+        chapter_list.DatabaseManager = original_manager
+    widget.resize(300, 600)
+    widget.show()
+    app.processEvents()
+    model = widget.model
+    
+    def open_project():
+        widget.set_project(project_id, "基准测试")
+        app.processEvents()
+    
+    def fetch_all():
+        open_project()
+        while model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+        app.processEvents()
+    
+    ctx.bench(SUITE, "open_project", open_project)
+    ctx.bench(SUITE, "fetch_all", fetch_all, items=chapters, repeat=ctx.repeat_for(chapters))
+    
+    # 在首尾之间来回移动章节（移动跨越的章节数最多）
+    last = model.rowCount() - 1
+    
+    def move_first_to_last():
+        widget.move_chapter(0, last)
+        widget.move_chapter(last, 0)
+        app.processEvents()
+    
+    ctx.bench(SUITE, "move_first_to_last", move_first_to_last, items=2)
+    
+    widget.close()
+    db.engine.dispose()
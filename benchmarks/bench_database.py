@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据库操作基准测试
+DatabaseManager 的增删改查、列表、全文搜索和流式遍历
+"""
+
+import itertools
+import random
+
+from database.operations import DatabaseManager
+from benchmarks.fixtures import generate_text
+from benchmarks.harness import BenchmarkContext
+
+SUITE = "database"
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行数据库基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（含 db_path）
+    """
+    db = DatabaseManager(library['db_path'])
+    project_id = library['project_id']
+    chapter_ids = library['chapter_ids']
+    rng = random.Random(0)
+    content = generate_text(0, 2000)
+    sample_ids = itertools.cycle(rng.sample(chapter_ids, min(len(chapter_ids), 100)))
+    
+    ctx.bench(SUITE, "get_chapter", lambda: db.get_chapter(next(sample_ids)), repeat=ctx.repeat * 20)
+    ctx.bench(SUITE, "update_chapter",
+              lambda: db.update_chapter(next(sample_ids), content=content), repeat=ctx.repeat * 20)
+    ctx.bench(SUITE, "get_project", lambda: db.get_project(project_id))
+    ctx.bench(SUITE, "get_all_projects", db.get_all_projects)
+    ctx.bench(SUITE, "get_project_chapters", lambda: db.get_project_chapters(project_id),
+              items=len(chapter_ids), repeat=ctx.repeat_for(len(chapter_ids)))
+    ctx.bench(SUITE, "count_project_chapters", lambda: db.count_project_chapters(project_id))
+    ctx.bench(SUITE, "iter_chapter_contents",
+              lambda: sum(1 for _ in db.iter_chapter_contents(project_id)),
+              items=len(chapter_ids), repeat=ctx.repeat_for(len(chapter_ids)))
+    ctx.bench(SUITE, "search", lambda: db.search("的一是", project_id=project_id))
+    ctx.bench(SUITE, "search_short_term", lambda: db.search("的", project_id=project_id))
+    
+    created = []
+    ctx.bench(SUITE, "create_chapter",
+              lambda: created.append(db.create_chapter(project_id, "新章节", content).id),
+              repeat=ctx.repeat * 4, warmup=0)
+    ctx.bench(SUITE, "delete_chapter", lambda: db.delete_chapter(created.pop()),
+              repeat=len(created), warmup=0)
+    db.engine.dispose()
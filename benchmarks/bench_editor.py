@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+编辑器基准测试
+普通模式（QTextEdit）和大文档模式（QPlainTextEdit 分块载入）下打开章节、输入、文本统计和切换已缓存章节的延迟
+"""
+
+import os
+
+# 没有显示环境时使用离屏平台
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import Qt
+from PyQt6.QtTest import QTest
+
+from benchmarks.fixtures import generate_text
+from benchmarks.harness import BenchmarkContext
+from database.operations import DatabaseManager
+from gui import editor as editor_module
+from gui.editor import Editor
+
+SUITE = "editor"
+
+# 章节字数随章节库大小增长（每章节库章节对应300字）
+CHARS_PER_SIZE = 300
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行编辑器基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（含 db_path）
+    """
+    app = QApplication.instance() or QApplication([])
+    content = generate_text(0, ctx.size * CHARS_PER_SIZE)
+    db = DatabaseManager(library['db_path'])
+    
+    # 编辑器自行创建默认路径的 DatabaseManager，这里换成章节库，以免改动应用的数据库
+    original_manager = editor_module.DatabaseManager
+    editor_module.DatabaseManager = lambda: db
+    try:
+        editor = Editor()
+    finally:
+        editor_module.DatabaseManager = original_manager
+    editor.resize(800, 600)
+    editor.show()
+    app.processEvents()
+    repeat = ctx.repeat_for(len(content))
+    
+    for mode, threshold in (('rich', len(content) + 1), ('plain', 0)):
+        editor.large_document_threshold = threshold
+        
+        def open_first():
+            # 打开到第一块可以编辑（普通模式下即全部载入）
+            editor.set_chapter(1, content)
+            app.processEvents()
+        
+        def open_full():
+            editor.set_chapter(1, content)
+            while editor.is_loading:
+                app.processEvents()
+            app.processEvents()
+        
+        ctx.bench(SUITE, f"open_{mode}", open_first, items=len(content), repeat=repeat)
+        ctx.bench(SUITE, f"open_full_{mode}", open_full, items=len(content), repeat=repeat)
+        
+        # 在文档中部连续输入，每次按键后处理事件（排版和重绘）
+        cursor = editor.editor.textCursor()
+        cursor.setPosition(editor.editor.document().characterCount() // 2)
+        editor.editor.setTextCursor(cursor)
+        editor.editor.setFocus()
+        keys = 50
+        
+        def type_keys():
+            for _ in range(keys):
+                QTest.keyClick(editor.editor, Qt.Key.Key_A)
+                app.processEvents()
+            cursor = editor.editor.textCursor()
+            cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, keys)
+            cursor.removeSelectedText()
+        
+        ctx.bench(SUITE, f"type_{mode}", type_keys, items=keys, repeat=ctx.repeat)
+        
+        # 打开章节并统计全文
+        def open_stats():
+            open_full()
+            editor.text_stats.flush()
+        
+        ctx.bench(SUITE, f"open_stats_{mode}", open_stats, items=len(content), repeat=repeat)
+        
+        # 每次按键后立即更新文本统计（只重新统计变化的段落）
+        cursor = editor.editor.textCursor()
+        cursor.setPosition(editor.editor.document().characterCount() // 2)
+        editor.editor.setTextCursor(cursor)
+        
+        def type_keys_stats():
+            stats = editor.text_stats
+            for _ in range(keys):
+                QTest.keyClick(editor.editor, Qt.Key.Key_A)
+                stats.flush()
+            cursor = editor.editor.textCursor()
+            cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, keys)
+            cursor.removeSelectedText()
+            stats.flush()
+        
+        ctx.bench(SUITE, f"type_stats_{mode}", type_keys_stats, items=keys, repeat=ctx.repeat)
+        
+        # 在两个已缓存的章节之间切换
+        editor.set_chapter(2, content)
+        while editor.is_loading:
+            app.processEvents()
+        
+        def switch_cached():
+            for chapter_id in (1, 2):
+                editor.show_cached_chapter(chapter_id)
+                app.processEvents()
+        
+        ctx.bench(SUITE, f"switch_cached_{mode}", switch_cached, items=2, repeat=ctx.repeat)
+        editor.discard_documents()
+    
+    editor.clear_content()
+    editor.close()
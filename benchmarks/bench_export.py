@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+项目导出基准测试
+ProjectManager.export_project 的各种导出格式
+"""
+
+import importlib.util
+
+from core.project import ProjectManager
+from benchmarks.harness import BenchmarkContext
+
+SUITE = "export"
+
+FORMATS = ['json', 'txt', 'docx']
+
+# 依赖可选库的导出格式
+FORMAT_MODULES = {'docx': 'docx'}
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行导出基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（含 db_path）
+    """
+    manager = ProjectManager(library['db_path'], export_dir=str(ctx.workdir / "exports"))
+    chapters = len(library['chapter_ids'])
+    for export_format in FORMATS:
+        module = FORMAT_MODULES.get(export_format)
+        if module and importlib.util.find_spec(module) is None:
+            print(f"  跳过 {SUITE}.{export_format}：未安装 {module}")
+            continue
+        def export(export_format=export_format):
+            if not manager.export_project(library['project_id'], export_format):
+                raise RuntimeError(f"导出失败: {export_format}")
+        ctx.bench(SUITE, export_format, export, items=chapters,
+                  repeat=ctx.repeat_for(chapters), warmup=0)
+    manager.db.engine.dispose()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词构建基准测试
+PromptTemplate 在不同上下文长度下的格式化开销（上下文长度为章节库大小乘以100字）
+"""
+
+
+from ai_services.prompt import PromptTemplate
+from benchmarks.fixtures import generate_text
+from benchmarks.harness import BenchmarkContext
+
+SUITE = "prompt"
+
+def run(ctx: BenchmarkContext, library: dict):
+    """运行提示词基准测试
+    
+    Args:
+        ctx: 基准测试上下文
+        library: build_library 的返回值（未使用）
+    """
+    context = generate_text(0, ctx.size * 100)
+    repeat = ctx.repeat * 100
+    
+    ctx.bench(SUITE, "get_generation_prompt",
+              lambda: PromptTemplate.get_generation_prompt("写一段开头", genre="小说"), repeat=repeat)
+    ctx.bench(SUITE, "get_continuation_prompt",
+              lambda: PromptTemplate.get_continuation_prompt(context), items=len(context), repeat=repeat)
+    ctx.bench(SUITE, "get_system_prompt", lambda: PromptTemplate.get_system_prompt(), repeat=repeat)
+    ctx.bench(SUITE, "get_context_message",
+              lambda: PromptTemplate.get_context_message(context), items=len(context), repeat=repeat)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试数据
+生成确定性的合成章节库
+"""
+
+from typing import Any, Dict
+
+from tools.generate_library import LibraryGenerator
+
+def build_library(db_path: str, chapters: int, chapter_chars: int = 2000,
+                  seed: int = 42) -> Dict[str, Any]:
+    """创建一个单项目、章节等长的合成章节库
+    
+    Args:
+        db_path: 数据库文件路径
+        chapters: 章节数
+        chapter_chars: 每章字数
+        seed: 随机种子
+    
+    Returns:
+        Dict[str, Any]: 包含 project_id 和 chapter_ids
+    """
+    generator = LibraryGenerator(seed=seed, median_chars=chapter_chars, sigma=0)
+    project = generator.generate(db_path, projects=1, chapters=chapters)['projects'][0]
+    return {'project_id': project['id'], 'chapter_ids': project['chapter_ids']}
+
+def generate_text(seed: int, length: int) -> str:
+    """生成指定长度的确定性中文正文"""
+    return LibraryGenerator(seed=seed).text(length)
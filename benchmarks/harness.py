@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试框架
+负责计时、汇总统计、结果读写和与基线的对比
+"""
+
+import json
+import platform
+import statistics
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+# 结果文件的默认目录
+RESULTS_DIR = Path(__file__).parent / "results"
+
+class BenchmarkContext:
+    """一次基准测试运行的上下文"""
+    
+    # 单个基准测试处理的条目总数上限，用于为大数据量的测试减少重复次数
+    ITEM_BUDGET = 20000
+    
+    def __init__(self, workdir: Path, size: int, repeat: int = 5, warmup: int = 1):
+        """初始化上下文
+        
+        Args:
+            workdir: 临时工作目录（数据库、导出文件等）
+            size: 合成章节库的章节数
+            repeat: 默认重复次数
+            warmup: 预热次数（不计入结果）
+        """
+        self.workdir = workdir
+        self.size = size
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: List[Dict[str, Any]] = []
+    
+    def repeat_for(self, items: int) -> int:
+        """根据每次处理的条目数计算重复次数"""
+        return max(1, min(self.repeat, self.ITEM_BUDGET // max(items, 1)))
+    
+    def bench(self, suite: str, name: str, func: Callable[[], Any], items: int = 1,
+              repeat: Optional[int] = None, warmup: Optional[int] = None) -> Dict[str, Any]:
+        """运行一个基准测试并记录结果
+        
+        Args:
+            suite: 测试集名称
+            name: 测试名称
+            func: 被测函数（无参数）
+            items: 每次调用处理的条目数，用于计算吞吐量
+            repeat: 重复次数（None表示使用上下文的默认值）
+            warmup: 预热次数（None表示使用上下文的默认值）
+        
+        Returns:
+            Dict[str, Any]: 本次测试的结果
+        """
+        repeat = self.repeat if repeat is None else repeat
+        warmup = self.warmup if warmup is None else warmup
+        for _ in range(warmup):
+            func()
+        
+        samples = []
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            samples.append(perf_counter() - start)
+        
+        result = summarize(samples)
+        result.update({
+            'suite': suite,
+            'name': name,
+            'size': self.size,
+            'repeat': repeat,
+            'items': items,
+            'items_per_sec': items / result['mean_s'] if result['mean_s'] > 0 else 0.0
+        })
+        self.results.append(result)
+        print(f"  {result_key(result):<50} p50={result['p50_ms']:>10.3f}ms "
+              f"p95={result['p95_ms']:>10.3f}ms {result['items_per_sec']:>12.1f}/s")
+        return result
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """计算耗时样本的统计摘要
+    
+    Args:
+        samples: 耗时样本（秒）
+    
+    Returns:
+        Dict[str, Any]: 统计摘要，时间单位为毫秒
+    """
+    ordered = sorted(samples)
+    p95_index = min(int(round(0.95 * (len(ordered) - 1))), len(ordered) - 1)
+    mean = statistics.fmean(ordered)
+    return {
+        'mean_s': mean,
+        'mean_ms': mean * 1000,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[p95_index] * 1000,
+        'min_ms': ordered[0] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+def result_key(result: Dict[str, Any]) -> str:
+    """结果的唯一键，用于与基线对比"""
+    return f"{result['suite']}.{result['name']}[{result['size']}]"
+
+def save_results(results: List[Dict[str, Any]], path: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None) -> str:
+    """保存结果到JSON文件
+    
+    Args:
+        results: 结果列表
+        path: 文件路径（None表示写入 benchmarks/results/bench_<时间>.json）
+        metadata: 附加的运行信息
+    
+    Returns:
+        写入的文件路径
+    """
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = str(RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    data = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'metadata': metadata or {},
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """读取结果文件
+    
+    Args:
+        path: 文件路径
+    
+    Returns:
+        以结果键为索引的结果字典
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {result_key(result): result for result in data.get('results', [])}
+
+def compare_results(baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]],
+                    threshold: float = 0.2, metric: str = 'p50_ms') -> List[Dict[str, Any]]:
+    """与基线对比
+    
+    Args:
+        baseline: 基线结果（load_results 的返回值）
+        current: 当前结果
+        threshold: 允许的相对变慢比例，超过即视为回归
+        metric: 对比的指标
+    
+    Returns:
+        对比列表，每项包含 key、baseline、current、change 和 status
+        （status 为 regression / improved / ok / new / missing）
+    """
+    rows = []
+    for key in sorted(set(baseline) | set(current)):
+        old = baseline.get(key)
+        new = current.get(key)
+        if old is None or new is None:
+            rows.append({
+                'key': key,
+                'baseline': old[metric] if old else None,
+                'current': new[metric] if new else None,
+                'change': None,
+                'status': 'new' if old is None else 'missing'
+            })
+            continue
+        change = (new[metric] - old[metric]) / old[metric] if old[metric] > 0 else 0.0
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({
+            'key': key,
+            'baseline': old[metric],
+            'current': new[metric],
+            'change': change,
+            'status': status
+        })
+    return rows
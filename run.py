@@ -3,6 +3,10 @@
 
 """
 AI写作助手程序入口
+
+用法:
+    python run.py                     启动程序
+    python run.py --profile-startup   输出启动耗时分析（模块导入和初始化各阶段）后退出
 """
 
 import sys
@@ -12,22 +16,19 @@ from pathlib import Path
 src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
-from src.main import create_application, load_stylesheet, create_main_window
+from utils.startup_profiler import startup_profiler
 
 def main():
     """程序入口函数"""
-    # 创建应用
-    app = create_application(sys.argv)
-    
-    # 加载样式表
-    load_stylesheet(app)
+    # 启动分析需要在导入界面相关模块之前开始
+    if "--profile-startup" in sys.argv:
+        startup_profiler.start()
     
-    # 创建并显示主窗口
-    window = create_main_window()
-    window.show()
+    with startup_profiler.phase("导入模块"):
+        from src.main import run
     
-    # 运行应用
-    sys.exit(app.exec())
+    # 创建应用和主窗口并运行
+    sys.exit(run(sys.argv))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -4,10 +4,26 @@
 """
 AI服务模块
 提供AI内容生成和续写功能
+
+各服务类在首次访问时才导入，只用到提示词模板或对话会话时不会加载 requests 等网络库
 """
 
-from .base import BaseAIService
-from .deepseek import DeepSeekAIService
-from .prompt import PromptTemplate
+from importlib import import_module
+
+# 类名 -> 所在的子模块
+_SERVICES = {
+    'BaseAIService': 'base',
+    'DeepSeekAIService': 'deepseek',
+    'PromptTemplate': 'prompt',
+    'ConversationSession': 'conversation'
+}
+
+__all__ = list(_SERVICES)
 
-__all__ = ['BaseAIService', 'DeepSeekAIService', 'PromptTemplate'] 
\ No newline at end of file
+def __getattr__(name):
+    module = _SERVICES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
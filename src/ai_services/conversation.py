@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多轮对话会话
+以只追加的方式维护消息列表，使服务端的前缀（KV）缓存可以在多轮之间命中
+"""
+
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from utils.logger import logger
+from utils.memory import text_size
+
+class ConversationSession:
+    """多轮对话会话
+    
+    消息列表的顺序固定为：系统提示词 -> 章节上下文 -> 各轮对话。
+    前两部分在会话期间不变，之后的对话只追加不修改，
+    因此每一轮请求都以上一轮请求的全部消息为前缀。
+    """
+    
+    # 保留的对话消息数上限（不含系统提示词和上下文），超出时丢弃最早的一轮
+    MAX_TURN_MESSAGES = 40
+    
+    def __init__(self, service, system_prompt: str, context_message: Optional[str] = None,
+                 history: Optional[List[Dict[str, str]]] = None):
+        """初始化会话
+        
+        Args:
+            service: AI服务实例（需提供 chat(messages, max_tokens) 方法，流式发送时还需提供 chat_stream）
+            system_prompt: 系统提示词
+            context_message: 章节上下文消息（可选）
+            history: 用于初始化的历史对话消息（可选）
+        """
+        self.service = service
+        self.prefix = [{"role": "system", "content": system_prompt}]
+        if context_message:
+            self.prefix.append({"role": "system", "content": context_message})
+        self.turns = list(history or [])
+        self.usage = {
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'prompt_cache_hit_tokens': 0,
+            'prompt_cache_miss_tokens': 0
+        }
+    
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """完整的消息列表"""
+        return self.prefix + self.turns
+    
+    def memory_usage(self) -> Tuple[int, int]:
+        """消息列表的 (消息数, 估算字节数)，供内存分析使用"""
+        messages = self.messages
+        return len(messages), text_size(message["content"] for message in messages)
+    
+    def send(self, prompt: str, max_tokens: int = 1000,
+             on_delta: Optional[Callable[[str, str], None]] = None,
+             is_cancelled: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """发送一轮用户消息
+        
+        Args:
+            prompt: 用户消息
+            max_tokens: 最大生成token数
+            on_delta: 流式接收增量的回调（可选，参数见 DeepSeekAIService.chat_stream），
+                为None时使用非流式请求
+            is_cancelled: 流式请求的取消检查（可选）
+        
+        Returns:
+            Dict[str, Any]: 包含text和usage字段，失败时包含error字段
+        """
+        messages = self.messages + [{"role": "user", "content": prompt}]
+        if on_delta is not None:
+            result = self.service.chat_stream(messages, max_tokens, on_delta, is_cancelled)
+        else:
+            result = self.service.chat(messages, max_tokens)
+        if "error" in result:
+            # 失败的一轮不计入会话，保持消息前缀不变
+            return result
+        
+        self.turns.append({"role": "user", "content": prompt})
+        self.turns.append({"role": "assistant", "content": result["text"]})
+        if len(self.turns) > self.MAX_TURN_MESSAGES:
+            self.turns = self.turns[-self.MAX_TURN_MESSAGES:]
+        
+        self._record_usage(result.get("usage") or {})
+        return result
+    
+    def _record_usage(self, usage: Dict[str, Any]):
+        """累计用量统计"""
+        self.usage['requests'] += 1
+        for key in ('prompt_tokens', 'completion_tokens',
+                    'prompt_cache_hit_tokens', 'prompt_cache_miss_tokens'):
+            self.usage[key] += usage.get(key) or 0
+        logger.debug(
+            f"对话会话用量: prompt={usage.get('prompt_tokens')}, "
+            f"缓存命中={usage.get('prompt_cache_hit_tokens')}, "
+            f"累计缓存命中={self.usage['prompt_cache_hit_tokens']}"
+        )
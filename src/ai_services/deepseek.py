@@ -8,10 +8,62 @@ DeepSeek AI服务实现
 
 import json
 import requests
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable
 
 from utils.logger import logger
+from utils.perf import timed
+
+class CancelToken:
+    """流式请求的取消标记
+    
+    可直接作为 chat_stream 的 is_cancelled 参数，每个请求使用一个。cancel() 可在任意线程调用：
+    除了设置标记，还会断开正在读取的流式响应，阻塞在读取上的工作线程随即返回，
+    重试前的等待也会立即结束。
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+    
+    def __call__(self) -> bool:
+        return self._event.is_set()
+    
+    def cancel(self):
+        """取消请求并断开正在读取的响应"""
+        self._event.set()
+        with self._lock:
+            response, self._response = self._response, None
+        if response is not None:
+            _shutdown_response(response)
+    
+    def wait(self, seconds: float) -> bool:
+        """等待指定的时间，期间被取消时提前返回
+        
+        Returns:
+            bool: 是否已取消
+        """
+        return self._event.wait(seconds)
+    
+    def attach(self, response: requests.Response):
+        """登记正在读取的响应（已取消时立即断开）"""
+        with self._lock:
+            self._response = response
+        if self._event.is_set():
+            self.cancel()
+
+def _shutdown_response(response: requests.Response):
+    """从其他线程断开响应的连接，使阻塞的读取立即返回"""
+    try:
+        # urllib3 2.3 起支持 shutdown()，可以唤醒阻塞在 recv 上的线程；旧版本只能关闭连接
+        shutdown = getattr(response.raw, 'shutdown', None)
+        if shutdown is not None:
+            shutdown()
+        response.close()
+    except Exception as e:
+        logger.debug(f"断开流式响应时发生错误: {e}")
 
 class DeepSeekAIService:
     """DeepSeek AI服务类"""
@@ -21,8 +73,11 @@ class DeepSeekAIService:
     DEFAULT_TIMEOUT = 60  # 默认超时时间（秒）
     MAX_RETRIES = 3  # 最大重试次数
     RETRY_DELAY = 2  # 重试延迟（秒）
+    STREAM_CHUNK_SIZE = 128  # 流式响应每次读取的字节数（不超过一个SSE事件，避免攒够缓冲区才交付）
     
-    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, api_url: str = DEFAULT_API_URL, timeout: int = DEFAULT_TIMEOUT):
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, api_url: str = DEFAULT_API_URL, timeout: int = DEFAULT_TIMEOUT,
+                 telemetry: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 pricing: Optional[Dict[str, float]] = None):
         """初始化DeepSeek AI服务
         
         Args:
@@ -30,6 +85,9 @@ class DeepSeekAIService:
             model: 模型名称，默认使用 DeepSeek-R1
             api_url: API完整URL
             timeout: 请求超时时间（秒）
+            telemetry: 每次调用结束后接收调用记录的回调（可选），记录格式见 _build_telemetry
+            pricing: 当前模型的单价（元/百万tokens），包含 prompt、completion 和可选的
+                cached_prompt（缓存命中部分的提示词单价），用于估算每次调用的费用
         """
         # 处理 API 密钥，确保格式正确
         self.api_key = api_key.strip()
@@ -40,6 +98,8 @@ class DeepSeekAIService:
         self.model = model
         self.api_url = api_url
         self.timeout = timeout
+        self.telemetry = telemetry
+        self.pricing = pricing
         
         # 设置请求头
         self.headers = {
@@ -47,27 +107,45 @@ class DeepSeekAIService:
             "Content-Type": "application/json"
         }
     
-    def _make_request(self, payload: Dict[str, Any], retry_count: int = 0) -> Dict[str, Any]:
+    def _make_request(self, payload: Dict[str, Any], retry_count: int = 0,
+                      stats: Optional[Dict[str, Any]] = None, stream: bool = False,
+                      is_cancelled: Optional[Callable[[], bool]] = None):
         """发送API请求并处理重试逻辑
         
         Args:
             payload: 请求数据
             retry_count: 当前重试次数
+            stats: 用于记录重试次数、首字节时间和失败类型的字典（可选）
+            stream: 是否为流式请求（只在收到响应头之前重试）
+            is_cancelled: 返回True时不再发送请求或重试（可选）
             
         Returns:
-            Dict[str, Any]: API响应数据
+            API响应数据；流式请求返回尚未读取响应体的 requests.Response
         """
+        if stats is None:
+            stats = {}
+        stats['retries'] = retry_count
+        self._check_cancelled(stats, is_cancelled)
         try:
             response = requests.post(
                 self.api_url,
                 json=payload,
                 headers=self.headers,
-                timeout=self.timeout
+                timeout=self.timeout,
+                stream=stream
             )
-            
             if response.status_code == 200:
+                if stream:
+                    # 首字时间由 chat_stream 在收到第一个增量时记录
+                    return response
+                # 非流式请求在生成完成后才返回响应头，这里记录的是收到响应头的时间
+                stats['ttft'] = response.elapsed.total_seconds()
                 return response.json()
             
+            if not stream:
+                # 流式请求的首字时间只在 chat_stream 收到第一个增量时记录，重试前的错误响应不计入
+                stats['ttft'] = response.elapsed.total_seconds()
+            
             # 处理错误响应
             error_data = response.json().get("error", {})
             error_message = error_data.get("message", "未知错误")
@@ -76,29 +154,62 @@ class DeepSeekAIService:
             # 如果是可重试的错误且未超过最大重试次数
             if (response.status_code in [429, 500, 502, 503, 504] and 
                 retry_count < self.MAX_RETRIES):
-                logger.warning(f"请求失败（状态码：{response.status_code}），准备第{retry_count + 1}次重试")
-                time.sleep(self.RETRY_DELAY * (retry_count + 1))  # 指数退避
-                return self._make_request(payload, retry_count + 1)
+                self._wait_before_retry(f"请求失败（状态码：{response.status_code}）", retry_count,
+                                        stats, is_cancelled)
+                return self._make_request(payload, retry_count + 1, stats, stream, is_cancelled)
             
+            stats['outcome'] = 'rate_limited' if response.status_code == 429 else 'http_error'
             raise Exception(f"API请求失败: {response.status_code} - {error_message}")
             
         except requests.exceptions.Timeout:
             if retry_count < self.MAX_RETRIES:
-                logger.warning(f"请求超时，准备第{retry_count + 1}次重试")
-                time.sleep(self.RETRY_DELAY * (retry_count + 1))
-                return self._make_request(payload, retry_count + 1)
+                self._wait_before_retry("请求超时", retry_count, stats, is_cancelled)
+                return self._make_request(payload, retry_count + 1, stats, stream, is_cancelled)
+            stats['outcome'] = 'timeout'
             raise Exception("API请求多次超时，请检查网络连接或稍后重试")
             
         except requests.exceptions.ConnectionError:
             if retry_count < self.MAX_RETRIES:
-                logger.warning(f"连接错误，准备第{retry_count + 1}次重试")
-                time.sleep(self.RETRY_DELAY * (retry_count + 1))
-                return self._make_request(payload, retry_count + 1)
+                self._wait_before_retry("连接错误", retry_count, stats, is_cancelled)
+                return self._make_request(payload, retry_count + 1, stats, stream, is_cancelled)
+            stats['outcome'] = 'connection_error'
             raise Exception("无法连接到API服务器，请检查网络连接")
             
         except Exception as e:
+            if stats.get('outcome') == 'cancelled':
+                raise
             raise Exception(f"API请求异常: {str(e)}")
     
+    def _wait_before_retry(self, reason: str, retry_count: int, stats: Dict[str, Any],
+                           is_cancelled: Optional[Callable[[], bool]]):
+        """重试前等待（指数退避），已取消或等待期间被取消时抛出异常，不再重试
+        
+        Args:
+            reason: 失败原因（写入日志）
+            retry_count: 当前重试次数
+            stats: 请求的统计字典
+            is_cancelled: 取消检查（可选）
+        """
+        self._check_cancelled(stats, is_cancelled)
+        logger.warning(f"{reason}，准备第{retry_count + 1}次重试")
+        delay = self.RETRY_DELAY * (retry_count + 1)
+        if isinstance(is_cancelled, CancelToken):
+            is_cancelled.wait(delay)
+        elif is_cancelled is None:
+            time.sleep(delay)
+        else:
+            deadline = time.monotonic() + delay
+            while not is_cancelled() and time.monotonic() < deadline:
+                time.sleep(min(0.1, deadline - time.monotonic()))
+        self._check_cancelled(stats, is_cancelled)
+    
+    @staticmethod
+    def _check_cancelled(stats: Dict[str, Any], is_cancelled: Optional[Callable[[], bool]]):
+        """已取消时记录结果并抛出异常"""
+        if is_cancelled and is_cancelled():
+            stats['outcome'] = 'cancelled'
+            raise Exception("生成已取消")
+    
     def validate_api_key(self) -> bool:
         """验证API密钥是否有效
         
@@ -125,13 +236,15 @@ class DeepSeekAIService:
             logger.error(f"验证API密钥时发生错误: {str(e)}")
             raise
     
-    def generate_content(self, prompt: str, context: Optional[str] = None, max_tokens: int = 1000) -> Dict[str, Any]:
+    def generate_content(self, prompt: str, context: Optional[str] = None, max_tokens: int = 1000,
+                         history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """生成内容
         
         Args:
             prompt: 提示词
             context: 上下文（可选）
             max_tokens: 最大生成token数
+            history: 之前的对话消息列表，格式为[{'role': 'user'/'assistant', 'content': ...}]（可选）
             
         Returns:
             Dict[str, Any]: 生成的内容，包含text字段
@@ -147,12 +260,38 @@ class DeepSeekAIService:
                     "role": "system"
                 })
             
+            # 添加历史对话
+            if history:
+                messages.extend(history)
+            
             # 添加用户提示
             messages.append({
                 "content": prompt,
                 "role": "user"
             })
             
+            return self.chat(messages, max_tokens)
+                
+        except Exception as e:
+            error_msg = f"生成内容时发生错误: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+    
+    @timed("ai.chat")
+    def chat(self, messages: List[Dict[str, str]], max_tokens: int = 1000) -> Dict[str, Any]:
+        """发送完整的消息列表并获取回复
+        
+        Args:
+            messages: 消息列表，格式为[{'role': 'system'/'user'/'assistant', 'content': ...}]
+            max_tokens: 最大生成token数
+            
+        Returns:
+            Dict[str, Any]: 包含text和usage字段，失败时包含error字段
+        """
+        stats = {}
+        usage = {}
+        start = time.perf_counter()
+        try:
             # 准备请求数据
             payload = {
                 "messages": messages,
@@ -161,14 +300,149 @@ class DeepSeekAIService:
             }
             
             # 发送请求
-            response = self._make_request(payload)
+            response = self._make_request(payload, stats=stats)
+            usage = response.get("usage") or {}
             generated_text = response["choices"][0]["message"]["content"]
-            return {"text": generated_text.strip()}
+            stats['outcome'] = 'ok'
+            result = {"text": generated_text.strip(), "usage": usage}
                 
         except Exception as e:
             error_msg = f"生成内容时发生错误: {str(e)}"
             logger.error(error_msg)
-            return {"error": error_msg}
+            stats.setdefault('outcome', 'error')
+            stats['error'] = str(e)
+            result = {"error": error_msg}
+        
+        result["telemetry"] = self._build_telemetry(stats, usage, time.perf_counter() - start)
+        if self.telemetry:
+            self.telemetry(result["telemetry"])
+        return result
+    
+    @timed("ai.chat_stream")
+    def chat_stream(self, messages: List[Dict[str, str]], max_tokens: int = 1000,
+                    on_delta: Optional[Callable[[str, str], None]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None,
+                    operation: Optional[str] = None) -> Dict[str, Any]:
+        """以流式（SSE）方式发送消息列表，边生成边回调增量
+        
+        Args:
+            messages: 消息列表，格式同 chat
+            max_tokens: 最大生成token数
+            on_delta: 接收每个增量的回调，参数为类型（"reasoning" 或 "content"）和文本；
+                在调用本方法的线程中调用，不能直接操作界面
+            is_cancelled: 返回True时停止读取并关闭连接（可选）；传入 CancelToken 时，
+                取消方可以直接断开连接，不必等到收到下一个增量
+            operation: 调用类型（可选），写入调用记录的 operation 字段
+            
+        Returns:
+            Dict[str, Any]: 同 chat，另含 reasoning 字段（R1 的推理内容）
+        """
+        stats = {}
+        usage = {}
+        start = time.perf_counter()
+        reasoning_parts = []
+        content_parts = []
+        try:
+            payload = {
+                "messages": messages,
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "stream": True,
+                "stream_options": {"include_usage": True}
+            }
+            
+            response = self._make_request(payload, stats=stats, stream=True, is_cancelled=is_cancelled)
+            if isinstance(is_cancelled, CancelToken):
+                is_cancelled.attach(response)
+            with response:
+                for line in response.iter_lines(chunk_size=self.STREAM_CHUNK_SIZE):
+                    self._check_cancelled(stats, is_cancelled)
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    for choice in chunk.get("choices") or []:
+                        delta = choice.get("delta") or {}
+                        for kind, key, parts in (("reasoning", "reasoning_content", reasoning_parts),
+                                                 ("content", "content", content_parts)):
+                            text = delta.get(key)
+                            if not text:
+                                continue
+                            if 'ttft' not in stats:
+                                stats['ttft'] = time.perf_counter() - start
+                            parts.append(text)
+                            if on_delta:
+                                on_delta(kind, text)
+            
+            stats['outcome'] = 'ok'
+            result = {
+                "text": "".join(content_parts).strip(),
+                "reasoning": "".join(reasoning_parts),
+                "usage": usage
+            }
+                
+        except Exception as e:
+            if is_cancelled and is_cancelled():
+                # 取消方断开连接时读取会以连接错误结束
+                stats['outcome'] = 'cancelled'
+            error_msg = f"生成内容时发生错误: {str(e)}"
+            if stats.get('outcome') == 'cancelled':
+                logger.info(error_msg)
+            else:
+                logger.error(error_msg)
+            stats.setdefault('outcome', 'error')
+            stats['error'] = str(e)
+            result = {"error": error_msg}
+        
+        result["telemetry"] = self._build_telemetry(stats, usage, time.perf_counter() - start)
+        if operation:
+            result["telemetry"]['operation'] = operation
+        if self.telemetry:
+            self.telemetry(result["telemetry"])
+        return result
+    
+    def _build_telemetry(self, stats: Dict[str, Any], usage: Dict[str, Any], latency: float) -> Dict[str, Any]:
+        """生成一次调用的记录
+        
+        Args:
+            stats: _make_request（流式请求时为 chat_stream）记录的重试次数、首字节时间和失败类型
+            usage: 响应中的用量字段
+            latency: 总耗时（秒，含重试等待）
+            
+        Returns:
+            Dict[str, Any]: 调用记录，时间单位为毫秒
+        """
+        details = usage.get("completion_tokens_details") or {}
+        ttft = stats.get('ttft')
+        return {
+            'model': self.model,
+            'prompt_tokens': usage.get("prompt_tokens"),
+            'completion_tokens': usage.get("completion_tokens"),
+            'reasoning_tokens': details.get("reasoning_tokens", usage.get("reasoning_tokens")),
+            'cached_tokens': usage.get("prompt_cache_hit_tokens"),
+            'ttft_ms': round(ttft * 1000) if ttft is not None else None,
+            'latency_ms': round(latency * 1000),
+            'retries': stats.get('retries', 0),
+            'outcome': stats.get('outcome', 'error'),
+            'error': (stats.get('error') or "")[:200] or None,
+            'cost': self._estimate_cost(usage)
+        }
+    
+    def _estimate_cost(self, usage: Dict[str, Any]) -> Optional[float]:
+        """按配置的单价估算一次调用的费用（元），未配置单价或没有用量时返回None"""
+        if not self.pricing or not usage:
+            return None
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        cached_tokens = usage.get("prompt_cache_hit_tokens") or 0
+        prompt_price = self.pricing.get('prompt', 0)
+        cached_price = self.pricing.get('cached_prompt', prompt_price)
+        return ((prompt_tokens - cached_tokens) * prompt_price
+                + cached_tokens * cached_price
+                + (usage.get("completion_tokens") or 0) * self.pricing.get('completion', 0)) / 1_000_000
     
     def retry_on_error(self, func, max_retries: int = 3, *args, **kwargs):
         """错误重试装饰器
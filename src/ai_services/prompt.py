@@ -8,6 +8,8 @@
 
 from typing import Dict, Any, Optional
 
+from utils.perf import timed
+
 class PromptTemplate:
     """提示词模板类"""
     
@@ -40,6 +42,25 @@ class PromptTemplate:
 4. 注意承上启下的过渡自然
 """
 
+    # 多轮对话的系统提示词，对同一作品保持不变，作为可被服务端缓存的消息前缀
+    DEFAULT_SYSTEM_PERSONA = """
+你是一位专业的{genre}作家，擅长创作{style}风格的作品。
+你会在多轮对话中协助作者创作，注意与已有内容保持风格、人物和情节的一致。
+"""
+
+    # 多轮对话中放在系统提示词之后的章节上下文
+    CONTEXT_MESSAGE = """以下是当前章节的已有内容：
+
+{context}"""
+
+    # 行内续写建议的提示词，要求只输出紧接光标的一小段
+    INLINE_SUGGESTION = """请直接续写下面这段文字，只输出紧接在末尾之后的一两句话，不要重复原文，不要添加任何解释：
+
+{context}"""
+
+    # 多轮对话中续写模板的{context}替换为对上下文消息的引用，避免每轮重复发送全文
+    CONTEXT_REFERENCE = "（见前文提供的当前章节已有内容）"
+
     def __init__(self):
         """初始化提示词模板"""
         # 当前使用的模板
@@ -47,6 +68,7 @@ class PromptTemplate:
         self.content_continuation = self.DEFAULT_CONTENT_CONTINUATION
     
     @classmethod
+    @timed("prompt.get_generation_prompt")
     def get_generation_prompt(cls, prompt: str, custom_template: Optional[str] = None, **kwargs) -> str:
         """获取内容生成的提示词
         
@@ -80,6 +102,7 @@ class PromptTemplate:
             return cls.DEFAULT_CONTENT_GENERATION.format(**params)
     
     @classmethod
+    @timed("prompt.get_continuation_prompt")
     def get_continuation_prompt(cls, context: str, custom_template: Optional[str] = None, **kwargs) -> str:
         """获取续写的提示词
         
@@ -112,6 +135,47 @@ class PromptTemplate:
             # 如果自定义模板格式化失败，回退到默认模板
             return cls.DEFAULT_CONTENT_CONTINUATION.format(**params)
     
+    @classmethod
+    def get_system_prompt(cls, **kwargs) -> str:
+        """获取多轮对话的系统提示词
+        
+        Args:
+            **kwargs: 其他参数
+                - genre: 作品类型（默认为"小说"）
+                - style: 写作风格（默认为"现代"）
+            
+        Returns:
+            格式化后的系统提示词
+        """
+        return cls.DEFAULT_SYSTEM_PERSONA.format(
+            genre=kwargs.get('genre', '小说'),
+            style=kwargs.get('style', '现代')
+        )
+    
+    @classmethod
+    def get_context_message(cls, context: str) -> str:
+        """获取多轮对话中的章节上下文消息
+        
+        Args:
+            context: 已有内容
+            
+        Returns:
+            格式化后的上下文消息
+        """
+        return cls.CONTEXT_MESSAGE.format(context=context)
+    
+    @classmethod
+    def get_suggestion_prompt(cls, context: str) -> str:
+        """获取行内续写建议的提示词
+        
+        Args:
+            context: 光标前的内容
+            
+        Returns:
+            格式化后的提示词
+        """
+        return cls.INLINE_SUGGESTION.format(context=context)
+    
     @staticmethod
     def validate_template(template: str, params: Dict[str, Any]) -> bool:
         """验证模板是否有效
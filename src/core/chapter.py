@@ -8,8 +8,10 @@
 
 from typing import Optional, List, Dict, Any
 
+from database.models import CHAPTER_ORDER_STEP
 from database.operations import DatabaseManager
 from utils.logger import logger
+from utils.perf import timed
 
 class ChapterManager:
     """章节管理类"""
@@ -18,6 +20,7 @@ class ChapterManager:
         """初始化章节管理器"""
         self.db = DatabaseManager()
     
+    @timed("core.create_chapter")
     def create_chapter(self, project_id: int, title: str, 
                       content: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """创建新章节
@@ -35,11 +38,7 @@ class ChapterManager:
             logger.error("章节标题不能为空")
             return None
         
-        # 获取当前项目的章节数，用于设置order
-        chapters = self.db.get_project_chapters(project_id)
-        next_order = len(chapters)
-        
-        # 创建章节
+        # 创建章节（数据库层将其排在项目的最后）
         chapter = self.db.create_chapter(
             project_id=project_id,
             title=title.strip(),
@@ -48,14 +47,11 @@ class ChapterManager:
         if not chapter:
             return None
         
-        # 更新章节顺序
-        self.db.update_chapter(chapter.id, order=next_order)
-        
         return {
             'id': chapter.id,
             'title': chapter.title,
             'content': chapter.content,
-            'order': next_order,
+            'order': chapter.order,
             'created_at': chapter.created_at,
             'updated_at': chapter.updated_at
         }
@@ -83,6 +79,7 @@ class ChapterManager:
             'updated_at': chapter.updated_at
         }
     
+    @timed("core.get_project_chapters")
     def get_project_chapters(self, project_id: int) -> List[Dict[str, Any]]:
         """获取项目的所有章节
         
@@ -129,6 +126,7 @@ class ChapterManager:
         
         return self.db.update_chapter(chapter_id, **update_data)
     
+    @timed("core.delete_chapter")
     def delete_chapter(self, chapter_id: int) -> bool:
         """删除章节
         
@@ -150,6 +148,7 @@ class ChapterManager:
         self._reorder_chapters(chapter.project_id)
         return True
     
+    @timed("core.update_chapter_order")
     def update_chapter_order(self, project_id: int, chapter_orders: List[Dict[str, int]]) -> bool:
         """更新章节顺序
         
@@ -166,7 +165,7 @@ class ChapterManager:
         """重新排序项目的所有章节"""
         chapters = self.db.get_project_chapters(project_id)
         chapter_orders = [
-            {'id': chapter.id, 'order': i}
+            {'id': chapter.id, 'order': i * CHAPTER_ORDER_STEP}
             for i, chapter in enumerate(chapters)
         ]
         self.db.update_chapter_order(project_id, chapter_orders)
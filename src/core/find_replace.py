@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+全局查找替换核心逻辑
+在整个项目的所有章节中查找、替换文本，支持普通文本和正则表达式
+"""
+
+import re
+from typing import Optional, Dict, Callable, List, Pattern, Tuple
+
+from database.operations import DatabaseManager
+from utils.logger import logger
+
+class FindReplaceEngine:
+    """全局查找替换引擎"""
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """初始化查找替换引擎
+        
+        Args:
+            db_path: 数据库路径（在工作线程中使用时需传入，以创建独立的连接）
+        """
+        self.db = DatabaseManager(db_path)
+    
+    @staticmethod
+    def compile_pattern(find_text: str, use_regex: bool = False,
+                        case_sensitive: bool = True) -> Pattern:
+        """编译查找模式
+        
+        Args:
+            find_text: 查找内容
+            use_regex: 是否按正则表达式处理
+            case_sensitive: 是否区分大小写
+        
+        Returns:
+            编译后的正则表达式
+        
+        Raises:
+            re.error: 正则表达式无效
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        return re.compile(find_text if use_regex else re.escape(find_text), flags)
+    
+    def preview(self, project_id: int, pattern: Pattern,
+                progress: Optional[Callable[[int, int], None]] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> Dict[int, Tuple[str, int]]:
+        """统计项目中每个章节的匹配数
+        
+        Args:
+            project_id: 项目ID
+            pattern: 查找模式
+            progress: 进度回调，参数为 (已处理章节数, 章节总数)
+            is_cancelled: 返回True时中止统计
+        
+        Returns:
+            {chapter_id: (章节标题, 匹配数)}，只包含有匹配的章节
+        """
+        total = self.db.count_project_chapters(project_id)
+        matches = {}
+        for index, (chapter_id, title, content) in enumerate(
+                self.db.iter_chapter_contents(project_id), 1):
+            if is_cancelled and is_cancelled():
+                break
+            count = sum(1 for _ in pattern.finditer(content))
+            if count:
+                matches[chapter_id] = (title, count)
+            if progress:
+                progress(index, total)
+        return matches
+    
+    def apply(self, project_id: int, pattern: Pattern, replacement: str,
+              use_regex: bool = False,
+              progress: Optional[Callable[[int, int], None]] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[Tuple[str, int]]:
+        """在单个事务中替换项目所有章节中的匹配内容
+        
+        Args:
+            project_id: 项目ID
+            pattern: 查找模式
+            replacement: 替换内容（正则模式下支持 \\1 等分组引用）
+            use_regex: 是否按正则表达式处理替换内容
+            progress: 进度回调，参数为 (已处理章节数, 章节总数)
+            is_cancelled: 返回True时中止并回滚，不修改任何章节
+        
+        Returns:
+            (batch_id, 替换处数) 元组，可用 batch_id 撤销；失败或取消时返回None
+        """
+        # 普通文本模式下替换内容按字面处理，不解析反斜杠转义
+        repl = replacement if use_regex else (lambda match: replacement)
+        
+        def transform(content: str) -> Tuple[str, int]:
+            return pattern.subn(repl, content)
+        
+        description = f"全局替换: {pattern.pattern} -> {replacement}"[:200]
+        result = self.db.rewrite_chapters(project_id, transform, description, progress, is_cancelled)
+        if result:
+            logger.info(f"全局替换完成: 共替换{result[1]}处")
+        return result
+    
+    def undo(self, batch_id: str,
+             progress: Optional[Callable[[int, int], None]] = None,
+             is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[Tuple[int, List[str]]]:
+        """撤销一次全局替换（替换后又被编辑过的章节不恢复）
+        
+        Args:
+            batch_id: apply 返回的批次ID
+            progress: 进度回调，参数为 (已处理章节数, 章节总数)
+            is_cancelled: 返回True时中止并回滚
+        
+        Returns:
+            (恢复的章节数, 跳过的章节标题列表) 元组，失败或取消时返回None
+        """
+        return self.db.undo_revision_batch(batch_id, progress, is_cancelled)
@@ -12,13 +12,20 @@ from datetime import datetime
 
 from database.operations import DatabaseManager
 from utils.logger import logger
+from utils.perf import timed
 
 class ProjectManager:
     """项目管理类"""
     
-    def __init__(self):
-        """初始化项目管理器"""
-        self.db = DatabaseManager()
+    def __init__(self, db_path: Optional[str] = None, export_dir: Optional[str] = None):
+        """初始化项目管理器
+        
+        Args:
+            db_path: 数据库文件路径（None表示使用默认数据库）
+            export_dir: 导出目录（None表示使用项目根目录下的exports）
+        """
+        self.db = DatabaseManager(db_path)
+        self.export_dir = Path(export_dir) if export_dir else Path(__file__).parent.parent.parent / "exports"
     
     def create_project(self, name: str, description: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """创建新项目
@@ -48,6 +55,7 @@ class ProjectManager:
             'updated_at': project.updated_at
         }
     
+    @timed("core.get_project")
     def get_project(self, project_id: int) -> Optional[Dict[str, Any]]:
         """获取项目信息
         
@@ -77,6 +85,7 @@ class ProjectManager:
             ]
         }
     
+    @timed("core.get_all_projects")
     def get_all_projects(self) -> List[Dict[str, Any]]:
         """获取所有项目
         
@@ -84,6 +93,8 @@ class ProjectManager:
             项目信息列表
         """
         projects = self.db.get_all_projects()
+        # 章节数由聚合查询一次取得（会话已关闭，不能再延迟加载 project.chapters）
+        chapter_counts = {summary['id']: summary['chapter_count'] for summary in self.db.get_project_summaries()}
         return [
             {
                 'id': project.id,
@@ -91,7 +102,7 @@ class ProjectManager:
                 'description': project.description,
                 'created_at': project.created_at,
                 'updated_at': project.updated_at,
-                'chapter_count': len(project.chapters)
+                'chapter_count': chapter_counts.get(project.id, 0)
             }
             for project in projects
         ]
@@ -120,6 +131,7 @@ class ProjectManager:
         
         return self.db.update_project(project_id, **update_data)
     
+    @timed("core.delete_project")
     def delete_project(self, project_id: int) -> bool:
         """删除项目
         
@@ -131,6 +143,7 @@ class ProjectManager:
         """
         return self.db.delete_project(project_id)
     
+    @timed("core.export_project")
     def export_project(self, project_id: int, export_format: str = 'json') -> Optional[str]:
         """导出项目
         
@@ -146,9 +159,12 @@ class ProjectManager:
             logger.error(f"项目不存在: {project_id}")
             return None
         
+        # 项目对象已脱离会话，章节需要单独查询（按order排序）
+        chapters = self.db.get_project_chapters(project_id)
+        
         # 创建导出目录
-        export_dir = Path(__file__).parent.parent.parent / "exports"
-        export_dir.mkdir(exist_ok=True)
+        export_dir = self.export_dir
+        export_dir.mkdir(parents=True, exist_ok=True)
         
         # 生成导出文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -156,11 +172,11 @@ class ProjectManager:
         
         try:
             if export_format == 'json':
-                return self._export_as_json(project, export_dir / f"{filename}.json")
+                return self._export_as_json(project, chapters, export_dir / f"{filename}.json")
             elif export_format == 'txt':
-                return self._export_as_txt(project, export_dir / f"{filename}.txt")
+                return self._export_as_txt(project, chapters, export_dir / f"{filename}.txt")
             elif export_format == 'docx':
-                return self._export_as_docx(project, export_dir / f"{filename}.docx")
+                return self._export_as_docx(project, chapters, export_dir / f"{filename}.docx")
             else:
                 logger.error(f"不支持的导出格式: {export_format}")
                 return None
@@ -168,7 +184,7 @@ class ProjectManager:
             logger.error(f"导出项目失败: {e}")
             return None
     
-    def _export_as_json(self, project: Any, filepath: Path) -> str:
+    def _export_as_json(self, project: Any, chapters: List[Any], filepath: Path) -> str:
         """导出为JSON格式"""
         import json
         
@@ -187,7 +203,7 @@ class ProjectManager:
                     'created_at': chapter.created_at.isoformat(),
                     'updated_at': chapter.updated_at.isoformat()
                 }
-                for chapter in sorted(project.chapters, key=lambda x: x.order)
+                for chapter in chapters
             ]
         }
         
@@ -196,7 +212,7 @@ class ProjectManager:
         
         return str(filepath)
     
-    def _export_as_txt(self, project: Any, filepath: Path) -> str:
+    def _export_as_txt(self, project: Any, chapters: List[Any], filepath: Path) -> str:
         """导出为TXT格式"""
         with open(filepath, 'w', encoding='utf-8') as f:
             # 写入项目信息
@@ -205,14 +221,14 @@ class ProjectManager:
                 f.write(f"{project.description}\n\n")
             
             # 写入章节内容
-            for chapter in sorted(project.chapters, key=lambda x: x.order):
+            for chapter in chapters:
                 f.write(f"## {chapter.title}\n\n")
                 if chapter.content:
                     f.write(f"{chapter.content}\n\n")
         
         return str(filepath)
     
-    def _export_as_docx(self, project: Any, filepath: Path) -> str:
+    def _export_as_docx(self, project: Any, chapters: List[Any], filepath: Path) -> str:
         """导出为DOCX格式"""
         from docx import Document
         from docx.shared import Pt
@@ -228,7 +244,7 @@ class ProjectManager:
             doc.add_paragraph(project.description)
         
         # 添加章节内容
-        for chapter in sorted(project.chapters, key=lambda x: x.order):
+        for chapter in chapters:
             # 添加章节标题
             doc.add_heading(chapter.title, level=1)
             
@@ -6,12 +6,10 @@
 处理应用设置的读取和更新
 """
 
-import os
-import yaml
-from pathlib import Path
 from typing import Optional, Dict, Any
 
 from database.operations import DatabaseManager
+from utils.config import load_config
 from utils.logger import logger
 
 class SettingsManager:
@@ -24,14 +22,7 @@ class SettingsManager:
     
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
-        config_path = Path(__file__).parent.parent.parent / "config" / "config.yaml"
-        if config_path.exists():
-            try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    return yaml.safe_load(f)
-            except Exception as e:
-                logger.error(f"加载配置文件失败: {e}")
-        return {}
+        return load_config()
     
     def get_settings(self) -> Dict[str, Any]:
         """获取应用设置
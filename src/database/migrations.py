@@ -17,7 +17,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import inspect
 
 from utils.logger import logger
-from .models import Base
+from .models import Base, ChapterRevision, AIRequestLog, CHAPTER_ORDER_STEP
 
 class DatabaseMigration:
     """数据库迁移管理类"""
@@ -122,6 +122,54 @@ class DatabaseMigration:
                 'description': '添加AI对话历史表',
                 'up': self._migration_v3_up,
                 'down': self._migration_v3_down
+            },
+            {
+                'version': 4,
+                'description': '添加章节全文检索索引',
+                'up': self._migration_v4_up,
+                'down': self._migration_v4_down
+            },
+            {
+                'version': 5,
+                'description': '添加章节修订记录表',
+                'up': self._migration_v5_up,
+                'down': self._migration_v5_down
+            },
+            {
+                'version': 6,
+                'description': '添加对话历史时间索引',
+                'up': self._migration_v6_up,
+                'down': self._migration_v6_down
+            },
+            {
+                'version': 7,
+                'description': '对话历史添加项目和章节作用域',
+                'up': self._migration_v7_up,
+                'down': self._migration_v7_down
+            },
+            {
+                'version': 8,
+                'description': '添加AI调用记录表',
+                'up': self._migration_v8_up,
+                'down': self._migration_v8_down
+            },
+            {
+                'version': 9,
+                'description': '章节顺序重新编号并添加顺序索引',
+                'up': self._migration_v9_up,
+                'down': self._migration_v9_down
+            },
+            {
+                'version': 10,
+                'description': '对话历史中的失败提示改用error角色',
+                'up': self._migration_v10_up,
+                'down': self._migration_v10_down
+            },
+            {
+                'version': 11,
+                'description': '章节修订记录添加修改后内容的摘要',
+                'up': self._migration_v11_up,
+                'down': self._migration_v11_down
             }
         ]
     
@@ -203,6 +251,221 @@ class DatabaseMigration:
             ai_dialog_history.drop(self.engine)
             logger.info("AI对话历史表删除成功")
     
+    def _migration_v4_up(self):
+        """版本4迁移：添加章节全文检索索引
+        
+        使用 FTS5 外部内容表索引章节标题和正文，trigram 分词器可以
+        直接处理中文（不依赖空格分词）。索引由触发器与 chapters 表保持同步。
+        """
+        # 新建数据库时版本1记录由版本表直接写入，需确保基础表已存在
+        Base.metadata.create_all(self.engine)
+        
+        with self.engine.connect() as conn:
+            try:
+                conn.execute(text("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS chapters_fts USING fts5(
+                        title, content,
+                        content='chapters', content_rowid='id',
+                        tokenize='trigram'
+                    );
+                """))
+            except SQLAlchemyError as e:
+                # 旧版本SQLite（<3.34）不支持trigram分词器，退回unicode61
+                logger.warning(f"trigram分词器不可用，使用unicode61: {e}")
+                conn.rollback()
+                conn.execute(text("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS chapters_fts USING fts5(
+                        title, content,
+                        content='chapters', content_rowid='id',
+                        tokenize='unicode61'
+                    );
+                """))
+            
+            # 同步触发器
+            conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS chapters_fts_ai AFTER INSERT ON chapters BEGIN
+                    INSERT INTO chapters_fts(rowid, title, content)
+                    VALUES (new.id, new.title, new.content);
+                END;
+            """))
+            conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS chapters_fts_ad AFTER DELETE ON chapters BEGIN
+                    INSERT INTO chapters_fts(chapters_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                END;
+            """))
+            conn.execute(text("""
+                CREATE TRIGGER IF NOT EXISTS chapters_fts_au AFTER UPDATE OF title, content ON chapters BEGIN
+                    INSERT INTO chapters_fts(chapters_fts, rowid, title, content)
+                    VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO chapters_fts(rowid, title, content)
+                    VALUES (new.id, new.title, new.content);
+                END;
+            """))
+            
+            # 为已有章节建立索引
+            conn.execute(text("INSERT INTO chapters_fts(chapters_fts) VALUES ('rebuild');"))
+            conn.commit()
+        logger.info("章节全文检索索引创建成功")
+    
+    def _migration_v4_down(self):
+        """版本4迁移回滚：删除章节全文检索索引"""
+        with self.engine.connect() as conn:
+            conn.execute(text("DROP TRIGGER IF EXISTS chapters_fts_ai;"))
+            conn.execute(text("DROP TRIGGER IF EXISTS chapters_fts_ad;"))
+            conn.execute(text("DROP TRIGGER IF EXISTS chapters_fts_au;"))
+            conn.execute(text("DROP TABLE IF EXISTS chapters_fts;"))
+            conn.commit()
+        logger.info("章节全文检索索引删除成功")
+    
+    def _migration_v5_up(self):
+        """版本5迁移：添加章节修订记录表"""
+        inspector = inspect(self.engine)
+        if 'chapter_revisions' not in inspector.get_table_names():
+            Base.metadata.create_all(self.engine, tables=[ChapterRevision.__table__])
+            logger.info("章节修订记录表创建成功")
+    
+    def _migration_v5_down(self):
+        """版本5迁移回滚：删除章节修订记录表"""
+        inspector = inspect(self.engine)
+        if 'chapter_revisions' in inspector.get_table_names():
+            ChapterRevision.__table__.drop(self.engine)
+            logger.info("章节修订记录表删除成功")
+    
+    def _migration_v6_up(self):
+        """版本6迁移：添加对话历史时间索引（用于按保留天数清理）"""
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_ai_dialog_history_created_at
+                ON ai_dialog_history (created_at);
+            """))
+            conn.commit()
+    
+    def _migration_v6_down(self):
+        """版本6迁移回滚：删除对话历史时间索引"""
+        with self.engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_ai_dialog_history_created_at;"))
+            conn.commit()
+    
+    def _migration_v7_up(self):
+        """版本7迁移：对话历史添加项目和章节作用域"""
+        inspector = inspect(self.engine)
+        columns = {column['name'] for column in inspector.get_columns('ai_dialog_history')}
+        with self.engine.connect() as conn:
+            if 'project_id' not in columns:
+                conn.execute(text(
+                    "ALTER TABLE ai_dialog_history ADD COLUMN project_id INTEGER "
+                    "REFERENCES projects (id) ON DELETE CASCADE;"
+                ))
+            if 'chapter_id' not in columns:
+                conn.execute(text(
+                    "ALTER TABLE ai_dialog_history ADD COLUMN chapter_id INTEGER "
+                    "REFERENCES chapters (id) ON DELETE CASCADE;"
+                ))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_ai_dialog_history_chapter
+                ON ai_dialog_history (chapter_id, id);
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_ai_dialog_history_project
+                ON ai_dialog_history (project_id, id);
+            """))
+            conn.commit()
+        logger.info("对话历史作用域字段添加成功")
+    
+    def _migration_v7_down(self):
+        """版本7迁移回滚：删除对话历史作用域字段"""
+        with self.engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_ai_dialog_history_chapter;"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_ai_dialog_history_project;"))
+            conn.execute(text("ALTER TABLE ai_dialog_history DROP COLUMN chapter_id;"))
+            conn.execute(text("ALTER TABLE ai_dialog_history DROP COLUMN project_id;"))
+            conn.commit()
+        logger.info("对话历史作用域字段删除成功")
+    
+    def _migration_v8_up(self):
+        """版本8迁移：添加AI调用记录表"""
+        inspector = inspect(self.engine)
+        if 'ai_request_log' not in inspector.get_table_names():
+            Base.metadata.create_all(self.engine, tables=[AIRequestLog.__table__])
+            logger.info("AI调用记录表创建成功")
+    
+    def _migration_v8_down(self):
+        """版本8迁移回滚：删除AI调用记录表"""
+        inspector = inspect(self.engine)
+        if 'ai_request_log' in inspector.get_table_names():
+            AIRequestLog.__table__.drop(self.engine)
+            logger.info("AI调用记录表删除成功")
+    
+    def _migration_v9_up(self):
+        """版本9迁移：章节顺序重新编号并添加顺序索引
+        
+        之前新建的章节没有设置顺序（都为0），按 (order, id) 将每个项目的章节
+        重新编号，顺序之间留出 CHAPTER_ORDER_STEP 的间隔，移动章节时只需更新被移动的章节。
+        """
+        with self.engine.connect() as conn:
+            conn.execute(text("""
+                CREATE TEMP TABLE chapter_order_v9 AS
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY project_id ORDER BY COALESCE("order", 0), id
+                ) - 1 AS position
+                FROM chapters;
+            """))
+            conn.execute(text("""
+                UPDATE chapters SET "order" = (
+                    SELECT position * :step FROM chapter_order_v9 WHERE chapter_order_v9.id = chapters.id
+                );
+            """), {"step": CHAPTER_ORDER_STEP})
+            conn.execute(text("DROP TABLE chapter_order_v9;"))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_chapters_project_order
+                ON chapters (project_id, "order", id);
+            """))
+            conn.commit()
+        logger.info("章节顺序重新编号完成")
+    
+    def _migration_v9_down(self):
+        """版本9迁移回滚：删除章节顺序索引（重新编号的顺序保留）"""
+        with self.engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_chapters_project_order;"))
+            conn.commit()
+    
+    def _migration_v10_up(self):
+        """版本10迁移：对话历史中已保存的失败、取消和空回复提示改用 error 角色
+        
+        这些提示之前以 ai 角色保存，会被当作AI的回复发送给AI。
+        """
+        with self.engine.connect() as conn:
+            result = conn.execute(text("""
+                UPDATE ai_dialog_history SET role = 'error'
+                WHERE role = 'ai' AND (content LIKE '错误：%' OR content = '生成的内容为空');
+            """))
+            conn.commit()
+        logger.info(f"对话历史提示消息更新成功: {result.rowcount}条")
+    
+    def _migration_v10_down(self):
+        """版本10迁移回滚：提示消息恢复为 ai 角色"""
+        with self.engine.connect() as conn:
+            conn.execute(text("UPDATE ai_dialog_history SET role = 'ai' WHERE role = 'error';"))
+            conn.commit()
+    
+    def _migration_v11_up(self):
+        """版本11迁移：章节修订记录添加修改后内容的摘要（之前的记录为空，撤销时不做检查）"""
+        inspector = inspect(self.engine)
+        columns = {column['name'] for column in inspector.get_columns('chapter_revisions')}
+        if 'content_hash' not in columns:
+            with self.engine.connect() as conn:
+                conn.execute(text("ALTER TABLE chapter_revisions ADD COLUMN content_hash VARCHAR(40);"))
+                conn.commit()
+            logger.info("章节修订记录摘要字段添加成功")
+    
+    def _migration_v11_down(self):
+        """版本11迁移回滚：删除章节修订记录的摘要字段"""
+        with self.engine.connect() as conn:
+            conn.execute(text("ALTER TABLE chapter_revisions DROP COLUMN content_hash;"))
+            conn.commit()
+        logger.info("章节修订记录摘要字段删除成功")
+    
     def _up_migration(self, version: int):
         """执行向上迁移"""
         migrations = self._get_migrations()
@@ -10,8 +10,8 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
-    Column, Integer, String, Text, DateTime,
-    ForeignKey, create_engine
+    Column, Integer, String, Text, DateTime, Float,
+    ForeignKey, Index, create_engine
 )
 from sqlalchemy.orm import (
     declarative_base, relationship,
@@ -37,9 +37,16 @@ class Project(Base):
     def __repr__(self):
         return f"<Project(id={self.id}, name='{self.name}')>"
 
+# 章节顺序的间隔，移动章节时取前后章节顺序的中间值，只需更新被移动的章节
+CHAPTER_ORDER_STEP = 1024
+
 class Chapter(Base):
     """章节表"""
     __tablename__ = 'chapters'
+    __table_args__ = (
+        # 章节列表按顺序分页：WHERE project_id = ? AND (order, id) > (?, ?) ORDER BY order, id
+        Index('ix_chapters_project_order', 'project_id', 'order', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
@@ -75,11 +82,70 @@ class Settings(Base):
 class AIDialogHistory(Base):
     """AI对话历史表"""
     __tablename__ = 'ai_dialog_history'
+    __table_args__ = (
+        # 按作用域取最近N条记录：WHERE chapter_id = ? ORDER BY id DESC LIMIT N
+        Index('ix_ai_dialog_history_chapter', 'chapter_id', 'id'),
+        Index('ix_ai_dialog_history_project', 'project_id', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
-    role = Column(String(10), nullable=False)  # 'user' 或 'ai'
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'))  # 为空表示全局对话
+    chapter_id = Column(Integer, ForeignKey('chapters.id', ondelete='CASCADE'))  # 为空表示项目级对话
+    role = Column(String(10), nullable=False)  # 'user'、'ai' 或 'error'（失败、取消等提示消息）
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     
     def __repr__(self):
         return f"<AIDialogHistory(id={self.id}, role='{self.role}')>"
+
+class ChapterRevision(Base):
+    """章节修订记录表
+    
+    批量操作（如全局查找替换）修改章节前保存原内容，同一次操作的记录共享 batch_id，
+    用于整体撤销。
+    """
+    __tablename__ = 'chapter_revisions'
+    
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(32), nullable=False, index=True)
+    chapter_id = Column(Integer, ForeignKey('chapters.id', ondelete='CASCADE'), nullable=False)
+    content = Column(Text)  # 修改前的章节内容
+    content_hash = Column(String(40))  # 修改后内容的SHA-1摘要，撤销前用于确认章节未被再次修改
+    description = Column(String(200))
+    created_at = Column(DateTime, default=func.now())
+    
+    def __repr__(self):
+        return f"<ChapterRevision(id={self.id}, batch_id='{self.batch_id}', chapter_id={self.chapter_id})>"
+
+class AIRequestLog(Base):
+    """AI调用记录表
+    
+    每次AI调用一行，只保存用量和耗时等数值，不保存提示词和回复内容。
+    项目或章节删除后记录保留（外键置空），以免丢失历史统计。
+    """
+    __tablename__ = 'ai_request_log'
+    __table_args__ = (
+        # 按项目、按模型统计一段时间内的调用
+        Index('ix_ai_request_log_project', 'project_id', 'created_at'),
+        Index('ix_ai_request_log_model', 'model', 'created_at'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='SET NULL'))
+    chapter_id = Column(Integer, ForeignKey('chapters.id', ondelete='SET NULL'))
+    operation = Column(String(20))  # 'generate'、'continue' 等
+    model = Column(String(100), nullable=False)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    reasoning_tokens = Column(Integer)  # 包含在 completion_tokens 中
+    cached_tokens = Column(Integer)  # 命中服务端前缀缓存的提示词token数
+    ttft_ms = Column(Integer)  # 首字节时间
+    latency_ms = Column(Integer)  # 总耗时（含重试等待）
+    retries = Column(Integer, default=0)
+    outcome = Column(String(20), nullable=False)  # 'ok'、'timeout'、'rate_limited' 等
+    error = Column(String(200))
+    cost = Column(Float)  # 按配置的单价估算的费用，未配置单价时为空
+    
+    def __repr__(self):
+        return f"<AIRequestLog(id={self.id}, model='{self.model}', outcome='{self.outcome}')>"
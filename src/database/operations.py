@@ -7,18 +7,27 @@
 """
 
 import os
+import re
 import json
+import uuid
+import hashlib
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Callable, Iterator, Tuple
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, func, tuple_
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from .models import Base, Project, Chapter, Settings, AIDialogHistory
-from utils.logger import logger
+from .models import (Base, Project, Chapter, Settings, AIDialogHistory, ChapterRevision, AIRequestLog,
+                     CHAPTER_ORDER_STEP)
+from utils.logger import logger, hot_logger
+from utils.perf import timed
+
+def content_digest(content: str) -> str:
+    """章节内容的SHA-1摘要（撤销批量修改前用于确认章节内容未被再次修改）"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
 
 class DatabaseManager:
     """数据库管理类"""
@@ -75,6 +84,7 @@ class DatabaseManager:
             logger.error(f"创建项目失败: {e}")
             return None
     
+    @timed("db.get_project")
     def get_project(self, project_id: int) -> Optional[Project]:
         """获取项目信息"""
         try:
@@ -84,6 +94,7 @@ class DatabaseManager:
             logger.error(f"获取项目失败: {e}")
             return None
     
+    @timed("db.get_all_projects")
     def get_all_projects(self) -> List[Project]:
         """获取所有项目"""
         try:
@@ -93,6 +104,40 @@ class DatabaseManager:
             logger.error(f"获取项目列表失败: {e}")
             return []
     
+    @timed("db.get_project_summaries")
+    def get_project_summaries(self) -> List[Dict[str, Any]]:
+        """用一次聚合查询获取所有项目的摘要，用于项目列表的显示、搜索和排序
+        
+        Returns:
+            摘要列表，每项包含 id、name、description、chapter_count、
+            word_count（正文总字数）和 last_edited（项目或其章节最后修改的时间）
+        """
+        try:
+            with self.Session() as session:
+                rows = session.query(
+                    Project.id, Project.name, Project.description,
+                    Project.created_at, Project.updated_at,
+                    func.count(Chapter.id),
+                    func.coalesce(func.sum(func.length(Chapter.content)), 0),
+                    func.max(Chapter.updated_at)
+                ).outerjoin(Chapter, Chapter.project_id == Project.id).group_by(Project.id).all()
+        except SQLAlchemyError as e:
+            logger.error(f"获取项目摘要失败: {e}")
+            return []
+        summaries = []
+        for (project_id, name, description, created_at, updated_at,
+             chapter_count, word_count, chapter_updated_at) in rows:
+            times = [time for time in (created_at, updated_at, chapter_updated_at) if time]
+            summaries.append({
+                'id': project_id,
+                'name': name,
+                'description': description,
+                'chapter_count': chapter_count,
+                'word_count': word_count,
+                'last_edited': max(times) if times else None
+            })
+        return summaries
+    
     def update_project(self, project_id: int, **kwargs) -> bool:
         """更新项目信息"""
         try:
@@ -125,11 +170,16 @@ class DatabaseManager:
             return False
     
     # 章节相关操作
+    @timed("db.create_chapter")
     def create_chapter(self, project_id: int, title: str, content: Optional[str] = None) -> Optional[Chapter]:
-        """创建新章节"""
+        """创建新章节（排在项目的最后）"""
         try:
             with self.Session() as session:
-                chapter = Chapter(project_id=project_id, title=title, content=content)
+                last_order = session.query(func.max(Chapter.order)).filter(
+                    Chapter.project_id == project_id
+                ).scalar()
+                order = last_order + CHAPTER_ORDER_STEP if last_order is not None else 0
+                chapter = Chapter(project_id=project_id, title=title, content=content, order=order)
                 session.add(chapter)
                 session.commit()
                 logger.info(f"创建章节成功: {chapter}")
@@ -138,6 +188,7 @@ class DatabaseManager:
             logger.error(f"创建章节失败: {e}")
             return None
     
+    @timed("db.get_chapter")
     def get_chapter(self, chapter_id: int) -> Optional[Chapter]:
         """获取章节信息"""
         try:
@@ -147,6 +198,7 @@ class DatabaseManager:
             logger.error(f"获取章节失败: {e}")
             return None
     
+    @timed("db.get_project_chapters")
     def get_project_chapters(self, project_id: int) -> List[Chapter]:
         """获取项目的所有章节，按order字段排序"""
         try:
@@ -158,6 +210,36 @@ class DatabaseManager:
             logger.error(f"获取章节列表失败: {e}")
             return []
     
+    @timed("db.get_chapter_summaries")
+    def get_chapter_summaries(self, project_id: int, after: Optional[Tuple[int, int]] = None,
+                              limit: int = 200) -> List[Tuple[int, str, int]]:
+        """按顺序分页获取项目的章节摘要（不读取正文）
+        
+        按 (order, id) 做键集分页，由 (project_id, order, id) 索引直接定位，
+        翻页开销与已翻过的页数无关。
+        
+        Args:
+            project_id: 项目ID
+            after: 上一页最后一个章节的 (order, id)（None表示从头开始）
+            limit: 每页章节数
+            
+        Returns:
+            (chapter_id, title, order) 列表
+        """
+        try:
+            with self.Session() as session:
+                query = session.query(Chapter.id, Chapter.title, Chapter.order).filter(
+                    Chapter.project_id == project_id
+                )
+                if after is not None:
+                    query = query.filter(tuple_(Chapter.order, Chapter.id) > tuple_(*after))
+                rows = query.order_by(Chapter.order, Chapter.id).limit(limit).all()
+                return [(row.id, row.title, row.order) for row in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"获取章节摘要失败: {e}")
+            return []
+    
+    @timed("db.update_chapter")
     def update_chapter(self, chapter_id: int, **kwargs) -> bool:
         """更新章节信息"""
         try:
@@ -167,7 +249,9 @@ class DatabaseManager:
                     for key, value in kwargs.items():
                         setattr(chapter, key, value)
                     session.commit()
-                    logger.info(f"更新章节成功: {chapter}")
+                    # 编辑时每次自动保存都会调用，限流输出且不访问已过期的实例
+                    hot_logger.info("db.update_chapter", "更新章节成功: chapter_id={}, 字段={}",
+                                    chapter_id, list(kwargs))
                     return True
                 return False
         except SQLAlchemyError as e:
@@ -189,6 +273,7 @@ class DatabaseManager:
             logger.error(f"删除章节失败: {e}")
             return False
     
+    @timed("db.update_chapter_order")
     def update_chapter_order(self, project_id: int, chapter_orders: List[Dict[str, int]]) -> bool:
         """更新章节顺序
         
@@ -212,7 +297,327 @@ class DatabaseManager:
             logger.error(f"更新章节顺序失败: {e}")
             return False
     
+    @timed("db.move_chapter")
+    def move_chapter(self, chapter_id: int, previous_id: Optional[int]) -> Optional[Dict[int, int]]:
+        """将章节移动到另一个章节之后
+        
+        章节顺序之间留有间隔（CHAPTER_ORDER_STEP），移动时取前后两个章节顺序的中间值，
+        通常只需更新被移动的章节；间隔用完时才按当前顺序重新编号整个项目。
+        
+        Args:
+            chapter_id: 被移动的章节ID
+            previous_id: 移动后排在它前面的章节ID（None表示移到最前）
+            
+        Returns:
+            顺序发生变化的章节 {chapter_id: order}，失败时返回None
+        """
+        try:
+            with self.Session() as session:
+                chapter = session.query(Chapter).get(chapter_id)
+                if not chapter:
+                    return None
+                project_id = chapter.project_id
+                lower, upper = self._chapter_neighbours(session, project_id, chapter_id, previous_id)
+                changed = {}
+                if lower is not None and upper is not None and upper[1] - lower[1] < 2:
+                    changed = self._renumber_chapters(session, project_id)
+                    lower = (lower[0], changed[lower[0]])
+                    upper = (upper[0], changed[upper[0]])
+                
+                if lower is None and upper is None:
+                    new_order = 0
+                elif lower is None:
+                    new_order = upper[1] - CHAPTER_ORDER_STEP
+                elif upper is None:
+                    new_order = lower[1] + CHAPTER_ORDER_STEP
+                else:
+                    new_order = (lower[1] + upper[1]) // 2
+                # 直接执行SQL，不更新章节的修改时间
+                session.execute(text('UPDATE chapters SET "order" = :order WHERE id = :id'),
+                                {"order": new_order, "id": chapter_id})
+                session.commit()
+                changed[chapter_id] = new_order
+                logger.info(f"移动章节成功: chapter_id={chapter_id}, order={new_order}, "
+                            f"更新{len(changed)}个章节")
+                return changed
+        except SQLAlchemyError as e:
+            logger.error(f"移动章节失败: {e}")
+            return None
+    
+    def _chapter_neighbours(self, session: Session, project_id: int, chapter_id: int,
+                            previous_id: Optional[int]):
+        """被移动章节新位置前后的两个章节
+        
+        Returns:
+            ((id, order) 或 None, (id, order) 或 None)
+        """
+        query = session.query(Chapter.id, Chapter.order).filter(
+            Chapter.project_id == project_id,
+            Chapter.id != chapter_id
+        )
+        lower = None
+        if previous_id is not None:
+            lower = session.query(Chapter.id, Chapter.order).filter(Chapter.id == previous_id).first()
+            if lower is not None:
+                query = query.filter(tuple_(Chapter.order, Chapter.id) > tuple_(lower.order, lower.id))
+        upper = query.order_by(Chapter.order, Chapter.id).first()
+        return (tuple(lower) if lower else None), (tuple(upper) if upper else None)
+    
+    def _renumber_chapters(self, session: Session, project_id: int) -> Dict[int, int]:
+        """按当前顺序重新编号项目的章节（不提交）
+        
+        Returns:
+            {chapter_id: order}
+        """
+        rows = session.query(Chapter.id).filter(Chapter.project_id == project_id).order_by(
+            Chapter.order, Chapter.id
+        ).all()
+        orders = {row.id: index * CHAPTER_ORDER_STEP for index, row in enumerate(rows)}
+        session.execute(text('UPDATE chapters SET "order" = :order WHERE id = :id'),
+                        [{"order": order, "id": chapter_id} for chapter_id, order in orders.items()])
+        logger.info(f"章节顺序重新编号: project_id={project_id}, {len(orders)}个章节")
+        return orders
+    
+    def iter_chapter_contents(self, project_id: int,
+                              batch_size: int = 50) -> Iterator[Tuple[int, str, str]]:
+        """按批流式读取项目中的章节内容
+        
+        按章节ID做键集分页，每批使用独立会话，避免一次性加载整个项目。
+        
+        Args:
+            project_id: 项目ID
+            batch_size: 每批读取的章节数
+            
+        Yields:
+            (chapter_id, title, content) 元组
+        """
+        last_id = 0
+        while True:
+            try:
+                with self.Session() as session:
+                    rows = session.query(Chapter.id, Chapter.title, Chapter.content).filter(
+                        Chapter.project_id == project_id,
+                        Chapter.id > last_id
+                    ).order_by(Chapter.id).limit(batch_size).all()
+            except SQLAlchemyError as e:
+                logger.error(f"读取章节内容失败: {e}")
+                return
+            if not rows:
+                return
+            for row in rows:
+                yield row.id, row.title, row.content or ""
+            last_id = rows[-1].id
+    
+    def count_project_chapters(self, project_id: int) -> int:
+        """获取项目的章节数量"""
+        try:
+            with self.Session() as session:
+                return session.query(Chapter).filter_by(project_id=project_id).count()
+        except SQLAlchemyError as e:
+            logger.error(f"获取章节数量失败: {e}")
+            return 0
+    
+    @timed("db.rewrite_chapters")
+    def rewrite_chapters(self, project_id: int, transform: Callable[[str], Tuple[str, int]],
+                         description: str,
+                         progress: Optional[Callable[[int, int], None]] = None,
+                         is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[Tuple[str, int]]:
+        """在单个事务中批量改写项目章节内容，并记录修订以便撤销
+        
+        Args:
+            project_id: 项目ID
+            transform: 改写函数，接收原内容，返回 (新内容, 修改处数)
+            description: 修订说明
+            progress: 进度回调，参数为 (已处理章节数, 章节总数)
+            is_cancelled: 返回True时中止并回滚，不修改任何章节
+            
+        Returns:
+            (batch_id, 修改处总数) 元组，失败或取消时返回None
+        """
+        batch_id = uuid.uuid4().hex
+        total_changes = 0
+        try:
+            with self.Session() as session:
+                chapter_ids = [
+                    row.id for row in session.query(Chapter.id).filter_by(
+                        project_id=project_id
+                    ).order_by(Chapter.id)
+                ]
+                for index, chapter_id in enumerate(chapter_ids, 1):
+                    if is_cancelled and is_cancelled():
+                        session.rollback()
+                        logger.info(f"批量改写章节已取消: project_id={project_id}")
+                        return None
+                    content = session.query(Chapter.content).filter_by(id=chapter_id).scalar() or ""
+                    new_content, changes = transform(content)
+                    if changes:
+                        session.add(ChapterRevision(
+                            batch_id=batch_id,
+                            chapter_id=chapter_id,
+                            content=content,
+                            content_hash=content_digest(new_content),
+                            description=description
+                        ))
+                        session.query(Chapter).filter_by(id=chapter_id).update(
+                            {Chapter.content: new_content}, synchronize_session=False
+                        )
+                        total_changes += changes
+                    if progress:
+                        progress(index, len(chapter_ids))
+                session.commit()
+                logger.info(f"批量改写章节成功: project_id={project_id}, batch_id={batch_id}, "
+                            f"修改{total_changes}处")
+                return batch_id, total_changes
+        except SQLAlchemyError as e:
+            logger.error(f"批量改写章节失败: {e}")
+            return None
+    
+    def undo_revision_batch(self, batch_id: str,
+                            progress: Optional[Callable[[int, int], None]] = None,
+                            is_cancelled: Optional[Callable[[], bool]] = None
+                            ) -> Optional[Tuple[int, List[str]]]:
+        """撤销一次批量修改，将章节恢复为修订记录中保存的内容
+        
+        批量修改之后又被编辑过的章节（内容与修订记录中的摘要不一致）不恢复，以免覆盖之后的修改。
+        
+        Args:
+            batch_id: 修订批次ID
+            progress: 进度回调，参数为 (已处理章节数, 章节总数)
+            is_cancelled: 返回True时中止并回滚，不恢复任何章节
+            
+        Returns:
+            (恢复的章节数, 因已被再次修改而跳过的章节标题列表) 元组，失败或取消时返回None
+        """
+        try:
+            with self.Session() as session:
+                revisions = session.query(ChapterRevision).filter_by(batch_id=batch_id).all()
+                if not revisions:
+                    return None
+                restored = 0
+                skipped = []
+                for index, revision in enumerate(revisions, 1):
+                    if is_cancelled and is_cancelled():
+                        session.rollback()
+                        logger.info(f"撤销批量修改已取消: batch_id={batch_id}")
+                        return None
+                    current = session.query(Chapter.title, Chapter.content).filter_by(
+                        id=revision.chapter_id
+                    ).first()
+                    if current is not None:
+                        if (revision.content_hash is not None
+                                and content_digest(current.content or "") != revision.content_hash):
+                            skipped.append(current.title)
+                        else:
+                            session.query(Chapter).filter_by(id=revision.chapter_id).update(
+                                {Chapter.content: revision.content}, synchronize_session=False
+                            )
+                            restored += 1
+                    session.delete(revision)
+                    if progress:
+                        progress(index, len(revisions))
+                session.commit()
+                logger.info(f"撤销批量修改成功: batch_id={batch_id}, 恢复{restored}个章节，"
+                            f"跳过{len(skipped)}个已再次修改的章节")
+                return restored, skipped
+        except SQLAlchemyError as e:
+            logger.error(f"撤销批量修改失败: {e}")
+            return None
+    
+    # 搜索相关操作
+    @timed("db.search")
+    def search(self, query: str, project_id: Optional[int] = None,
+               limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """全文检索章节标题和内容
+        
+        基于 chapters_fts 全文索引（见迁移版本4），按相关度排序返回匹配片段。
+        trigram 分词器无法索引少于3个字的词，此类查询退回到 LIKE 匹配。
+        
+        Args:
+            query: 搜索关键词，多个关键词以空格分隔（需同时匹配）
+            project_id: 限定搜索的项目ID（None表示搜索所有项目）
+            limit: 返回结果数量上限
+            offset: 结果偏移量（用于分页）
+            
+        Returns:
+            搜索结果列表，每项包含 chapter_id、project_id、title、snippet 字段
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        
+        params: Dict[str, Any] = {'project_id': project_id, 'limit': limit, 'offset': offset}
+        fts = all(len(term) >= 3 for term in terms)
+        if fts:
+            # 每个关键词作为短语引用，避免用户输入被解析为FTS5语法
+            params['match'] = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            sql = """
+                SELECT c.id, c.project_id, c.title,
+                       snippet(chapters_fts, 1, '【', '】', '…', 16) AS snippet
+                FROM chapters_fts
+                JOIN chapters c ON c.id = chapters_fts.rowid
+                WHERE chapters_fts MATCH :match
+                  AND (:project_id IS NULL OR c.project_id = :project_id)
+                ORDER BY bm25(chapters_fts, 10.0, 1.0)
+                LIMIT :limit OFFSET :offset
+            """
+        else:
+            conditions = []
+            for i, term in enumerate(terms):
+                params[f'term{i}'] = term
+                conditions.append(
+                    f"(instr(c.title, :term{i}) > 0 OR instr(c.content, :term{i}) > 0)"
+                )
+            # 只取第一个关键词附近的一段正文，片段和高亮在下面生成
+            params['context'] = self.SNIPPET_CONTEXT
+            sql = f"""
+                SELECT c.id, c.project_id, c.title,
+                       instr(c.content, :term0) AS position,
+                       substr(c.content, max(instr(c.content, :term0) - :context, 1),
+                              2 * :context + length(:term0)) AS window,
+                       length(c.content) AS content_length
+                FROM chapters c
+                WHERE {' AND '.join(conditions)}
+                  AND (:project_id IS NULL OR c.project_id = :project_id)
+                ORDER BY c.project_id, c."order"
+                LIMIT :limit OFFSET :offset
+            """
+        
+        try:
+            with self.Session() as session:
+                rows = session.execute(text(sql), params).all()
+                return [
+                    {
+                        'chapter_id': row.id,
+                        'project_id': row.project_id,
+                        'title': row.title,
+                        'snippet': (row.snippet or '') if fts else self._fallback_snippet(row, terms)
+                    }
+                    for row in rows
+                ]
+        except SQLAlchemyError as e:
+            logger.error(f"搜索章节失败: {e}")
+            return []
+    
+    # 退回 LIKE 匹配时片段中关键词前后保留的字数（与FTS片段的长度相近）
+    SNIPPET_CONTEXT = 16
+    
+    @classmethod
+    def _fallback_snippet(cls, row, terms: List[str]) -> str:
+        """生成退回 LIKE 匹配时的片段，关键词用【】标出（与FTS的 snippet() 一致）
+        
+        第一个关键词出现在正文中时取其附近的一段正文，只出现在标题中时使用标题。
+        """
+        pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+        if not row.position:
+            return pattern.sub(lambda match: f"【{match.group()}】", row.title or '')
+        start = max(row.position - cls.SNIPPET_CONTEXT, 1)
+        window = pattern.sub(lambda match: f"【{match.group()}】", row.window or '')
+        prefix = '…' if start > 1 else ''
+        suffix = '…' if start + len(row.window or '') - 1 < row.content_length else ''
+        return prefix + window + suffix
+    
     # 设置相关操作
+    @timed("db.get_settings")
     def get_settings(self) -> Optional[Settings]:
         """获取应用设置"""
         try:
@@ -222,6 +627,7 @@ class DatabaseManager:
             logger.error(f"获取设置失败: {e}")
             return None
     
+    @timed("db.update_settings")
     def update_settings(self, **kwargs) -> bool:
         """更新应用设置"""
         try:
@@ -238,6 +644,7 @@ class DatabaseManager:
             logger.error(f"更新设置失败: {e}")
             return False
     
+    @timed("db.backup_database")
     def backup_database(self) -> Optional[str]:
         """备份数据库
         
@@ -392,19 +799,26 @@ class DatabaseManager:
             logger.error(f"更新提示词模板失败: {e}")
             return False
 
-    def add_dialog_history(self, role: str, content: str) -> Optional[AIDialogHistory]:
+    @timed("db.add_dialog_history")
+    def add_dialog_history(self, role: str, content: str, project_id: Optional[int] = None,
+                           chapter_id: Optional[int] = None) -> Optional[AIDialogHistory]:
         """添加对话历史记录
         
         Args:
             role: 角色（'user' 或 'ai'）
             content: 对话内容
+            project_id: 所属项目ID（指定chapter_id时可省略，自动取章节所属项目）
+            chapter_id: 所属章节ID
             
         Returns:
             Optional[AIDialogHistory]: 创建的记录或None
         """
         try:
             with self.Session() as session:
-                history = AIDialogHistory(role=role, content=content)
+                if chapter_id is not None and project_id is None:
+                    project_id = session.query(Chapter.project_id).filter_by(id=chapter_id).scalar()
+                history = AIDialogHistory(role=role, content=content,
+                                          project_id=project_id, chapter_id=chapter_id)
                 session.add(history)
                 session.commit()
                 logger.info(f"添加对话历史记录成功: {history}")
@@ -426,18 +840,248 @@ class DatabaseManager:
             logger.error(f"获取对话历史记录失败: {e}")
             return []
     
-    def clear_dialog_history(self) -> bool:
-        """清空对话历史记录
+    def _scope_dialog_query(self, query, project_id: Optional[int], chapter_id: Optional[int]):
+        """将对话历史查询限定到指定作用域
+        
+        作用域为章节（chapter_id）、项目级（仅project_id）或全局（均为None），
+        各作用域都能命中 (chapter_id, id) 或 (project_id, id) 复合索引。
+        """
+        if chapter_id is not None:
+            return query.filter(AIDialogHistory.chapter_id == chapter_id)
+        query = query.filter(AIDialogHistory.chapter_id.is_(None))
+        if project_id is not None:
+            return query.filter(AIDialogHistory.project_id == project_id)
+        return query.filter(AIDialogHistory.project_id.is_(None))
+    
+    @timed("db.get_dialog_history_page")
+    def get_dialog_history_page(self, before_id: Optional[int] = None, limit: int = 50,
+                                project_id: Optional[int] = None,
+                                chapter_id: Optional[int] = None) -> List[AIDialogHistory]:
+        """按键集分页获取对话历史记录
+        
+        从最新的记录开始向前翻页，每页通过复合索引定位，耗时与历史总量无关。
+        before_id 为None时即为该作用域最近的 limit 条对话。
+        
+        Args:
+            before_id: 只返回ID小于该值的记录（None表示从最新记录开始）
+            limit: 每页记录数
+            project_id: 项目ID（chapter_id为None时表示项目级对话）
+            chapter_id: 章节ID
+            
+        Returns:
+            List[AIDialogHistory]: 按时间正序排列的一页对话历史记录
+        """
+        try:
+            with self.Session() as session:
+                query = self._scope_dialog_query(
+                    session.query(AIDialogHistory), project_id, chapter_id
+                )
+                if before_id is not None:
+                    query = query.filter(AIDialogHistory.id < before_id)
+                records = query.order_by(AIDialogHistory.id.desc()).limit(limit).all()
+                records.reverse()
+                return records
+        except SQLAlchemyError as e:
+            logger.error(f"获取对话历史记录失败: {e}")
+            return []
+    
+    # 清理和归档对话历史时每批处理的记录数（IN 列表的长度）
+    DIALOG_RETENTION_BATCH = 500
+    
+    def apply_dialog_retention(self, max_messages: int = 0, max_age_days: int = 0,
+                               archive: bool = True) -> int:
+        """按保留策略清理旧的对话历史记录
+        
+        Args:
+            max_messages: 每个作用域（全局、项目或章节的对话）最多保留的记录数（0表示不限制），
+                按作用域分别计算，某个章节的对话再多也不会挤掉其他章节的记录
+            max_age_days: 记录保留天数（0表示不限制）
+            archive: 删除前是否将记录归档为JSON Lines文件
+            
+        Returns:
+            int: 清理的记录数
+        """
+        conditions = []
+        params: Dict[str, Any] = {}
+        if max_messages > 0:
+            conditions.append("position > :max_messages")
+            params['max_messages'] = max_messages
+        if max_age_days > 0:
+            conditions.append("created_at < :cutoff_time")
+            params['cutoff_time'] = datetime.utcnow() - timedelta(days=max_age_days)
+        if not conditions:
+            return 0
+        try:
+            with self.Session() as session:
+                expired_ids = session.execute(text(f"""
+                    SELECT id FROM (
+                        SELECT id, created_at, ROW_NUMBER() OVER (
+                            PARTITION BY project_id, chapter_id ORDER BY id DESC
+                        ) AS position
+                        FROM ai_dialog_history
+                    )
+                    WHERE {" OR ".join(conditions)}
+                    ORDER BY id
+                """), params).scalars().all()
+                if not expired_ids:
+                    return 0
+                
+                if archive:
+                    self._archive_dialog_history(session, expired_ids)
+                
+                removed = 0
+                for i in range(0, len(expired_ids), self.DIALOG_RETENTION_BATCH):
+                    removed += session.query(AIDialogHistory).filter(
+                        AIDialogHistory.id.in_(expired_ids[i:i + self.DIALOG_RETENTION_BATCH])
+                    ).delete(synchronize_session=False)
+                session.commit()
+                logger.info(f"清理旧对话历史记录成功: {removed}条")
+                return removed
+        except (SQLAlchemyError, OSError) as e:
+            logger.error(f"清理旧对话历史记录失败: {e}")
+            return 0
+    
+    def _archive_dialog_history(self, session: Session, record_ids: List[int]):
+        """将指定的对话记录分批写入归档文件（包含作用域，以便归属和恢复到原章节）"""
+        archive_dir = Path(self.db_path).parent / "archives"
+        archive_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archive_path = archive_dir / f"ai_dialog_history_{timestamp}.jsonl"
         
+        with open(archive_path, 'a', encoding='utf-8') as f:
+            for i in range(0, len(record_ids), self.DIALOG_RETENTION_BATCH):
+                records = session.query(AIDialogHistory).filter(
+                    AIDialogHistory.id.in_(record_ids[i:i + self.DIALOG_RETENTION_BATCH])
+                ).order_by(AIDialogHistory.id).all()
+                for record in records:
+                    f.write(json.dumps({
+                        'id': record.id,
+                        'project_id': record.project_id,
+                        'chapter_id': record.chapter_id,
+                        'role': record.role,
+                        'content': record.content,
+                        'created_at': record.created_at.isoformat() if record.created_at else None
+                    }, ensure_ascii=False) + "\n")
+                session.expunge_all()
+        logger.info(f"对话历史归档成功: {archive_path}")
+    
+    def clear_dialog_history(self, project_id: Optional[int] = None,
+                             chapter_id: Optional[int] = None) -> bool:
+        """清空指定作用域的对话历史记录
+        
+        Args:
+            project_id: 项目ID（chapter_id为None时表示项目级对话）
+            chapter_id: 章节ID
+            
         Returns:
             bool: 是否清空成功
         """
         try:
             with self.Session() as session:
-                session.query(AIDialogHistory).delete()
+                self._scope_dialog_query(
+                    session.query(AIDialogHistory), project_id, chapter_id
+                ).delete(synchronize_session=False)
                 session.commit()
                 logger.info("清空对话历史记录成功")
                 return True
         except SQLAlchemyError as e:
             logger.error(f"清空对话历史记录失败: {e}")
             return False
+    
+    # AI调用记录相关操作
+    # 统计分组方式：分组键的SQL表达式
+    AI_REQUEST_GROUPS = {
+        'day': "date(r.created_at, 'localtime')",
+        'project': "COALESCE(p.name, '(无项目)')",
+        'model': "r.model"
+    }
+    
+    @timed("db.add_ai_request_log")
+    def add_ai_request_log(self, record: Dict[str, Any], project_id: Optional[int] = None,
+                           chapter_id: Optional[int] = None, operation: Optional[str] = None) -> bool:
+        """添加一条AI调用记录
+        
+        Args:
+            record: AI服务生成的调用记录（见 DeepSeekAIService._build_telemetry）
+            project_id: 所属项目ID（指定chapter_id时可省略，自动取章节所属项目）
+            chapter_id: 所属章节ID
+            operation: 调用类型（如 'generate'、'continue'）
+            
+        Returns:
+            bool: 是否添加成功
+        """
+        columns = AIRequestLog.__table__.columns.keys()
+        try:
+            with self.Session() as session:
+                if chapter_id is not None and project_id is None:
+                    project_id = session.query(Chapter.project_id).filter_by(id=chapter_id).scalar()
+                session.add(AIRequestLog(
+                    project_id=project_id, chapter_id=chapter_id, operation=operation,
+                    **{key: value for key, value in record.items() if key in columns}
+                ))
+                session.commit()
+                return True
+        except SQLAlchemyError as e:
+            logger.error(f"添加AI调用记录失败: {e}")
+            return False
+    
+    @timed("db.get_ai_request_stats")
+    def get_ai_request_stats(self, group_by: str = 'day', days: int = 30) -> List[Dict[str, Any]]:
+        """按天、项目或模型汇总AI调用记录
+        
+        Args:
+            group_by: 分组方式（'day'、'project' 或 'model'）
+            days: 统计最近多少天的记录（0表示全部）
+            
+        Returns:
+            统计列表，每项包含 key、requests、errors（不含主动取消的调用）、cancelled、
+            各类token合计、平均首字节时间、成功调用的平均和最大耗时、重试次数和费用合计
+        """
+        if group_by not in self.AI_REQUEST_GROUPS:
+            raise ValueError(f"不支持的分组方式: {group_by}")
+        key = self.AI_REQUEST_GROUPS[group_by]
+        # created_at 为UTC时间
+        cutoff = datetime.utcnow() - timedelta(days=days) if days > 0 else None
+        sql = f"""
+            SELECT {key} AS key,
+                   COUNT(*) AS requests,
+                   SUM(r.outcome NOT IN ('ok', 'cancelled')) AS errors,
+                   SUM(r.outcome = 'cancelled') AS cancelled,
+                   COALESCE(SUM(r.prompt_tokens), 0) AS prompt_tokens,
+                   COALESCE(SUM(r.completion_tokens), 0) AS completion_tokens,
+                   COALESCE(SUM(r.reasoning_tokens), 0) AS reasoning_tokens,
+                   COALESCE(SUM(r.cached_tokens), 0) AS cached_tokens,
+                   AVG(CASE WHEN r.outcome = 'ok' THEN r.ttft_ms END) AS avg_ttft_ms,
+                   AVG(CASE WHEN r.outcome = 'ok' THEN r.latency_ms END) AS avg_latency_ms,
+                   MAX(CASE WHEN r.outcome = 'ok' THEN r.latency_ms END) AS max_latency_ms,
+                   COALESCE(SUM(r.retries), 0) AS retries,
+                   SUM(r.cost) AS cost
+            FROM ai_request_log r
+            LEFT JOIN projects p ON p.id = r.project_id
+            WHERE (:cutoff IS NULL OR r.created_at >= :cutoff)
+            GROUP BY 1
+            ORDER BY 1
+        """
+        try:
+            with self.Session() as session:
+                rows = session.execute(text(sql), {'cutoff': cutoff}).mappings().all()
+                return [dict(row) for row in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"统计AI调用记录失败: {e}")
+            return []
+    
+    def get_recent_ai_requests(self, limit: int = 200) -> List[AIRequestLog]:
+        """获取最近的AI调用记录
+        
+        Args:
+            limit: 返回的记录数
+            
+        Returns:
+            List[AIRequestLog]: 按时间倒序排列的调用记录
+        """
+        try:
+            with self.Session() as session:
+                return session.query(AIRequestLog).order_by(AIRequestLog.id.desc()).limit(limit).all()
+        except SQLAlchemyError as e:
+            logger.error(f"获取AI调用记录失败: {e}")
+            return []
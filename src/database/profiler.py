@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQL查询分析模块
+统计每个界面操作或管理器调用执行的SQL语句数量和耗时，并检测N+1查询
+"""
+
+import re
+import threading
+from collections import Counter
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.logger import logger
+from utils.perf import perf
+
+# 不在任何 @timed / measure 操作内执行的语句归入此类
+UNTAGGED_ACTION = "(未标记)"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """将SQL语句归一化，使仅参数不同的语句得到相同的结果
+    
+    Args:
+        statement: SQL语句
+    
+    Returns:
+        str: 字面量替换为?、IN列表折叠、空白合并后的语句
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+class ActionQueryStats:
+    """单个操作的SQL统计"""
+    
+    def __init__(self):
+        self.invocations = 0
+        self.statements = 0
+        self.total = 0.0
+        self.max_statements = 0
+        self.n_plus_one = 0
+
+class QueryProfiler:
+    """SQL查询分析器
+    
+    通过 SQLAlchemy 的引擎事件统计所有 Engine 执行的语句，
+    并按当前线程最外层的 @timed / measure 操作归类。
+    一次操作结束时，若其中某条归一化后相同的语句执行次数超过阈值，
+    记录一条疑似N+1查询的警告。
+    
+    既可以通过 start()/stop() 长期开启，也可以作为上下文管理器使用::
+        
+        with QueryProfiler() as profiler:
+            manager.get_all_projects()
+        assert profiler.statement_count <= 2
+    """
+    
+    def __init__(self, threshold: int = 10):
+        """初始化分析器
+        
+        Args:
+            threshold: 单次操作中相似语句的数量超过该值时视为N+1查询
+        """
+        self.threshold = threshold
+        self.running = False
+        self.statement_count = 0
+        self.warnings: List[Dict[str, Any]] = []
+        self._actions: Dict[str, ActionQueryStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def __enter__(self) -> 'QueryProfiler':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+    
+    def start(self):
+        """开始统计"""
+        if self.running:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        perf.add_operation_tracker(self._on_action_finished)
+        self.running = True
+    
+    def stop(self):
+        """停止统计"""
+        if not self.running:
+            return
+        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+        perf.remove_operation_tracker(self._on_action_finished)
+        self.running = False
+        # 结算当前线程中尚未结束的操作
+        action = getattr(self._local, 'action', None)
+        if action is not None:
+            self._on_action_finished(action)
+    
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.statement_count = 0
+            self.warnings = []
+            self._actions.clear()
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """语句执行前记录开始时间"""
+        conn.info.setdefault('query_profiler_start', []).append(perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """语句执行后归类统计"""
+        starts = conn.info.get('query_profiler_start')
+        elapsed = perf_counter() - starts.pop() if starts else 0.0
+        action = perf.current_operation()
+        
+        with self._lock:
+            self.statement_count += 1
+            stats = self._stats(action or UNTAGGED_ACTION)
+            stats.statements += 1
+            stats.total += elapsed
+            if action is None:
+                stats.invocations += 1
+                stats.max_statements = max(stats.max_statements, 1)
+        
+        if action is not None:
+            # 按线程累计当前操作中各语句的执行次数，操作结束时结算
+            if getattr(self._local, 'action', None) != action:
+                self._local.action = action
+                self._local.statements = Counter()
+            self._local.statements[normalize_statement(statement)] += 1
+    
+    def _on_action_finished(self, action: str):
+        """最外层操作结束时结算本次操作的语句统计"""
+        if getattr(self._local, 'action', None) != action:
+            return
+        statements = self._local.statements
+        self._local.action = None
+        self._local.statements = None
+        
+        total = sum(statements.values())
+        statement, repeated = statements.most_common(1)[0]
+        with self._lock:
+            stats = self._stats(action)
+            stats.invocations += 1
+            stats.max_statements = max(stats.max_statements, total)
+            if repeated > self.threshold:
+                stats.n_plus_one += 1
+                self.warnings.append({
+                    'action': action,
+                    'count': repeated,
+                    'statement': statement
+                })
+        if repeated > self.threshold:
+            logger.warning(f"疑似N+1查询: 操作 {action} 执行了 {repeated} 条相似语句: {statement[:200]}")
+    
+    def _stats(self, action: str) -> ActionQueryStats:
+        """获取操作的统计对象（需持有锁）"""
+        stats = self._actions.get(action)
+        if stats is None:
+            stats = self._actions[action] = ActionQueryStats()
+        return stats
+    
+    def action_stats(self, action: str) -> Optional[Dict[str, Any]]:
+        """获取单个操作的统计
+        
+        Args:
+            action: 操作名称
+        
+        Returns:
+            Optional[Dict[str, Any]]: 统计摘要，没有记录时返回None
+        """
+        for row in self.snapshot():
+            if row['action'] == action:
+                return row
+        return None
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """获取所有操作的统计摘要，按语句数降序排列
+        
+        Returns:
+            统计列表，时间单位为毫秒
+        """
+        with self._lock:
+            rows = [
+                {
+                    'action': action,
+                    'invocations': stats.invocations,
+                    'statements': stats.statements,
+                    'avg_statements': stats.statements / stats.invocations if stats.invocations else 0.0,
+                    'max_statements': stats.max_statements,
+                    'total_ms': stats.total * 1000,
+                    'n_plus_one': stats.n_plus_one
+                }
+                for action, stats in self._actions.items()
+            ]
+        rows.sort(key=lambda row: row['statements'], reverse=True)
+        return rows
+
+# 全局SQL查询分析器（由配置或"诊断"菜单开启）
+query_profiler = QueryProfiler()
@@ -1,20 +1,31 @@
 """
 GUI 模块
 包含所有图形界面相关的组件
+
+组件在首次访问时才导入：导入子模块（如 gui.stall_watchdog）时不会连带加载
+主窗口、各对话框以及它们依赖的数据库和AI服务模块
 """
 
-from .main_window import MainWindow
-from .project_list import ProjectList
-from .chapter_list import ChapterList
-from .editor import Editor
-from .settings_dialog import SettingsDialog
-from .ai_dialog import AIDialog
+from importlib import import_module
+
+# 组件名称 -> 所在的子模块
+_COMPONENTS = {
+    'MainWindow': 'main_window',
+    'ProjectList': 'project_list',
+    'ChapterList': 'chapter_list',
+    'Editor': 'editor',
+    'SettingsDialog': 'settings_dialog',
+    'AIDialog': 'ai_dialog',
+    'FindReplaceDialog': 'find_replace_dialog',
+    'DiagnosticsDialog': 'diagnostics_dialog'
+}
+
+__all__ = list(_COMPONENTS)
 
-__all__ = [
-    'MainWindow',
-    'ProjectList',
-    'ChapterList',
-    'Editor',
-    'SettingsDialog',
-    'AIDialog'
-] 
\ No newline at end of file
+def __getattr__(name):
+    module = _COMPONENTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -6,11 +6,16 @@ AI对话框组件
 提供与AI模型的对话界面
 """
 
+from typing import Optional
+
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTextEdit,
                            QPushButton, QLabel, QSpinBox, QProgressBar,
-                           QMessageBox)
+                           QMessageBox, QToolButton, QPlainTextEdit)
+from PyQt6.QtGui import QTextCursor
 from PyQt6.QtCore import Qt, pyqtSignal
 from database.operations import DatabaseManager
+from utils.config import get_config_section
+from .chat_view import ChatHistoryModel, ChatListView
 
 class AIDialog(QDialog):
     """AI对话框"""
@@ -18,21 +23,34 @@ class AIDialog(QDialog):
     # 定义信号
     content_generated = pyqtSignal(str)  # 内容生成信号，当用户确认采用生成的内容时发出
     
-    def __init__(self, parent=None, context: str = ""):
+    # 对话历史中显示的角色与保存的角色；"error" 为失败、取消等提示消息，不作为上下文发送给AI
+    HISTORY_ROLES = {"用户": "user", "AI": "ai", "提示": "error"}
+    
+    def __init__(self, parent=None, context: str = "", chapter_id: Optional[int] = None):
         """初始化对话框
         
         Args:
             parent: 父窗口
             context: 当前文章内容（用于续写模式）
+            chapter_id: 当前章节ID，对话历史按章节隔离（None表示全局对话）
         """
         super().__init__(parent)
         self.context = context
+        self.chapter_id = chapter_id
         self.setWindowTitle("AI助手")
         self.setMinimumSize(800, 600)
         
         # 创建数据库管理器实例
         self.db = DatabaseManager()
         
+        # 对话历史模型，按页从数据库加载
+        dialog_config = get_config_section('ai_dialog')
+        self.page_size = dialog_config.get('page_size', 50)
+        self.context_turns = dialog_config.get('context_turns', 6)
+        self.show_reasoning = dialog_config.get('show_reasoning', False)
+        self._streaming = False  # 是否正在流式输出AI消息（总是最后一条消息）
+        self.history_model = ChatHistoryModel(self._fetch_history_page, self.page_size, self)
+        
         self._init_ui()
         
         # 加载历史对话记录
@@ -46,9 +64,27 @@ class AIDialog(QDialog):
         history_label = QLabel("对话历史")
         layout.addWidget(history_label)
         
-        self.history_edit = QTextEdit()
-        self.history_edit.setReadOnly(True)
-        layout.addWidget(self.history_edit)
+        self.history_view = ChatListView()
+        self.history_view.setModel(self.history_model)
+        layout.addWidget(self.history_view)
+        
+        # 推理过程（R1 的 reasoning_content），收到推理内容后才显示，默认折叠
+        self.reasoning_toggle = QToolButton()
+        self.reasoning_toggle.setText("推理过程")
+        self.reasoning_toggle.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.reasoning_toggle.setCheckable(True)
+        self.reasoning_toggle.setChecked(self.show_reasoning)
+        self.reasoning_toggle.setAutoRaise(True)
+        self.reasoning_toggle.toggled.connect(self._on_reasoning_toggled)
+        self.reasoning_toggle.hide()
+        layout.addWidget(self.reasoning_toggle)
+        
+        self.reasoning_view = QPlainTextEdit()
+        self.reasoning_view.setReadOnly(True)
+        self.reasoning_view.setMaximumHeight(150)
+        self.reasoning_view.hide()
+        layout.addWidget(self.reasoning_view)
+        self._on_reasoning_toggled(self.show_reasoning)
         
         # 输入区域
         input_label = QLabel("输入提示词")
@@ -107,15 +143,49 @@ class AIDialog(QDialog):
         # 存储最后生成的内容
         self.last_generated_content = ""
     
+    def _on_reasoning_toggled(self, checked: bool):
+        """展开或折叠推理过程"""
+        self.reasoning_toggle.setArrowType(Qt.ArrowType.DownArrow if checked else Qt.ArrowType.RightArrow)
+        self.reasoning_view.setVisible(checked and self.reasoning_toggle.isVisible())
+    
     def _load_history(self):
-        """加载历史对话记录"""
-        history_records = self.db.get_dialog_history()
-        for record in history_records:
-            self._add_to_history(
-                "用户" if record.role == "user" else "AI",
-                record.content,
-                save_to_db=False  # 不需要再次保存到数据库
+        """加载最近一页历史对话记录"""
+        self.history_model.fetch_older()
+    
+    def showEvent(self, event):
+        """显示时滚动到最新的对话"""
+        super().showEvent(event)
+        self.history_view.scrollToBottom()
+    
+    def _fetch_history_page(self, before_id) -> list:
+        """从数据库获取一页早于 before_id 的历史对话记录"""
+        return [
+            (record.id, record.role, record.content)
+            for record in self.db.get_dialog_history_page(
+                before_id, self.page_size, chapter_id=self.chapter_id
             )
+        ]
+    
+    def _recent_turns(self) -> list:
+        """获取当前章节最近的若干轮对话，作为多轮对话上下文发送给AI
+        
+        只发送完整的"用户-AI"轮次：失败、取消等提示消息不发送，没有得到回复的用户消息
+        一并跳过，窗口从用户消息开始。
+        """
+        if not self.context_turns:
+            return []
+        turns = []
+        for record in self.db.get_dialog_history_page(limit=self.context_turns,
+                                                      chapter_id=self.chapter_id):
+            if turns and turns[-1]["role"] == "user" and record.role != "ai":
+                turns.pop()
+            if record.role == "user":
+                turns.append({"role": "user", "content": record.content})
+            elif record.role == "ai" and turns and turns[-1]["role"] == "user":
+                turns.append({"role": "assistant", "content": record.content})
+        if turns and turns[-1]["role"] == "user":
+            turns.pop()
+        return turns
     
     def _on_generate(self):
         """处理生成按钮点击事件"""
@@ -129,6 +199,9 @@ class AIDialog(QDialog):
         self.generate_btn.setEnabled(False)
         self.continue_btn.setEnabled(False)
         
+        # 在添加本次输入前取出历史对话窗口
+        history = self._recent_turns()
+        
         # 添加用户输入到历史
         self._add_to_history("用户", prompt)
         
@@ -136,6 +209,7 @@ class AIDialog(QDialog):
         self.parent().ai_request.emit({
             "type": "generate",
             "prompt": prompt,
+            "history": history,
             "word_count": self.word_count.value(),
             "dialog": self  # 传递对话框实例以便回调
         })
@@ -152,6 +226,9 @@ class AIDialog(QDialog):
         self.generate_btn.setEnabled(False)
         self.continue_btn.setEnabled(False)
         
+        # 在添加本次输入前取出历史对话窗口
+        history = self._recent_turns()
+        
         # 添加用户输入到历史
         self._add_to_history("用户", prompt)
         
@@ -160,6 +237,7 @@ class AIDialog(QDialog):
             "type": "continue",
             "prompt": prompt,
             "context": self.context,
+            "history": history,
             "word_count": self.word_count.value(),
             "dialog": self  # 传递对话框实例以便回调
         })
@@ -169,15 +247,16 @@ class AIDialog(QDialog):
         reply = QMessageBox.question(
             self,
             "确认清空",
-            "确定要清空所有对话历史吗？此操作不可恢复。",
+            "确定要清空当前章节的对话历史吗？此操作不可恢复。",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         
         if reply == QMessageBox.StandardButton.Yes:
             # 清空数据库中的历史记录
-            if self.db.clear_dialog_history():
-                self.history_edit.clear()
+            if self.db.clear_dialog_history(chapter_id=self.chapter_id):
+                self.history_model.clear()
+                self._streaming = False
                 self.input_edit.clear()
                 self.last_generated_content = ""
                 self.adopt_btn.setEnabled(False)
@@ -194,36 +273,75 @@ class AIDialog(QDialog):
         """添加内容到对话历史
         
         Args:
-            role: 角色（"用户"或"AI"）
+            role: 角色（"用户"、"AI"或"提示"，提示为失败、取消等占位消息）
             content: 内容
             save_to_db: 是否保存到数据库
         """
-        cursor = self.history_edit.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        
-        # 添加分隔线
-        if self.history_edit.toPlainText():
-            cursor.insertText("\n\n" + "-" * 50 + "\n\n")
-        
-        # 添加新内容
-        cursor.insertText(f"{role}：\n{content}")
-        
-        # 滚动到底部
-        cursor.movePosition(cursor.MoveOperation.End)
-        self.history_edit.setTextCursor(cursor)
+        stored_role = self.HISTORY_ROLES.get(role, "ai")
+        self.history_model.append_message(stored_role, content)
+        self.history_view.scrollToBottom()
         
         # 保存到数据库
         if save_to_db:
             self.db.add_dialog_history(
-                "user" if role == "用户" else "ai",
-                content
+                stored_role,
+                content,
+                chapter_id=self.chapter_id
             )
     
+    def begin_stream(self):
+        """开始流式显示AI回复：添加一条空的AI消息，之后的增量追加到这条消息"""
+        self._streaming = True
+        self.history_model.append_message("ai", "")
+        self.history_view.scrollToBottom()
+        self.reasoning_view.clear()
+        self.reasoning_view.hide()
+        self.reasoning_toggle.hide()
+    
+    def append_stream(self, reasoning: str, content: str):
+        """追加一帧流式输出（由渲染缓冲每帧调用一次）
+        
+        Args:
+            reasoning: 本帧的推理内容
+            content: 本帧的正文
+        """
+        if reasoning:
+            if not self.reasoning_toggle.isVisible():
+                self.reasoning_toggle.show()
+                self._on_reasoning_toggled(self.reasoning_toggle.isChecked())
+            cursor = QTextCursor(self.reasoning_view.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(reasoning)
+        if content and self._streaming:
+            scroll_bar = self.history_view.verticalScrollBar()
+            at_bottom = scroll_bar.value() == scroll_bar.maximum()
+            self.history_model.append_to_message(self.history_model.rowCount() - 1, content)
+            if at_bottom:
+                self.history_view.scrollToBottom()
+    
+    def _show_ai_message(self, content: str, role: str = "AI"):
+        """显示并保存一条AI消息（流式输出时替换正在输出的消息）
+        
+        Args:
+            content: 内容
+            role: "AI"，或"提示"（失败、取消和空回复的占位消息，不作为AI的回复发送给AI）
+        """
+        if not self._streaming:
+            self._add_to_history(role, content)
+            return
+        stored_role = self.HISTORY_ROLES.get(role, "ai")
+        row = self.history_model.rowCount() - 1
+        self.history_model.set_message_text(row, content, role=stored_role)
+        self._streaming = False
+        self.history_view.scrollToBottom()
+        self.db.add_dialog_history(stored_role, content, chapter_id=self.chapter_id)
+    
     def handle_ai_response(self, response: dict):
         """处理AI响应
         
         Args:
-            response: AI响应数据
+            response: AI响应数据，inserted 为True表示内容已流式写入编辑器，
+                此时不再需要（也不能）采用内容，以免重复插入
         """
         # 隐藏进度条
         self.progress_bar.hide()
@@ -232,18 +350,24 @@ class AIDialog(QDialog):
         
         if "error" in response:
             # 处理错误
-            self._add_to_history("AI", f"错误：{response['error']}")
+            self._show_ai_message(f"错误：{response['error']}", role="提示")
             self.last_generated_content = ""
             self.adopt_btn.setEnabled(False)
         else:
             # 处理成功响应
             content = response.get("text", "").strip()
-            if content:
-                self._add_to_history("AI", content)
+            if content and response.get("inserted"):
+                self._show_ai_message(content)
+                self.last_generated_content = ""
+                self.adopt_btn.setEnabled(False)
+                self.adopt_btn.setToolTip("生成的内容已写入编辑器，可在编辑器中撤销")
+            elif content:
+                self._show_ai_message(content)
                 self.last_generated_content = content
                 self.adopt_btn.setEnabled(True)
+                self.adopt_btn.setToolTip("")
             else:
-                self._add_to_history("AI", "生成的内容为空")
+                self._show_ai_message("生成的内容为空", role="提示")
                 self.last_generated_content = ""
                 self.adopt_btn.setEnabled(False)
         
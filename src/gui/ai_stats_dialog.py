@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI调用统计对话框
+按天、项目或模型汇总AI调用的用量、耗时、重试和费用，并列出最近的调用记录
+"""
+
+from datetime import timezone
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                           QTableWidgetItem, QPushButton, QLabel, QComboBox,
+                           QSpinBox, QSplitter, QHeaderView)
+from PyQt6.QtCore import Qt
+
+from database.operations import DatabaseManager
+
+class AIStatsDialog(QDialog):
+    """AI调用统计对话框"""
+    
+    GROUPS = [
+        ('day', "按天"),
+        ('project', "按项目"),
+        ('model', "按模型")
+    ]
+    
+    STATS_COLUMNS = [
+        ('key', "分组"),
+        ('requests', "调用次数"),
+        ('errors', "失败次数"),
+        ('cancelled', "取消次数"),
+        ('prompt_tokens', "提示词tokens"),
+        ('cached_tokens', "缓存命中tokens"),
+        ('completion_tokens', "生成tokens"),
+        ('reasoning_tokens', "推理tokens"),
+        ('avg_ttft_ms', "平均首字节(ms)"),
+        ('avg_latency_ms', "平均耗时(ms)"),
+        ('max_latency_ms', "最大耗时(ms)"),
+        ('retries', "重试次数"),
+        ('cost', "费用(元)")
+    ]
+    
+    RECENT_COLUMNS = [
+        ('created_at', "时间"),
+        ('operation', "类型"),
+        ('model', "模型"),
+        ('outcome', "结果"),
+        ('prompt_tokens', "提示词tokens"),
+        ('completion_tokens', "生成tokens"),
+        ('reasoning_tokens', "推理tokens"),
+        ('ttft_ms', "首字节(ms)"),
+        ('latency_ms', "耗时(ms)"),
+        ('retries', "重试"),
+        ('error', "错误")
+    ]
+    
+    def __init__(self, db: DatabaseManager, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("AI调用统计")
+        self.setMinimumSize(900, 600)
+        
+        self._init_ui()
+        self._refresh()
+    
+    def _init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        
+        # 筛选区域
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("分组:"))
+        self.group_combo = QComboBox()
+        for key, title in self.GROUPS:
+            self.group_combo.addItem(title, key)
+        self.group_combo.currentIndexChanged.connect(self._refresh)
+        filter_layout.addWidget(self.group_combo)
+        filter_layout.addWidget(QLabel("最近天数:"))
+        self.days_spin = QSpinBox()
+        self.days_spin.setRange(0, 3650)
+        self.days_spin.setValue(30)
+        self.days_spin.setSpecialValueText("全部")
+        self.days_spin.valueChanged.connect(self._refresh)
+        filter_layout.addWidget(self.days_spin)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+        
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.stats_table = self._create_table(self.STATS_COLUMNS)
+        splitter.addWidget(self.stats_table)
+        self.recent_table = self._create_table(self.RECENT_COLUMNS)
+        splitter.addWidget(self.recent_table)
+        layout.addWidget(splitter)
+        
+        # 按钮区域
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self._refresh)
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+    
+    def _create_table(self, columns) -> QTableWidget:
+        """创建统计表格"""
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels([title for _, title in columns])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSortingEnabled(True)
+        return table
+    
+    def _refresh(self):
+        """刷新统计和最近的调用记录"""
+        stats = self.db.get_ai_request_stats(self.group_combo.currentData(), self.days_spin.value())
+        self._fill_table(self.stats_table, self.STATS_COLUMNS, stats)
+        
+        recent = [
+            {key: getattr(record, key) for key, _ in self.RECENT_COLUMNS}
+            for record in self.db.get_recent_ai_requests()
+        ]
+        for row in recent:
+            if row['created_at']:
+                # 记录时间为UTC，显示为本地时间
+                local_time = row['created_at'].replace(tzinfo=timezone.utc).astimezone()
+                row['created_at'] = local_time.strftime('%Y-%m-%d %H:%M:%S')
+        self._fill_table(self.recent_table, self.RECENT_COLUMNS, recent)
+    
+    def _fill_table(self, table: QTableWidget, columns, rows):
+        """用统计行填充表格"""
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (key, _) in enumerate(columns):
+                value = row[key]
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 4 if key == 'cost' else 1))
+                elif value is not None:
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                table.setItem(row_index, column, item)
+        table.setSortingEnabled(True)
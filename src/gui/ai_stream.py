@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI流式输出组件
+在工作线程中流式请求AI服务，收到的增量先写入渲染缓冲，
+再由界面线程按固定帧率合并刷新到对话框和编辑器；行内续写建议的请求也在这里的工作线程中进行
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from ai_services.conversation import ConversationSession
+from ai_services.deepseek import CancelToken, DeepSeekAIService
+from utils.logger import logger
+
+class StreamRenderBuffer(QObject):
+    """流式输出的渲染缓冲
+    
+    每个token都插入一次文本会触发一次排版和重绘，生成速度快时界面跟不上。
+    工作线程通过 append() 追加增量（只在锁内拼接列表，不触碰界面），
+    界面线程的定时器按固定帧率取出这段时间累计的增量，每帧只发出一次 flushed 信号，
+    接收方每帧对每个控件只插入一次。
+    """
+    
+    # 定义信号
+    flushed = pyqtSignal(str, str)  # 一帧的增量，参数为推理内容和正文（可能为空字符串）
+    
+    def __init__(self, fps: int = 30, parent=None):
+        """初始化缓冲
+        
+        Args:
+            fps: 刷新帧率
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._reasoning = []
+        self._content = []
+        self.deltas = 0
+        self.frames = 0
+        self._started_at = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, round(1000 / max(fps, 1))))
+        self._timer.timeout.connect(self.flush)
+    
+    def append(self, kind: str, text: str):
+        """追加一个增量（可在任意线程调用）
+        
+        Args:
+            kind: "reasoning" 或 "content"
+            text: 增量文本
+        """
+        with self._lock:
+            (self._reasoning if kind == "reasoning" else self._content).append(text)
+            self.deltas += 1
+    
+    def start(self):
+        """开始按帧率刷新"""
+        self._started_at = time.perf_counter()
+        self._timer.start()
+    
+    def finish(self):
+        """停止定时刷新，并刷新剩余的增量"""
+        self._timer.stop()
+        self.flush()
+        if self._started_at is not None:
+            logger.debug(f"流式输出: {self.deltas}个增量合并为{self.frames}次刷新，"
+                         f"耗时{time.perf_counter() - self._started_at:.1f}秒")
+    
+    def flush(self):
+        """取出累计的增量并发出 flushed 信号（没有增量时不发出）"""
+        with self._lock:
+            reasoning, self._reasoning = self._reasoning, []
+            content, self._content = self._content, []
+        if not reasoning and not content:
+            return
+        self.frames += 1
+        self.flushed.emit("".join(reasoning), "".join(content))
+
+class AIStreamWorker(QThread):
+    """AI流式请求工作线程"""
+    
+    # 定义信号
+    completed = pyqtSignal(dict)  # 请求结束信号，参数为 ConversationSession.send 的返回值
+    
+    def __init__(self, session: ConversationSession, prompt: str, buffer: StreamRenderBuffer,
+                 max_tokens: int = 1000, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self.prompt = prompt
+        self.buffer = buffer
+        self.max_tokens = max_tokens
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """取消请求并断开连接（可在界面线程调用）"""
+        self.requestInterruption()
+        self.cancel_token.cancel()
+    
+    def run(self):
+        """在工作线程中发送请求，增量写入渲染缓冲"""
+        try:
+            result = self.session.send(self.prompt, self.max_tokens,
+                                       on_delta=self.buffer.append,
+                                       is_cancelled=self.cancel_token)
+        except Exception as e:
+            result = {"error": str(e)}
+        self.completed.emit(result)
+
+class InlineSuggestionWorker(QThread):
+    """行内续写建议请求工作线程"""
+    
+    # 定义信号
+    completed = pyqtSignal(int, str)  # 请求结束信号，参数为请求ID和生成的续写（失败或取消时为空字符串）
+    
+    def __init__(self, service: DeepSeekAIService, messages: List[Dict[str, str]], request_id: int,
+                 max_tokens: int = 64, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.messages = messages
+        self.request_id = request_id
+        self.max_tokens = max_tokens
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """取消请求并断开连接（可在界面线程调用）"""
+        self.requestInterruption()
+        self.cancel_token.cancel()
+    
+    def run(self):
+        """在工作线程中发送请求（使用流式请求，以便取消时立即断开）"""
+        result = self.service.chat_stream(self.messages, self.max_tokens,
+                                          is_cancelled=self.cancel_token,
+                                          operation="suggest")
+        self.completed.emit(self.request_id, result.get("text", ""))
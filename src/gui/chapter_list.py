@@ -6,13 +6,193 @@
 显示当前项目的所有章节，支持章节的创建、删除、重命名和排序等操作
 """
 
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListWidget, 
-                           QListWidgetItem, QPushButton, QInputDialog,
-                           QMessageBox, QMenu, QLabel)
-from PyQt6.QtCore import Qt, pyqtSignal
+from typing import List, Optional
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListView, QAbstractItemView,
+                           QPushButton, QInputDialog, QMessageBox, QMenu, QLabel)
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractListModel, QModelIndex, QMimeData
 from PyQt6.QtGui import QIcon, QAction
 
 from database.operations import DatabaseManager
+from utils.config import get_config_section
+from utils.perf import timed
+
+class ChapterListModel(QAbstractListModel):
+    """章节列表数据模型
+    
+    只保存章节摘要（ID、标题、顺序），按页从数据库读取：视图滚动到底部时
+    通过 canFetchMore/fetchMore 加载下一页。拖动排序时只移动被拖动的一行，
+    数据库中通常也只更新被移动的章节。
+    """
+    
+    IdRole = Qt.ItemDataRole.UserRole
+    MIME_TYPE = "application/x-ai-writer-chapter-row"
+    
+    chapter_moved = pyqtSignal(int, int)  # 章节移动信号，参数为章节ID和新的行号
+    
+    def __init__(self, db: DatabaseManager, page_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.project_id = None
+        self.chapters: List[List] = []  # [id, title, order]，按顺序排列
+        self.total = 0  # 项目的章节总数（含尚未加载的）
+        self.has_more = False
+    
+    def set_project(self, project_id, chapters: Optional[List[List]] = None, total: int = 0):
+        """切换项目并加载第一页
+        
+        Args:
+            project_id: 项目ID（None表示清空）
+            chapters: 已知的前若干个章节 [id, title, order]（如来自工作区快照），
+                提供时不查询数据库，之后的章节在滚动到底部时照常加载
+            total: 提供 chapters 时项目的章节总数
+        """
+        self.beginResetModel()
+        self.project_id = project_id
+        if chapters is not None:
+            self.chapters = [list(chapter) for chapter in chapters]
+            self.total = total
+            self.has_more = len(self.chapters) < total
+        else:
+            self.chapters = []
+            self.total = self.db.count_project_chapters(project_id) if project_id else 0
+            self.has_more = self.total > 0
+        self.endResetModel()
+        if chapters is None:
+            self.fetchMore()
+    
+    def row_of(self, chapter_id: int) -> int:
+        """章节在已加载部分中的行号，未加载时返回-1"""
+        for row, chapter in enumerate(self.chapters):
+            if chapter[0] == chapter_id:
+                return row
+        return -1
+    
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """已加载的章节数量"""
+        return 0 if parent.isValid() else len(self.chapters)
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        """获取章节数据"""
+        if not index.isValid():
+            return None
+        chapter_id, title, _ = self.chapters[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return title
+        if role == self.IdRole:
+            return chapter_id
+        return None
+    
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        """章节可以拖动，只能放在章节之间（不能放到章节上）"""
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+                | Qt.ItemFlag.ItemIsDragEnabled)
+    
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """是否还有未加载的章节"""
+        return not parent.isValid() and self.has_more
+    
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        """加载下一页章节并追加到末尾"""
+        if not self.canFetchMore(parent):
+            return
+        after = (self.chapters[-1][2], self.chapters[-1][0]) if self.chapters else None
+        rows = self.db.get_chapter_summaries(self.project_id, after, self.page_size)
+        if len(rows) < self.page_size:
+            self.has_more = False
+        if not rows:
+            return
+        start = len(self.chapters)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.chapters.extend([chapter_id, title, order] for chapter_id, title, order in rows)
+        self.endInsertRows()
+    
+    def supportedDropActions(self) -> Qt.DropAction:
+        """只支持移动"""
+        return Qt.DropAction.MoveAction
+    
+    def mimeTypes(self) -> List[str]:
+        """拖动数据类型"""
+        return [self.MIME_TYPE]
+    
+    def mimeData(self, indexes) -> QMimeData:
+        """拖动数据：被拖动章节的行号"""
+        mime_data = QMimeData()
+        if indexes:
+            mime_data.setData(self.MIME_TYPE, str(indexes[0].row()).encode())
+        return mime_data
+    
+    def dropMimeData(self, data: QMimeData, action: Qt.DropAction, row: int, column: int,
+                     parent: QModelIndex) -> bool:
+        """放下拖动的章节
+        
+        移动在这里完成，没有实现 removeRows，视图随后移除源行的操作不会生效。
+        """
+        if action != Qt.DropAction.MoveAction or not data.hasFormat(self.MIME_TYPE):
+            return False
+        source = int(bytes(data.data(self.MIME_TYPE)).decode())
+        if row < 0:
+            row = parent.row() if parent.isValid() else len(self.chapters)
+        return self.moveRows(QModelIndex(), source, 1, QModelIndex(), row)
+    
+    def moveRows(self, source_parent: QModelIndex, source_row: int, count: int,
+                 destination_parent: QModelIndex, destination_child: int) -> bool:
+        """移动一个章节
+        
+        Args:
+            source_row: 被移动的行
+            count: 行数（只支持1）
+            destination_child: 移动前的目标行，章节插入到该行之前
+        """
+        if (source_parent.isValid() or destination_parent.isValid() or count != 1
+                or not 0 <= source_row < len(self.chapters)
+                or not 0 <= destination_child <= len(self.chapters)
+                or destination_child in (source_row, source_row + 1)):
+            return False
+        new_row = destination_child if destination_child < source_row else destination_child - 1
+        chapter = self.chapters[source_row]
+        # 移动后排在它前面的章节（目标行之前的一行，不会是被移动的章节本身）
+        previous_id = self.chapters[destination_child - 1][0] if destination_child > 0 else None
+        changed = self.db.move_chapter(chapter[0], previous_id)
+        if changed is None:
+            return False
+        
+        self.beginMoveRows(QModelIndex(), source_row, source_row, QModelIndex(), destination_child)
+        if len(changed) > 1:
+            # 数据库重新编号了整个项目的顺序
+            for row in self.chapters:
+                row[2] = changed.get(row[0], row[2])
+        chapter[2] = changed[chapter[0]]
+        self.chapters.insert(new_row, self.chapters.pop(source_row))
+        self.endMoveRows()
+        self.chapter_moved.emit(chapter[0], new_row)
+        return True
+    
+    def append_chapter(self, chapter_id: int, title: str, order: int):
+        """添加新建的章节（排在最后；还有未加载的章节时由 fetchMore 加载）"""
+        self.total += 1
+        if self.has_more:
+            return
+        row = len(self.chapters)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.chapters.append([chapter_id, title, order])
+        self.endInsertRows()
+    
+    def rename_chapter(self, row: int, title: str):
+        """修改章节标题"""
+        self.chapters[row][1] = title
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+    
+    def remove_chapter(self, row: int):
+        """移除章节"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.chapters[row]
+        self.endRemoveRows()
+        self.total -= 1
 
 class ChapterList(QWidget):
     """章节列表组件"""
@@ -22,7 +202,7 @@ class ChapterList(QWidget):
     chapter_created = pyqtSignal(int)   # 章节创建信号，参数为新章节ID
     chapter_deleted = pyqtSignal(int)   # 章节删除信号，参数为被删除的章节ID
     chapter_renamed = pyqtSignal(int, str)  # 章节重命名信号，参数为章节ID和新名称
-    chapters_reordered = pyqtSignal()   # 章节重新排序信号
+    chapter_moved = pyqtSignal(int, int)  # 章节移动信号，参数为章节ID和新的行号
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -31,6 +211,8 @@ class ChapterList(QWidget):
         
         # 创建数据库管理器实例
         self.db = DatabaseManager()
+        self.model = ChapterListModel(self.db, get_config_section('gui').get('chapter_page_size', 200), self)
+        self.model.chapter_moved.connect(self.chapter_moved)
         
         self._init_ui()
     
@@ -52,20 +234,32 @@ class ChapterList(QWidget):
         self.new_chapter_btn = new_chapter_btn
         layout.addWidget(new_chapter_btn)
         
-        # 创建章节列表
-        self.list_widget = QListWidget()
-        self.list_widget.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.list_widget.itemClicked.connect(self._on_chapter_selected)
-        self.list_widget.model().rowsMoved.connect(self._on_chapters_reordered)
-        self.list_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.list_widget.customContextMenuRequested.connect(self._show_context_menu)
-        layout.addWidget(self.list_widget)
+        # 创建章节列表（所有行等高，视图不需要逐行计算尺寸）
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.list_view.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.list_view.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.list_view.clicked.connect(self._on_chapter_selected)
+        self.list_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.list_view.customContextMenuRequested.connect(self._show_context_menu)
+        layout.addWidget(self.list_view)
         
         # 设置布局
         self.setLayout(layout)
     
-    def set_project(self, project_id: int, project_name: str):
-        """设置当前项目"""
+    @timed("gui.chapter_list.set_project")
+    def set_project(self, project_id: int, project_name: str,
+                    chapters: Optional[List[List]] = None, total: int = 0):
+        """设置当前项目
+        
+        Args:
+            project_id: 项目ID
+            project_name: 项目名称
+            chapters: 已知的前若干个章节（见 ChapterListModel.set_project），None表示从数据库加载
+            total: 提供 chapters 时项目的章节总数
+        """
         # 清空当前章节列表
         self.clear_chapters()
         
@@ -74,10 +268,20 @@ class ChapterList(QWidget):
         self.project_title.setText(project_name)
         self.new_chapter_btn.setEnabled(True)
         
-        # 从数据库加载章节列表
-        chapters = self.db.get_project_chapters(project_id)
-        for chapter in chapters:
-            self.add_chapter(chapter.id, chapter.title)
+        # 从数据库加载第一页章节，其余在滚动到底部时加载
+        self.model.set_project(project_id, chapters, total)
+    
+    def select_chapter(self, chapter_id: int) -> bool:
+        """选中指定章节（不发出 chapter_selected 信号）
+        
+        Returns:
+            bool: 章节是否在已加载的部分中
+        """
+        row = self.model.row_of(chapter_id)
+        if row < 0:
+            return False
+        self.list_view.setCurrentIndex(self.model.index(row))
+        return True
     
     def _create_new_chapter(self):
         """创建新章节"""
@@ -88,51 +292,38 @@ class ChapterList(QWidget):
             self,
             "新建章节",
             "请输入章节名称:",
-            text=f"第{self.list_widget.count() + 1}章"
+            text=f"第{self.model.total + 1}章"
         )
         
         if ok and name:
             # 调用数据库接口创建新章节
             chapter = self.db.create_chapter(self.current_project_id, name)
             if chapter:
-                # 创建列表项
-                item = QListWidgetItem(name)
-                item.setData(Qt.ItemDataRole.UserRole, chapter.id)
-                self.list_widget.addItem(item)
+                self.model.append_chapter(chapter.id, name, chapter.order)
                 
                 # 发送章节创建信号
                 self.chapter_created.emit(chapter.id)
     
-    def _on_chapter_selected(self, item):
+    def _on_chapter_selected(self, index: QModelIndex):
         """处理章节选中事件"""
-        chapter_id = item.data(Qt.ItemDataRole.UserRole)
+        chapter_id = index.data(ChapterListModel.IdRole)
         self.chapter_selected.emit(chapter_id)
     
-    def _on_chapters_reordered(self):
-        """处理章节重新排序事件"""
-        if not self.current_project_id:
-            return
+    @timed("gui.chapter_list.move_chapter")
+    def move_chapter(self, row: int, new_row: int) -> bool:
+        """移动章节（拖动排序之外的调用入口）
         
-        # 收集所有章节的新顺序
-        chapter_orders = []
-        for i in range(self.list_widget.count()):
-            item = self.list_widget.item(i)
-            chapter_orders.append({
-                'id': item.data(Qt.ItemDataRole.UserRole),
-                'order': i
-            })
-        
-        # 更新数据库中的章节顺序
-        if self.db.update_chapter_order(self.current_project_id, chapter_orders):
-            self.chapters_reordered.emit()
-        else:
-            # 如果更新失败，重新加载章节列表
-            self.set_project(self.current_project_id, self.project_title.text())
+        Args:
+            row: 章节当前的行号
+            new_row: 移动后的行号
+        """
+        destination = new_row + 1 if new_row > row else new_row
+        return self.model.moveRows(QModelIndex(), row, 1, QModelIndex(), destination)
     
     def _show_context_menu(self, position):
         """显示右键菜单"""
-        item = self.list_widget.itemAt(position)
-        if not item:
+        item = self.list_view.indexAt(position)
+        if not item.isValid():
             return
             
         menu = QMenu(self)
@@ -148,11 +339,11 @@ class ChapterList(QWidget):
         menu.addAction(delete_action)
         
         # 显示菜单
-        menu.exec(self.list_widget.mapToGlobal(position))
+        menu.exec(self.list_view.viewport().mapToGlobal(position))
     
-    def _rename_chapter(self, item):
+    def _rename_chapter(self, item: QModelIndex):
         """重命名章节"""
-        old_name = item.text()
+        old_name = item.data()
         new_name, ok = QInputDialog.getText(
             self,
             "重命名章节",
@@ -161,38 +352,36 @@ class ChapterList(QWidget):
         )
         
         if ok and new_name and new_name != old_name:
-            chapter_id = item.data(Qt.ItemDataRole.UserRole)
+            chapter_id = item.data(ChapterListModel.IdRole)
             # 更新数据库
             if self.db.update_chapter(chapter_id, title=new_name):
-                item.setText(new_name)
+                self.model.rename_chapter(item.row(), new_name)
                 self.chapter_renamed.emit(chapter_id, new_name)
     
-    def _delete_chapter(self, item):
+    def _delete_chapter(self, item: QModelIndex):
         """删除章节"""
         reply = QMessageBox.question(
             self,
             "删除章节",
-            f'确定要删除章节"{item.text()}"吗？\n此操作不可撤销。',
+            f'确定要删除章节"{item.data()}"吗？\n此操作不可撤销。',
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            chapter_id = item.data(Qt.ItemDataRole.UserRole)
+            chapter_id = item.data(ChapterListModel.IdRole)
             # 从数据库删除
             if self.db.delete_chapter(chapter_id):
-                self.list_widget.takeItem(self.list_widget.row(item))
+                self.model.remove_chapter(item.row())
                 self.chapter_deleted.emit(chapter_id)
     
-    def add_chapter(self, chapter_id: int, name: str):
-        """添加章节到列表"""
-        item = QListWidgetItem(name)
-        item.setData(Qt.ItemDataRole.UserRole, chapter_id)
-        self.list_widget.addItem(item)
+    def add_chapter(self, chapter_id: int, name: str, order: int):
+        """添加章节到列表末尾"""
+        self.model.append_chapter(chapter_id, name, order)
     
     def clear_chapters(self):
         """清空章节列表"""
-        self.list_widget.clear()
+        self.model.set_project(None)
         if not self.current_project_id:  # 只有在没有选中项目时才重置标题
             self.project_title.setText("未选择项目")
             self.new_chapter_btn.setEnabled(False)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+对话视图组件
+基于 model/view 的对话历史列表，只布局和绘制可见的消息
+"""
+
+import sys
+from typing import Callable, List, Optional, Tuple
+
+from PyQt6.QtWidgets import (QListView, QStyledItemDelegate, QStyle,
+                           QAbstractItemView, QApplication, QMenu)
+from PyQt6.QtCore import (Qt, QAbstractListModel, QModelIndex, QSize, QRect)
+from PyQt6.QtGui import QFont, QFontMetrics, QAction
+
+from utils.memory import memory_profiler, text_size
+
+class ChatHistoryModel(QAbstractListModel):
+    """对话历史数据模型
+    
+    消息按时间正序排列。更早的消息通过 page_loader 按页向前加载，
+    page_loader 接收当前最早消息的ID（None表示从最新开始），
+    返回按时间正序排列的 (id, role, content) 列表。
+    
+    注意：这里不使用 Qt 的 canFetchMore/fetchMore，视图在最后一行可见时
+    会自动调用它们，而对话停留在底部时最后一行总是可见的，会导致不停加载。
+    更早消息的加载由 ChatListView 在滚动到顶部时触发。
+    """
+    
+    RoleRole = Qt.ItemDataRole.UserRole + 1  # 消息角色（'user' 或 'ai'）
+    KeyRole = Qt.ItemDataRole.UserRole + 2   # 消息在本模型内的唯一键，用于尺寸缓存
+    
+    def __init__(self, page_loader: Callable[[Optional[int]], List[Tuple[int, str, str]]],
+                 page_size: int = 50, parent=None):
+        super().__init__(parent)
+        self.page_loader = page_loader
+        self.page_size = page_size
+        self.messages = []  # [key, role, content]
+        self.oldest_id = None
+        self.has_more = True
+        self._next_key = 0
+        memory_profiler.register_cache("对话历史消息", self, ChatHistoryModel.memory_usage)
+    
+    def memory_usage(self) -> Tuple[int, int]:
+        """已加载消息的 (消息数, 估算字节数)，供内存分析使用"""
+        return len(self.messages), text_size(message[2] for message in self.messages)
+    
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """消息数量"""
+        return 0 if parent.isValid() else len(self.messages)
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        """获取消息数据"""
+        if not index.isValid():
+            return None
+        key, message_role, content = self.messages[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return content
+        if role == self.RoleRole:
+            return message_role
+        if role == self.KeyRole:
+            return key
+        return None
+    
+    def can_fetch_older(self) -> bool:
+        """是否还有更早的消息"""
+        return self.has_more
+    
+    def fetch_older(self):
+        """加载一页更早的消息并插入到顶部"""
+        if not self.has_more:
+            return
+        records = self.page_loader(self.oldest_id)
+        if len(records) < self.page_size:
+            self.has_more = False
+        if not records:
+            return
+        self.oldest_id = records[0][0]
+        self.beginInsertRows(QModelIndex(), 0, len(records) - 1)
+        self.messages[0:0] = [[self._new_key(), role, content] for _, role, content in records]
+        self.endInsertRows()
+    
+    def append_message(self, role: str, content: str):
+        """在末尾追加一条消息"""
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append([self._new_key(), role, content])
+        self.endInsertRows()
+    
+    def append_to_message(self, row: int, text: str):
+        """在一条消息末尾追加文本（流式输出时每帧调用一次）"""
+        self.messages[row][2] += text
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+    
+    def set_message_text(self, row: int, content: str, role: Optional[str] = None):
+        """替换一条消息的内容（role 不为None时同时替换角色）"""
+        self.messages[row][2] = content
+        roles = [Qt.ItemDataRole.DisplayRole]
+        if role is not None:
+            self.messages[row][1] = role
+            roles.append(self.RoleRole)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, roles)
+    
+    def clear(self):
+        """清空所有消息"""
+        self.beginResetModel()
+        self.messages = []
+        self.oldest_id = None
+        self.has_more = False
+        self.endResetModel()
+    
+    def _new_key(self) -> int:
+        """生成消息键"""
+        self._next_key += 1
+        return self._next_key
+
+class ChatMessageDelegate(QStyledItemDelegate):
+    """对话消息绘制代理
+    
+    消息高度的计算（自动换行排版）开销与消息长度成正比，
+    因此按 (消息键, 可用宽度) 缓存，视图宽度变化时清空。
+    """
+    
+    PADDING = 8
+    
+    # 消息角色的显示名称（"error" 为失败、取消等提示消息）
+    ROLE_TEXT = {"user": "用户", "ai": "AI", "error": "提示"}
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._size_cache = {}
+        self._cache_width = None
+        memory_profiler.register_cache("消息尺寸缓存", self, ChatMessageDelegate.memory_usage)
+    
+    def memory_usage(self) -> Tuple[int, int]:
+        """尺寸缓存的 (条目数, 估算字节数)，供内存分析使用"""
+        cache = self._size_cache
+        return len(cache), sys.getsizeof(cache) + sum(sys.getsizeof(size) for size in cache.values())
+    
+    def clear_cache(self):
+        """清空尺寸缓存"""
+        self._size_cache.clear()
+    
+    def forget(self, key: int):
+        """丢弃一条消息的缓存尺寸（消息内容变化时调用）"""
+        self._size_cache.pop(key, None)
+    
+    def _role_text(self, index: QModelIndex) -> str:
+        """消息角色的显示名称"""
+        return self.ROLE_TEXT.get(index.data(ChatHistoryModel.RoleRole), "AI")
+    
+    def _text_width(self, option) -> int:
+        """消息正文的可用宽度"""
+        return max(option.rect.width() - 2 * self.PADDING, 50)
+    
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        """计算消息尺寸（带缓存）"""
+        width = self._text_width(option)
+        if width != self._cache_width:
+            self._size_cache.clear()
+            self._cache_width = width
+        
+        key = index.data(ChatHistoryModel.KeyRole)
+        size = self._size_cache.get(key)
+        if size is None:
+            metrics = QFontMetrics(option.font)
+            body = metrics.boundingRect(
+                QRect(0, 0, width, 0),
+                Qt.TextFlag.TextWordWrap,
+                index.data(Qt.ItemDataRole.DisplayRole) or ""
+            )
+            height = metrics.height() + body.height() + 3 * self.PADDING
+            size = QSize(width + 2 * self.PADDING, height)
+            self._size_cache[key] = size
+        return size
+    
+    def paint(self, painter, option, index: QModelIndex):
+        """绘制消息"""
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            painter.setPen(option.palette.text().color())
+        
+        rect = option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        
+        # 角色标题
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        title_height = QFontMetrics(title_font).height()
+        painter.drawText(QRect(rect.left(), rect.top(), rect.width(), title_height),
+                         Qt.AlignmentFlag.AlignLeft, f"{self._role_text(index)}：")
+        
+        # 消息正文
+        painter.setFont(option.font)
+        body_rect = rect.adjusted(0, title_height + self.PADDING, 0, 0)
+        painter.drawText(body_rect, Qt.TextFlag.TextWordWrap,
+                         index.data(Qt.ItemDataRole.DisplayRole) or "")
+        
+        # 分隔线
+        painter.setPen(option.palette.mid().color())
+        painter.drawLine(option.rect.bottomLeft(), option.rect.bottomRight())
+        painter.restore()
+
+class ChatListView(QListView):
+    """对话历史列表视图
+    
+    与普通列表不同，对话从底部开始阅读，因此在滚动到顶部（而不是底部）时
+    向模型请求更早的消息。
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.delegate = ChatMessageDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(False)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
+    
+    def dataChanged(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=()):
+        """消息内容变化时重新计算这些消息的高度"""
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.delegate.forget(top_left.sibling(row, 0).data(ChatHistoryModel.KeyRole))
+        super().dataChanged(top_left, bottom_right, roles)
+        self.scheduleDelayedItemsLayout()
+    
+    def verticalScrollbarValueChanged(self, value: int):
+        """滚动到顶部时加载更早的消息，并保持当前可见内容的位置"""
+        super().verticalScrollbarValueChanged(value)
+        model = self.model()
+        scroll_bar = self.verticalScrollBar()
+        if (self.isVisible() and value == scroll_bar.minimum()
+                and isinstance(model, ChatHistoryModel) and model.can_fetch_older()):
+            old_maximum = scroll_bar.maximum()
+            model.fetch_older()
+            self.doItemsLayout()
+            scroll_bar.setValue(scroll_bar.maximum() - old_maximum)
+    
+    def _show_context_menu(self, position):
+        """显示右键菜单"""
+        index = self.indexAt(position)
+        if not index.isValid():
+            return
+        menu = QMenu(self)
+        copy_action = QAction("复制", self)
+        copy_action.triggered.connect(
+            lambda: QApplication.clipboard().setText(index.data(Qt.ItemDataRole.DisplayRole) or "")
+        )
+        menu.addAction(copy_action)
+        menu.exec(self.viewport().mapToGlobal(position))
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+诊断对话框
+显示热点操作的调用次数和耗时分位数、各操作的SQL查询统计、界面卡顿位置和内存占用，并支持导出
+"""
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                           QTableWidgetItem, QPushButton, QCheckBox, QWidget,
+                           QTabWidget, QFileDialog, QMessageBox, QHeaderView,
+                           QLabel, QSplitter)
+from PyQt6.QtCore import Qt
+
+from utils.perf import perf
+from database.profiler import query_profiler
+from gui.stall_watchdog import stall_watchdog
+from utils.memory import memory_profiler, current_rss
+
+class DiagnosticsDialog(QDialog):
+    """性能诊断对话框"""
+    
+    COLUMNS = [
+        ('name', "操作"),
+        ('count', "次数"),
+        ('total_ms', "总耗时(ms)"),
+        ('p50_ms', "p50(ms)"),
+        ('p95_ms', "p95(ms)"),
+        ('p99_ms', "p99(ms)"),
+        ('max_ms', "最大(ms)")
+    ]
+    
+    SQL_COLUMNS = [
+        ('action', "操作"),
+        ('invocations', "次数"),
+        ('statements', "语句数"),
+        ('avg_statements', "平均语句数"),
+        ('max_statements', "单次最多"),
+        ('total_ms', "总耗时(ms)"),
+        ('n_plus_one', "N+1警告")
+    ]
+    
+    STALL_COLUMNS = [
+        ('site', "调用位置"),
+        ('count', "次数"),
+        ('total_ms', "总时长(ms)"),
+        ('max_ms', "最长(ms)")
+    ]
+    
+    MEMORY_COLUMNS = [
+        ('subsystem', "子系统"),
+        ('size_kb', "占用(KB)"),
+        ('count', "分配块数"),
+        ('diff_kb', "较上次(KB)"),
+        ('growth_kb', "较首次(KB)")
+    ]
+    
+    ALLOCATOR_COLUMNS = [
+        ('site', "分配位置"),
+        ('subsystem', "子系统"),
+        ('size_kb', "占用(KB)"),
+        ('count', "分配块数"),
+        ('diff_kb', "较上次(KB)"),
+        ('growth_kb', "较首次(KB)")
+    ]
+    
+    CACHE_COLUMNS = [
+        ('name', "缓存"),
+        ('instances', "实例数"),
+        ('entries', "条目数"),
+        ('size_kb', "估算大小(KB)")
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能诊断")
+        self.setMinimumSize(800, 500)
+        
+        self._init_ui()
+        self._refresh()
+    
+    def _init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs)
+        
+        # 耗时统计页
+        timing_page = QWidget()
+        timing_layout = QVBoxLayout(timing_page)
+        self.enable_check = QCheckBox("启用性能统计")
+        self.enable_check.setChecked(perf.enabled)
+        self.enable_check.toggled.connect(self._on_enable_toggled)
+        timing_layout.addWidget(self.enable_check)
+        self.table = self._create_table(self.COLUMNS)
+        timing_layout.addWidget(self.table)
+        self.tabs.addTab(timing_page, "耗时统计")
+        
+        # SQL查询页
+        sql_page = QWidget()
+        sql_layout = QVBoxLayout(sql_page)
+        self.sql_enable_check = QCheckBox(
+            f"启用SQL查询分析（单次操作相似语句超过{query_profiler.threshold}条时记录N+1警告）"
+        )
+        self.sql_enable_check.setChecked(query_profiler.running)
+        self.sql_enable_check.toggled.connect(self._on_sql_enable_toggled)
+        sql_layout.addWidget(self.sql_enable_check)
+        self.sql_table = self._create_table(self.SQL_COLUMNS)
+        sql_layout.addWidget(self.sql_table)
+        self.tabs.addTab(sql_page, "SQL查询")
+        
+        # 界面卡顿页
+        stall_page = QWidget()
+        stall_layout = QVBoxLayout(stall_page)
+        self.stall_enable_check = QCheckBox(
+            f"启用界面卡顿监测（事件循环阻塞超过{stall_watchdog.threshold_ms}ms时记录主线程调用栈）"
+        )
+        self.stall_enable_check.setChecked(stall_watchdog.running)
+        self.stall_enable_check.toggled.connect(self._on_stall_enable_toggled)
+        stall_layout.addWidget(self.stall_enable_check)
+        self.stall_table = self._create_table(self.STALL_COLUMNS)
+        stall_layout.addWidget(self.stall_table)
+        self.tabs.addTab(stall_page, "界面卡顿")
+        
+        # 内存页
+        memory_page = QWidget()
+        memory_layout = QVBoxLayout(memory_page)
+        memory_bar = QHBoxLayout()
+        self.memory_enable_check = QCheckBox("启用内存分析（tracemalloc，开启后内存和CPU开销明显增加）")
+        self.memory_enable_check.setChecked(memory_profiler.running)
+        self.memory_enable_check.toggled.connect(self._on_memory_enable_toggled)
+        memory_bar.addWidget(self.memory_enable_check)
+        memory_bar.addStretch()
+        self.snapshot_btn = QPushButton("拍摄快照")
+        self.snapshot_btn.setEnabled(memory_profiler.running)
+        self.snapshot_btn.clicked.connect(self._on_take_snapshot)
+        memory_bar.addWidget(self.snapshot_btn)
+        memory_dump_btn = QPushButton("导出内存统计...")
+        memory_dump_btn.clicked.connect(self._on_dump_memory)
+        memory_bar.addWidget(memory_dump_btn)
+        memory_layout.addLayout(memory_bar)
+        self.memory_label = QLabel()
+        memory_layout.addWidget(self.memory_label)
+        memory_splitter = QSplitter(Qt.Orientation.Vertical)
+        self.memory_table = self._create_table(self.MEMORY_COLUMNS)
+        memory_splitter.addWidget(self.memory_table)
+        self.allocator_table = self._create_table(self.ALLOCATOR_COLUMNS)
+        memory_splitter.addWidget(self.allocator_table)
+        self.cache_table = self._create_table(self.CACHE_COLUMNS)
+        memory_splitter.addWidget(self.cache_table)
+        memory_layout.addWidget(memory_splitter)
+        self.tabs.addTab(memory_page, "内存")
+        
+        # 按钮区域
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self._refresh)
+        btn_layout.addWidget(refresh_btn)
+        reset_btn = QPushButton("重置")
+        reset_btn.clicked.connect(self._on_reset)
+        btn_layout.addWidget(reset_btn)
+        dump_btn = QPushButton("导出...")
+        dump_btn.clicked.connect(self._on_dump)
+        btn_layout.addWidget(dump_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+    
+    def _create_table(self, columns) -> QTableWidget:
+        """创建统计表格"""
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels([title for _, title in columns])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSortingEnabled(True)
+        return table
+    
+    def _refresh(self):
+        """刷新统计表格"""
+        self._fill_table(self.table, self.COLUMNS, perf.snapshot())
+        self._fill_table(self.sql_table, self.SQL_COLUMNS, query_profiler.snapshot())
+        # 卡顿时的调用栈显示在调用位置的提示中
+        self._fill_table(self.stall_table, self.STALL_COLUMNS, stall_watchdog.snapshot(),
+                         tooltip_key='stack')
+        self._refresh_memory()
+    
+    def _refresh_memory(self):
+        """刷新内存页"""
+        rss = current_rss()
+        snapshots = memory_profiler.snapshots()
+        parts = [f"常驻内存: {rss / 1024 / 1024:.1f}MB" if rss else "常驻内存: 未知"]
+        if snapshots:
+            latest = snapshots[-1]
+            parts.append(f"快照 {len(snapshots)} 个，最新 {latest['label']}："
+                         f"跟踪到 {latest['traced_kb'] / 1024:.1f}MB，峰值 {latest['peak_kb'] / 1024:.1f}MB")
+        elif memory_profiler.running:
+            parts.append("尚未拍摄快照")
+        self.memory_label.setText("；".join(parts))
+        self._fill_table(self.memory_table, self.MEMORY_COLUMNS, memory_profiler.subsystem_stats())
+        self._fill_table(self.allocator_table, self.ALLOCATOR_COLUMNS, memory_profiler.top_allocators())
+        self._fill_table(self.cache_table, self.CACHE_COLUMNS, memory_profiler.cache_sizes())
+    
+    def _fill_table(self, table: QTableWidget, columns, rows, tooltip_key: str = None):
+        """用统计行填充表格"""
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (key, _) in enumerate(columns):
+                value = row[key]
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 2))
+                else:
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                if tooltip_key and column == 0:
+                    item.setToolTip(row[tooltip_key])
+                table.setItem(row_index, column, item)
+        table.setSortingEnabled(True)
+    
+    def _on_enable_toggled(self, checked: bool):
+        """切换性能统计开关"""
+        perf.enabled = checked
+    
+    def _on_sql_enable_toggled(self, checked: bool):
+        """切换SQL查询分析开关"""
+        if checked:
+            query_profiler.start()
+        else:
+            query_profiler.stop()
+    
+    def _on_stall_enable_toggled(self, checked: bool):
+        """切换界面卡顿监测开关"""
+        if checked:
+            stall_watchdog.start()
+        else:
+            stall_watchdog.stop()
+    
+    def _on_memory_enable_toggled(self, checked: bool):
+        """切换内存分析开关"""
+        if checked:
+            memory_profiler.start()
+        else:
+            memory_profiler.stop()
+        self.snapshot_btn.setEnabled(checked)
+    
+    def _on_take_snapshot(self):
+        """拍摄内存快照"""
+        memory_profiler.take_snapshot()
+        self._refresh_memory()
+    
+    def _on_reset(self):
+        """清空统计"""
+        perf.reset()
+        query_profiler.reset()
+        stall_watchdog.reset()
+        memory_profiler.reset()
+        self._refresh()
+    
+    def _on_dump(self):
+        """导出统计到文件"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能统计", "perf.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            perf.dump(path)
+            QMessageBox.information(self, "导出成功", f"性能统计已导出到：\n{path}")
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", f"导出性能统计失败：{e}")
+    
+    def _on_dump_memory(self):
+        """导出内存统计到文件"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出内存统计", "memory.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            memory_profiler.dump(path)
+            QMessageBox.information(self, "导出成功", f"内存统计已导出到：\n{path}")
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", f"导出内存统计失败：{e}")
@@ -6,16 +6,24 @@
 提供文本编辑功能，包括AI辅助写作功能
 """
 
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, 
                            QPushButton, QHBoxLayout, QLabel,
                            QSpinBox, QProgressBar, QComboBox,
                            QDialog, QDialogButtonBox, QPlainTextEdit,
-                           QInputDialog, QMessageBox)
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QTextCursor, QFont
+                           QInputDialog, QMessageBox, QStackedWidget,
+                           QPlainTextDocumentLayout, QCheckBox)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtGui import QTextCursor, QFont, QTextDocument
 
 from database.operations import DatabaseManager
-from .ai_dialog import AIDialog
+from utils.config import get_config_section
+from utils.perf import timed
+from utils.memory import memory_profiler
+from .inline_suggestion import InlineSuggestion
+from .text_stats import DocumentStats
 
 class PromptTemplateDialog(QDialog):
     """提示词模板编辑对话框"""
@@ -61,22 +69,74 @@ class PromptTemplateDialog(QDialog):
         """获取编辑后的模板"""
         return self.editor.toPlainText()
 
+class CachedDocument:
+    """文档缓存中的一个章节文档及其编辑状态"""
+    
+    def __init__(self, document: QTextDocument, large: bool):
+        self.document = document
+        self.large = large  # 是否为大文档模式（在 QPlainTextEdit 中编辑）
+        self.cursor = (0, 0)  # (锚点, 位置)
+        self.scroll = 0
+        self.revision = 0
+        self.saved_revision = 0
+        self.dirty_ranges: List[Tuple[int, int]] = []
+        self.stats: Optional[DocumentStats] = None  # 文本统计（未开启时为None）
+
 class Editor(QWidget):
-    """编辑器组件"""
+    """编辑器组件
+    
+    编辑时不复制全文：通过 QTextDocument.contentsChange 记录修订号和修改过的区间，
+    只有保存或AI请求真正需要时才通过 get_content 取出全文。
+    
+    超过大文档阈值的章节使用 QPlainTextEdit 编辑（只排版可见的文本块），
+    并分块逐步载入，载入期间界面保持响应。
+    
+    最近打开的章节文档保存在LRU缓存中（按章节数和总字数限制），再次切换到这些章节时
+    直接换回原文档，不需要重新读取和排版，光标位置和撤销历史也得以保留。
+    """
     
     # 定义信号
-    content_changed = pyqtSignal(str)  # 内容变更信号
+    content_changed = pyqtSignal(int)  # 内容变更信号，参数为修订号
     ai_request = pyqtSignal(dict)       # AI请求信号
+    document_evicted = pyqtSignal(int, str)  # 有未保存修改的文档被移出缓存，参数为章节ID和内容
+    text_stats_changed = pyqtSignal(object)  # 当前章节的文本统计（TextCounts），统计中或没有章节时为None
+    
+    # 修改区间数超过该值时合并为一个区间
+    MAX_DIRTY_RANGES = 64
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("Editor")
         self.current_chapter_id = None
         
+        # 修改跟踪：每次内容变化修订号加1，保存后记录已保存的修订号
+        self.revision = 0
+        self._saved_revision = 0
+        self._dirty_ranges: List[Tuple[int, int]] = []  # 按位置排序、互不重叠的 [开始, 结束) 区间
+        self._loading = False
+        self._load_generation = 0  # 每次载入加1，用于取消尚未完成的分块载入
+        
+        gui_config = get_config_section('gui')
+        self.large_document_threshold = gui_config.get('large_document_threshold', 200000)
+        self.load_chunk_size = gui_config.get('load_chunk_size', 262144)
+        self.document_cache_size = gui_config.get('document_cache_size', 8)
+        self.document_cache_chars = gui_config.get('document_cache_chars', 8000000)
+        self._documents: "OrderedDict[int, CachedDocument]" = OrderedDict()
+        self._current: Optional[CachedDocument] = None
+        self._stream_cursor: Optional[QTextCursor] = None  # 流式插入生成内容的位置
+        self._stream_start = 0
+        
+        # 按段落增量统计字数等，显示在状态栏
+        stats_config = gui_config.get('text_stats') or {}
+        self.text_stats_enabled = stats_config.get('enabled', True)
+        self.text_stats_delay_ms = stats_config.get('delay_ms', 300)
+        self.text_stats_batch_blocks = stats_config.get('batch_blocks', 2000)
+        
         # 创建数据库管理器实例
         self.db = DatabaseManager()
         
         self._init_ui()
+        memory_profiler.register_cache("编辑器文档", self, Editor.memory_usage)
         
         # 加载提示词模板
         self._load_templates()
@@ -138,15 +198,34 @@ class Editor(QWidget):
         self.progress_bar = progress_bar
         toolbar_layout.addWidget(progress_bar)
         
+        # 行内续写建议开关
+        suggestion_check = QCheckBox("行内建议")
+        suggestion_check.setToolTip("停止输入片刻后在光标后显示续写建议，按 Tab 采用，按 Esc 忽略")
+        self.suggestion_check = suggestion_check
+        toolbar_layout.addWidget(suggestion_check)
+        
         toolbar_layout.addStretch()
         layout.addWidget(toolbar)
         
-        # 创建编辑器
-        editor = QTextEdit()
-        editor.setPlaceholderText('在这里开始写作，或点击"生成"按钮生成内容...')
-        editor.textChanged.connect(self._on_content_changed)
-        self.editor = editor
-        layout.addWidget(editor)
+        # 创建编辑器：普通章节使用 QTextEdit，大文档使用 QPlainTextEdit
+        # 未打开章节（或文档已换出）时显示各自的空白文档
+        placeholder = '在这里开始写作，或点击"生成"按钮生成内容...'
+        self.rich_editor = QTextEdit()
+        self.plain_editor = QPlainTextEdit()
+        self.editor_stack = QStackedWidget()
+        self.editor = self.rich_editor
+        self._blank_documents = {}
+        for editor in (self.rich_editor, self.plain_editor):
+            editor.setPlaceholderText(placeholder)
+            self._blank_documents[editor] = self._create_document(editor is self.plain_editor)
+            editor.setDocument(self._blank_documents[editor])
+            self.editor_stack.addWidget(editor)
+        layout.addWidget(self.editor_stack)
+        
+        # 行内续写建议
+        self.inline_suggestion = InlineSuggestion(self)
+        suggestion_check.setChecked(self.inline_suggestion.enabled)
+        suggestion_check.toggled.connect(self.inline_suggestion.set_enabled)
         
         # 设置布局
         self.setLayout(layout)
@@ -181,18 +260,19 @@ class Editor(QWidget):
     def _generate_new_content(self):
         """生成新内容"""
         # 创建并显示AI对话框
-        dialog = AIDialog(self)
+        from .ai_dialog import AIDialog
+        dialog = AIDialog(self, chapter_id=self.current_chapter_id)
         dialog.content_generated.connect(self._insert_generated_content)
         dialog.exec()
     
     def _generate_content(self):
         """续写内容"""
-        # 获取当前内容作为上下文
-        cursor = self.editor.textCursor()
-        context = self.editor.toPlainText()[:cursor.position()]
+        # 获取光标之前的内容作为上下文
+        context = self.get_text_before_cursor()
         
         # 创建并显示AI对话框
-        dialog = AIDialog(self, context=context)
+        from .ai_dialog import AIDialog
+        dialog = AIDialog(self, context=context, chapter_id=self.current_chapter_id)
         dialog.content_generated.connect(self._insert_generated_content)
         dialog.exec()
     
@@ -205,37 +285,384 @@ class Editor(QWidget):
         if not content:
             return
         
-        # 在光标位置插入生成的内容
+        # 在光标位置插入生成的内容（由 contentsChange 记录修改）
         cursor = self.editor.textCursor()
         cursor.insertText(content)
+    
+    @property
+    def is_streaming(self) -> bool:
+        """是否正在流式插入生成的内容"""
+        return self._stream_cursor is not None
+    
+    def begin_stream_insert(self):
+        """开始在光标位置流式插入生成的内容"""
+        self._stream_cursor = QTextCursor(self.editor.textCursor())
+        self._stream_cursor.clearSelection()
+        self._stream_start = self._stream_cursor.position()
+    
+    def append_stream_text(self, text: str):
+        """追加一段流式生成的内容（每帧调用一次）
         
-        # 发送内容变更信号
-        self._on_content_changed()
+        所有片段合并为一个撤销步骤。当前显示的不是开始插入时的文档（切换了章节）时不插入，
+        以免写入已换出的文档。
+        """
+        cursor = self._stream_cursor
+        if cursor is None or not text:
+            return
+        if cursor.document() is not self.editor.document():
+            return
+        if cursor.position() == self._stream_start:
+            # 与一次性插入时一样去掉开头的空白
+            text = text.lstrip()
+            if not text:
+                return
+            cursor.beginEditBlock()
+        else:
+            cursor.joinPreviousEditBlock()
+        cursor.insertText(text)
+        cursor.endEditBlock()
     
+    def end_stream_insert(self, keep: bool = True) -> bool:
+        """结束流式插入
+        
+        Args:
+            keep: 是否保留已插入的内容（生成失败或取消时传False，删除已插入的部分）
+        
+        Returns:
+            bool: 是否有生成的内容留在了文档中（中途切换了章节时只有部分内容，
+                留在开始插入的章节中，不再删除）
+        """
+        cursor, self._stream_cursor = self._stream_cursor, None
+        if cursor is None or cursor.position() == self._stream_start:
+            return False
+        if cursor.document() is not self.editor.document():
+            return True
+        if keep:
+            return True
+        cursor.joinPreviousEditBlock()
+        cursor.setPosition(self._stream_start, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        cursor.endEditBlock()
+        return False
+    
+    @timed("gui.editor.set_chapter")
     def set_chapter(self, chapter_id: int, content: str = ""):
-        """设置当前章节"""
+        """设置当前章节（以给定内容新建文档，替换缓存中该章节的文档）"""
+        self._deactivate()
+        self._drop_document(chapter_id, flush=False)
+        large = len(content) > self.large_document_threshold
+        entry = CachedDocument(self._create_document(large), large)
+        if self.text_stats_enabled:
+            entry.stats = DocumentStats(entry.document, self.text_stats_delay_ms,
+                                        self.text_stats_batch_blocks)
+            entry.stats.changed.connect(self._on_stats_changed)
+        self._documents[chapter_id] = entry
         self.current_chapter_id = chapter_id
-        self.editor.setPlainText(content)
-        self.generate_btn.setEnabled(True)  # 启用续写按钮
-        self.generate_new_btn.setEnabled(True)  # 确保生成按钮也启用
+        self._activate(entry)
+        self._load_text(content)
+        self._evict_documents()
+        # 分块载入期间禁用生成按钮，载入完成后在 _finish_loading 中启用
+        self.generate_btn.setEnabled(not self._loading)  # 启用续写按钮
+        self.generate_new_btn.setEnabled(not self._loading)  # 确保生成按钮也启用
+    
+    @timed("gui.editor.show_cached_chapter")
+    def show_cached_chapter(self, chapter_id: int) -> bool:
+        """切换到缓存中的章节文档
+        
+        Args:
+            chapter_id: 章节ID
+            
+        Returns:
+            bool: 缓存中有该章节时切换并返回True，否则返回False（需调用 set_chapter 载入）
+        """
+        entry = self._documents.get(chapter_id)
+        if entry is None:
+            return False
+        if entry is not self._current:
+            self._deactivate()
+            self._documents.move_to_end(chapter_id)
+            self.current_chapter_id = chapter_id
+            self._activate(entry)
+        self.generate_btn.setEnabled(True)
+        self.generate_new_btn.setEnabled(True)
+        return True
+    
+    def discard_documents(self, chapter_ids: Optional[Iterable[int]] = None):
+        """丢弃缓存的章节文档（章节在编辑器之外被修改或删除后调用）
+        
+        丢弃的文档不会保存；当前章节被丢弃时编辑器被清空。
+        
+        Args:
+            chapter_ids: 章节ID列表（None表示全部）
+        """
+        if chapter_ids is None:
+            chapter_ids = list(self._documents)
+        for chapter_id in chapter_ids:
+            if chapter_id == self.current_chapter_id:
+                self.clear_content()
+            self._drop_document(chapter_id, flush=False)
+    
+    def cached_chapter_ids(self) -> List[int]:
+        """缓存中的章节ID，按最近使用的顺序排列（最近的在最后）"""
+        return list(self._documents)
+    
+    def _create_document(self, large: bool) -> QTextDocument:
+        """创建章节文档（父对象为编辑器组件，换出时不会被编辑框删除）"""
+        document = QTextDocument(self)
+        if large:
+            document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        document.setDefaultFont(self.font())
+        document.contentsChange.connect(self._on_contents_change)
+        return document
+    
+    def _activate(self, entry: CachedDocument):
+        """在对应的编辑框中显示文档并恢复其编辑状态"""
+        editor = self.plain_editor if entry.large else self.rich_editor
+        editor.setDocument(entry.document)
+        self.editor = editor
+        self.editor_stack.setCurrentWidget(editor)
+        self._current = entry
+        
+        # 修订号全局递增，避免换回的文档与之前的保存请求混淆
+        self.revision += 1
+        self._saved_revision = self.revision if entry.revision == entry.saved_revision else entry.saved_revision
+        self._dirty_ranges = list(entry.dirty_ranges)
+        self.restore_view_state(entry.cursor, entry.scroll)
+        self._emit_text_stats()
+    
+    @property
+    def text_stats(self) -> Optional[DocumentStats]:
+        """当前章节的文本统计（没有章节或未开启统计时为None）"""
+        return self._current.stats if self._current is not None else None
+    
+    def _emit_text_stats(self):
+        """发出当前章节的统计结果"""
+        stats = self.text_stats
+        self.text_stats_changed.emit(stats.totals.copy() if stats is not None and not stats.pending else None)
+    
+    def _on_stats_changed(self):
+        """文档统计完成，只转发当前章节的结果"""
+        if self._current is not None and self.sender() is self._current.stats:
+            self._emit_text_stats()
     
-    def _on_content_changed(self):
-        """处理内容变更事件"""
+    def view_state(self) -> Tuple[Tuple[int, int], int]:
+        """当前文档的光标 (锚点, 位置) 和滚动位置"""
+        cursor = self.editor.textCursor()
+        return (cursor.anchor(), cursor.position()), self.editor.verticalScrollBar().value()
+    
+    def restore_view_state(self, cursor: Tuple[int, int], scroll: int):
+        """恢复当前文档的光标和滚动位置（超出文档范围的位置截断到末尾）"""
+        document = self.editor.document()
+        end = document.characterCount() - 1
+        text_cursor = QTextCursor(document)
+        text_cursor.setPosition(min(cursor[0], end))
+        text_cursor.setPosition(min(cursor[1], end), QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(text_cursor)
+        self.editor.verticalScrollBar().setValue(scroll)
+    
+    def _deactivate(self):
+        """换出当前文档，保存其编辑状态；尚未载入完成的文档直接丢弃"""
+        self.inline_suggestion.dismiss()
+        entry = self._current
+        if entry is None:
+            return
+        self._current = None
+        if self._loading:
+            self._load_generation += 1
+            self._finish_loading()
+            self._drop_document(self.current_chapter_id, flush=False)
+        else:
+            cursor = self.editor.textCursor()
+            entry.cursor = (cursor.anchor(), cursor.position())
+            entry.scroll = self.editor.verticalScrollBar().value()
+            entry.revision = self.revision
+            entry.saved_revision = self._saved_revision
+            entry.dirty_ranges = list(self._dirty_ranges)
+        # 两个编辑框都换回空白文档，确保缓存的文档不再被显示，可以安全删除
+        for editor, blank in self._blank_documents.items():
+            if editor.document() is not blank:
+                editor.setDocument(blank)
+        self.editor = self.rich_editor
+        self.editor_stack.setCurrentWidget(self.rich_editor)
+    
+    def _drop_document(self, chapter_id: Optional[int], flush: bool):
+        """从缓存中移除章节文档
+        
+        Args:
+            chapter_id: 章节ID
+            flush: 文档有未保存的修改时是否通过 document_evicted 信号交给调用方保存
+        """
+        entry = self._documents.pop(chapter_id, None)
+        if entry is None:
+            return
+        if flush and entry.revision != entry.saved_revision:
+            self.document_evicted.emit(chapter_id, entry.document.toPlainText())
+        entry.document.deleteLater()
+    
+    def _evict_documents(self):
+        """按章节数和总字数限制淘汰最久未使用的文档（当前文档除外）"""
+        total = sum(entry.document.characterCount() for entry in self._documents.values())
+        while len(self._documents) > 1 and (len(self._documents) > self.document_cache_size
+                                           or total > self.document_cache_chars):
+            chapter_id, entry = next(iter(self._documents.items()))
+            if entry is self._current:
+                break
+            total -= entry.document.characterCount()
+            self._drop_document(chapter_id, flush=True)
+    
+    def _load_text(self, content: str):
+        """载入文本，载入本身不算作修改
+        
+        大文档模式下超过分块大小时先显示第一块，其余部分在事件循环空闲时逐块追加，
+        载入期间编辑器只读。
+        """
+        self._load_generation += 1
+        self.revision += 1
+        self.mark_saved(self.revision)
+        
+        self._loading = True
+        if self.editor is self.rich_editor or len(content) <= self.load_chunk_size:
+            try:
+                self.editor.setPlainText(content)
+            finally:
+                self._finish_loading()
+            return
+        
+        end = self._chunk_end(content, 0)
+        self.editor.document().setUndoRedoEnabled(False)
+        self.editor.setPlainText(content[:end])
+        self.editor.setReadOnly(True)
+        self.progress_bar.setRange(0, len(content))
+        self.progress_bar.setValue(end)
+        self.progress_bar.show()
+        generation = self._load_generation
+        QTimer.singleShot(0, lambda: self._load_next_chunk(generation, content, end))
+    
+    def _chunk_end(self, content: str, start: int) -> int:
+        """分块的结束位置，尽量在换行处分块"""
+        end = start + self.load_chunk_size
+        if end >= len(content):
+            return len(content)
+        newline = content.rfind("\n", start, end)
+        return newline + 1 if newline > start else end
+    
+    def _load_next_chunk(self, generation: int, content: str, start: int):
+        """追加下一块内容
+        
+        Args:
+            generation: 发起载入时的载入序号，已开始新的载入时放弃
+            content: 完整内容
+            start: 本块的开始位置
+        """
+        if generation != self._load_generation:
+            return
+        end = self._chunk_end(content, start)
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(content[start:end])
+        self.progress_bar.setValue(end)
+        if end < len(content):
+            QTimer.singleShot(0, lambda: self._load_next_chunk(generation, content, end))
+        else:
+            self._finish_loading()
+    
+    def _finish_loading(self):
+        """结束载入"""
+        self._loading = False
+        self.editor.setReadOnly(False)
+        self.editor.document().setUndoRedoEnabled(True)
+        self.progress_bar.hide()
         if self.current_chapter_id:
-            content = self.editor.toPlainText()
-            self.content_changed.emit(content)
+            self.generate_btn.setEnabled(True)
+            self.generate_new_btn.setEnabled(True)
+    
+    @property
+    def is_loading(self) -> bool:
+        """是否正在分块载入章节"""
+        return self._loading
+    
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        """记录一次内容变化
+        
+        Args:
+            position: 变化开始的位置
+            removed: 删除的字符数
+            added: 插入的字符数
+        """
+        if self._loading or self.sender() is not self.editor.document():
+            return
+        self.revision += 1
+        
+        # 与变化区间重叠或相邻的区间合并，之后的区间按长度变化平移
+        delta = added - removed
+        removed_end = position + removed
+        merged_start, merged_end = position, position + added
+        before, after = [], []
+        for start, end in self._dirty_ranges:
+            if end < position:
+                before.append((start, end))
+            elif start > removed_end:
+                after.append((start + delta, end + delta))
+            else:
+                merged_start = min(merged_start, start)
+                merged_end = max(merged_end, end + delta)
+        ranges = before + [(merged_start, merged_end)] + after
+        if len(ranges) > self.MAX_DIRTY_RANGES:
+            ranges = [(ranges[0][0], ranges[-1][1])]
+        self._dirty_ranges = ranges
+        
+        if self.current_chapter_id:
+            self.content_changed.emit(self.revision)
+    
+    @property
+    def is_dirty(self) -> bool:
+        """是否有未保存的修改"""
+        return self.revision != self._saved_revision
+    
+    def dirty_ranges(self) -> List[Tuple[int, int]]:
+        """上次保存后修改过的区间
+        
+        Returns:
+            按位置排序、互不重叠的 (开始, 结束) 区间列表，位置为当前文档中的字符位置
+        """
+        return list(self._dirty_ranges)
+    
+    def mark_saved(self, revision: int):
+        """标记内容已保存到指定修订号
+        
+        Args:
+            revision: 保存时取内容对应的修订号（保存期间又有修改时保留修改区间）
+        """
+        self._saved_revision = revision
+        if revision == self.revision:
+            self._dirty_ranges = []
+    
+    def memory_usage(self):
+        """缓存文档的 (文档数, 估算字节数)，供内存分析使用（按UTF-16估算文本本身，不含排版和撤销栈）"""
+        return len(self._documents), sum(entry.document.characterCount() * 2
+                                         for entry in self._documents.values())
     
     def get_content(self) -> str:
-        """获取编辑器内容"""
+        """获取编辑器内容（复制全文，只在保存等确实需要时调用）"""
         return self.editor.toPlainText()
     
+    def get_text_before_cursor(self) -> str:
+        """获取光标之前的内容"""
+        cursor = self.editor.textCursor()
+        cursor.setPosition(cursor.position())
+        cursor.movePosition(QTextCursor.MoveOperation.Start, QTextCursor.MoveMode.KeepAnchor)
+        # 选中文本以 U+2029 分隔段落
+        return cursor.selectedText().replace("\u2029", "\n")
+    
     def set_content(self, content: str):
         """设置编辑器内容"""
-        self.editor.setPlainText(content)
+        self._load_text(content)
     
     def clear_content(self):
-        """清空编辑器内容"""
-        self.editor.clear()
+        """清空编辑器内容（当前章节的文档保留在缓存中）"""
+        self._deactivate()
+        self._load_text("")
         self.current_chapter_id = None
+        self._emit_text_stats()
         self.generate_btn.setEnabled(False)  # 禁用续写按钮
         self.generate_new_btn.setEnabled(False)  # 禁用生成按钮
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+全局查找替换对话框
+在后台线程中统计和替换整个项目的章节内容，界面保持响应
+"""
+
+import re
+from typing import Optional
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
+                           QLineEdit, QCheckBox, QPushButton, QListWidget,
+                           QProgressBar, QLabel, QMessageBox)
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from core.find_replace import FindReplaceEngine
+
+class FindReplaceWorker(QThread):
+    """查找替换工作线程"""
+    
+    # 定义信号
+    progress = pyqtSignal(int, int)   # 进度信号，参数为已处理章节数和章节总数
+    preview_ready = pyqtSignal(dict)  # 预览完成信号，参数为 {chapter_id: (标题, 匹配数)}
+    applied = pyqtSignal(str, int)    # 替换完成信号，参数为批次ID和替换处数
+    undone = pyqtSignal(int, list)    # 撤销完成信号，参数为恢复的章节数和跳过的章节标题列表
+    failed = pyqtSignal(str)          # 失败信号，参数为错误信息
+    
+    def __init__(self, db_path: str, project_id: int, pattern, replacement: str = "",
+                 use_regex: bool = False, apply: bool = False,
+                 undo_batch_id: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.project_id = project_id
+        self.pattern = pattern
+        self.replacement = replacement
+        self.use_regex = use_regex
+        self.apply = apply
+        self.undo_batch_id = undo_batch_id
+    
+    def run(self):
+        """在工作线程中执行统计、替换或撤销（中断时替换和撤销整体回滚）"""
+        # 工作线程使用独立的数据库连接
+        engine = FindReplaceEngine(self.db_path)
+        try:
+            if self.undo_batch_id:
+                result = engine.undo(self.undo_batch_id, progress=self.progress.emit,
+                                     is_cancelled=self.isInterruptionRequested)
+                if result:
+                    self.undone.emit(*result)
+                elif not self.isInterruptionRequested():
+                    self.failed.emit("撤销替换失败")
+            elif self.apply:
+                result = engine.apply(self.project_id, self.pattern, self.replacement,
+                                      self.use_regex, progress=self.progress.emit,
+                                      is_cancelled=self.isInterruptionRequested)
+                if result:
+                    self.applied.emit(*result)
+                elif not self.isInterruptionRequested():
+                    self.failed.emit("替换失败，请查看日志了解详细信息")
+            else:
+                matches = engine.preview(self.project_id, self.pattern,
+                                         progress=self.progress.emit,
+                                         is_cancelled=self.isInterruptionRequested)
+                self.preview_ready.emit(matches)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class FindReplaceDialog(QDialog):
+    """全局查找替换对话框"""
+    
+    # 定义信号
+    chapters_changed = pyqtSignal()  # 章节内容被批量修改（替换或撤销）时发出
+    
+    def __init__(self, db_path: str, project_id: int, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.project_id = project_id
+        self.worker = None
+        self.last_batch_id = None
+        self.preview_total = 0
+        self.setWindowTitle("全局查找替换")
+        self.setMinimumSize(500, 400)
+        
+        self._init_ui()
+    
+    def _init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        
+        form = QFormLayout()
+        self.find_edit = QLineEdit()
+        form.addRow("查找:", self.find_edit)
+        self.replace_edit = QLineEdit()
+        form.addRow("替换为:", self.replace_edit)
+        layout.addLayout(form)
+        
+        option_layout = QHBoxLayout()
+        self.regex_check = QCheckBox("正则表达式")
+        option_layout.addWidget(self.regex_check)
+        self.case_check = QCheckBox("区分大小写")
+        self.case_check.setChecked(True)
+        option_layout.addWidget(self.case_check)
+        option_layout.addStretch()
+        layout.addLayout(option_layout)
+        
+        # 预览结果
+        self.summary_label = QLabel("")
+        layout.addWidget(self.summary_label)
+        self.result_list = QListWidget()
+        layout.addWidget(self.result_list)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+        
+        # 按钮区域
+        btn_layout = QHBoxLayout()
+        self.preview_btn = QPushButton("预览")
+        self.preview_btn.clicked.connect(self._on_preview)
+        btn_layout.addWidget(self.preview_btn)
+        self.apply_btn = QPushButton("全部替换")
+        self.apply_btn.clicked.connect(self._on_apply)
+        self.apply_btn.setEnabled(False)
+        btn_layout.addWidget(self.apply_btn)
+        self.undo_btn = QPushButton("撤销替换")
+        self.undo_btn.clicked.connect(self._on_undo)
+        self.undo_btn.setEnabled(False)
+        btn_layout.addWidget(self.undo_btn)
+        btn_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        
+        # 查找条件变化后需要重新预览
+        self.find_edit.textChanged.connect(lambda: self.apply_btn.setEnabled(False))
+        self.regex_check.toggled.connect(lambda: self.apply_btn.setEnabled(False))
+        self.case_check.toggled.connect(lambda: self.apply_btn.setEnabled(False))
+    
+    def _compile_pattern(self):
+        """根据当前输入编译查找模式，无效时提示并返回None"""
+        find_text = self.find_edit.text()
+        if not find_text:
+            return None
+        try:
+            return FindReplaceEngine.compile_pattern(
+                find_text, self.regex_check.isChecked(), self.case_check.isChecked()
+            )
+        except re.error as e:
+            QMessageBox.warning(self, "错误", f"正则表达式无效：{e}")
+            return None
+    
+    def _start_worker(self, worker: FindReplaceWorker):
+        """启动工作线程并切换到忙碌状态"""
+        self.worker = worker
+        worker.progress.connect(self._on_progress)
+        worker.failed.connect(self._on_failed)
+        worker.finished.connect(self._on_worker_finished)
+        self._set_busy(True)
+        worker.start()
+    
+    def _set_busy(self, busy: bool):
+        """切换忙碌状态"""
+        self.preview_btn.setEnabled(not busy)
+        self.apply_btn.setEnabled(False)
+        self.undo_btn.setEnabled(not busy and self.last_batch_id is not None)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(busy)
+    
+    def _on_preview(self):
+        """统计匹配数"""
+        pattern = self._compile_pattern()
+        if pattern is None:
+            return
+        self.result_list.clear()
+        self.summary_label.setText("正在统计...")
+        worker = FindReplaceWorker(self.db_path, self.project_id, pattern, parent=self)
+        worker.preview_ready.connect(self._on_preview_ready)
+        self._start_worker(worker)
+    
+    def _on_apply(self):
+        """执行全部替换"""
+        pattern = self._compile_pattern()
+        if pattern is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            "确认替换",
+            f"确定要在整个项目中替换{self.summary_label.text()}吗？\n替换后可以撤销。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        worker = FindReplaceWorker(
+            self.db_path, self.project_id, pattern, self.replace_edit.text(),
+            use_regex=self.regex_check.isChecked(), apply=True, parent=self
+        )
+        worker.applied.connect(self._on_applied)
+        self._start_worker(worker)
+    
+    def _on_undo(self):
+        """撤销上一次替换"""
+        if not self.last_batch_id:
+            return
+        self.summary_label.setText("正在撤销...")
+        worker = FindReplaceWorker(self.db_path, self.project_id, None,
+                                   undo_batch_id=self.last_batch_id, parent=self)
+        worker.undone.connect(self._on_undone)
+        self._start_worker(worker)
+    
+    def _on_undone(self, restored: int, skipped: list):
+        """撤销完成"""
+        self.last_batch_id = None
+        self.summary_label.setText(f"已撤销替换，恢复{restored}个章节")
+        self.chapters_changed.emit()
+        if skipped:
+            QMessageBox.information(
+                self, "部分章节未恢复",
+                "以下章节在替换后又被修改过，为避免覆盖修改没有恢复：\n" + "\n".join(skipped[:20])
+                + (f"\n……共{len(skipped)}个章节" if len(skipped) > 20 else "")
+            )
+    
+    def _on_progress(self, done: int, total: int):
+        """更新进度条"""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+    
+    def _on_preview_ready(self, matches: dict):
+        """显示预览结果"""
+        total = sum(count for _, count in matches.values())
+        for title, count in matches.values():
+            self.result_list.addItem(f"{title}（{count}处）")
+        self.summary_label.setText(f"{len(matches)}个章节中的{total}处匹配")
+        self.preview_total = total
+    
+    def _on_applied(self, batch_id: str, count: int):
+        """替换完成"""
+        self.last_batch_id = batch_id
+        self.result_list.clear()
+        self.summary_label.setText(f"已替换{count}处")
+        self.preview_total = 0
+        self.chapters_changed.emit()
+    
+    def _on_failed(self, message: str):
+        """处理工作线程错误"""
+        QMessageBox.warning(self, "错误", message)
+    
+    def _on_worker_finished(self):
+        """工作线程结束"""
+        self.worker = None
+        self._set_busy(False)
+        self.apply_btn.setEnabled(self.preview_total > 0)
+    
+    def done(self, result: int):
+        """关闭对话框前停止工作线程"""
+        if self.worker and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.worker.wait()
+        super().done(result)
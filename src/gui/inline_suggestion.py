@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+行内续写建议组件
+停止输入片刻后按光标前的内容请求一小段续写，以灰色文字显示在光标后，按 Tab 采用
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QObject, QEvent, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+from utils.config import get_config_section
+from utils.memory import memory_profiler, text_size
+
+class SuggestionCache:
+    """行内建议的前缀缓存
+    
+    键为 (章节ID, 请求时光标前最后 KEY_CHARS 个字)，值为得到的建议。
+    用户照着建议继续输入时，光标前的文本等于请求时的上下文加上建议的开头，
+    因此查找时依次去掉末尾的 0 到 len(最长建议) 个字作为键，命中且去掉的部分
+    正是该建议的开头时，返回建议的剩余部分，不需要再次请求。
+    """
+    
+    KEY_CHARS = 200
+    
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Optional[int], str], str]" = OrderedDict()
+        self._max_length = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def put(self, chapter_id: Optional[int], context: str, suggestion: str):
+        """记录一个位置得到的建议"""
+        key = (chapter_id, context[-self.KEY_CHARS:])
+        self._entries[key] = suggestion
+        self._entries.move_to_end(key)
+        self._max_length = max(self._max_length, len(suggestion))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def lookup(self, chapter_id: Optional[int], context: str) -> Optional[str]:
+        """查找当前位置可以继续使用的建议
+        
+        Args:
+            chapter_id: 章节ID
+            context: 光标前的文本
+        
+        Returns:
+            建议中尚未输入的部分，没有可用的建议时返回None
+        """
+        for typed_length in range(min(self._max_length, len(context)) + 1):
+            end = len(context) - typed_length
+            key = (chapter_id, context[max(0, end - self.KEY_CHARS):end])
+            suggestion = self._entries.get(key)
+            if suggestion is None or len(suggestion) <= typed_length:
+                continue
+            if suggestion.startswith(context[end:]):
+                self._entries.move_to_end(key)
+                return suggestion[typed_length:]
+        return None
+    
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self._max_length = 0
+    
+    def memory_usage(self) -> Tuple[int, int]:
+        """缓存的 (条目数, 估算字节数)，供内存分析使用"""
+        return len(self._entries), (sys.getsizeof(self._entries)
+                                    + text_size(key for _, key in self._entries)
+                                    + text_size(self._entries.values()))
+
+class InlineSuggestion(QObject):
+    """编辑器的行内续写建议
+    
+    每次输入后重新开始计时，停止输入 delay_ms 后发出 requested 信号，由主窗口在后台请求，
+    结果通过 show_result() 返回。之后的任何按键都会发出 cancelled 信号取消进行中的请求；
+    请求返回时光标已移动或内容已改变的结果只写入缓存，不显示。
+    只在光标位于段落末尾时给出建议，以便灰色文字紧接在光标之后显示。
+    """
+    
+    # 定义信号
+    requested = pyqtSignal(int, str)  # 请求建议，参数为请求ID和光标前的上下文
+    cancelled = pyqtSignal()          # 取消进行中的请求
+    
+    def __init__(self, editor):
+        """初始化
+        
+        Args:
+            editor: 所属的 Editor 组件
+        """
+        super().__init__(editor)
+        self._editor = editor
+        config = get_config_section('gui').get('inline_suggestion') or {}
+        self.enabled = config.get('enabled', False)
+        self.context_chars = config.get('context_chars', 1000)
+        self.max_tokens = config.get('max_tokens', 64)
+        self.cache = SuggestionCache(config.get('cache_size', 64))
+        memory_profiler.register_cache("行内建议缓存", self.cache, SuggestionCache.memory_usage)
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(config.get('delay_ms', 600))
+        self._timer.timeout.connect(self._request)
+        
+        self._request_id = 0
+        self._pending = None  # 进行中的请求: (请求ID, 章节ID, 文档, 光标位置, 修订号, 上下文)
+        self._suggestion = ""  # 正在显示的建议
+        self._anchor = None  # 建议显示的位置: (文档, 光标位置)
+        
+        self._label = QLabel()
+        self._label.setWordWrap(True)
+        self._label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self._label.hide()
+        
+        for widget in (editor.rich_editor, editor.plain_editor):
+            widget.installEventFilter(self)
+            widget.cursorPositionChanged.connect(self._on_cursor_moved)
+            widget.verticalScrollBar().valueChanged.connect(self.dismiss)
+        editor.content_changed.connect(self._on_edited)
+    
+    @property
+    def suggestion(self) -> str:
+        """正在显示的建议（没有时为空字符串）"""
+        return self._suggestion
+    
+    def set_enabled(self, enabled: bool):
+        """开启或关闭行内建议"""
+        self.enabled = enabled
+        if not enabled:
+            self._cancel()
+            self.dismiss()
+    
+    def dismiss(self):
+        """隐藏正在显示的建议"""
+        self._suggestion = ""
+        self._anchor = None
+        self._label.hide()
+    
+    def _cancel(self):
+        """停止计时并取消进行中的请求"""
+        self._timer.stop()
+        if self._pending is not None:
+            self._pending = None
+            self.cancelled.emit()
+    
+    def _context(self, cursor: QTextCursor) -> str:
+        """光标前最多 context_chars 个字"""
+        position = cursor.position()
+        selection = QTextCursor(cursor.document())
+        selection.setPosition(max(0, position - self.context_chars))
+        selection.setPosition(position, QTextCursor.MoveMode.KeepAnchor)
+        # 选中文本以 U+2029 分隔段落
+        return selection.selectedText().replace("\u2029", "\n")
+    
+    def _can_suggest(self, cursor: QTextCursor) -> bool:
+        """当前状态是否可以给出建议"""
+        editor = self._editor
+        return (self.enabled and editor.current_chapter_id is not None
+                and not editor.is_loading and not editor.is_streaming
+                and not editor.editor.isReadOnly()
+                and not cursor.hasSelection() and cursor.atBlockEnd())
+    
+    def _on_edited(self, revision: int):
+        """内容变化后先查缓存，未命中时重新开始计时"""
+        self.dismiss()
+        self._cancel()
+        cursor = self._editor.editor.textCursor()
+        if not self._can_suggest(cursor):
+            return
+        suggestion = self.cache.lookup(self._editor.current_chapter_id, self._context(cursor))
+        if suggestion:
+            self._show(suggestion, cursor)
+        else:
+            self._timer.start()
+    
+    def _on_cursor_moved(self):
+        """光标离开建议的位置时隐藏建议"""
+        if self._anchor is None:
+            return
+        cursor = self._editor.editor.textCursor()
+        if (cursor.document(), cursor.position()) != self._anchor or cursor.hasSelection():
+            self.dismiss()
+    
+    def _request(self):
+        """停止输入后发出请求"""
+        cursor = self._editor.editor.textCursor()
+        if not self._can_suggest(cursor):
+            return
+        context = self._context(cursor)
+        if not context.strip():
+            return
+        chapter_id = self._editor.current_chapter_id
+        suggestion = self.cache.lookup(chapter_id, context)
+        if suggestion:
+            self._show(suggestion, cursor)
+            return
+        self._request_id += 1
+        self._pending = (self._request_id, chapter_id, cursor.document(),
+                         cursor.position(), self._editor.revision, context)
+        self.requested.emit(self._request_id, context)
+    
+    def show_result(self, request_id: int, text: str):
+        """接收请求结果
+        
+        Args:
+            request_id: requested 信号中的请求ID
+            text: 生成的续写（失败或取消时为空字符串）
+        """
+        if self._pending is None or self._pending[0] != request_id:
+            return
+        _, chapter_id, document, position, revision, context = self._pending
+        self._pending = None
+        text = self._clean(text)
+        if not text:
+            return
+        self.cache.put(chapter_id, context, text)
+        cursor = self._editor.editor.textCursor()
+        if (cursor.document() is document and cursor.position() == position
+                and self._editor.revision == revision and self._can_suggest(cursor)):
+            self._show(text, cursor)
+    
+    @staticmethod
+    def _clean(text: str) -> str:
+        """只保留建议的第一段，去掉末尾空白"""
+        text = (text or "").rstrip()
+        start = len(text) - len(text.lstrip("\n"))
+        end = text.find("\n", start)
+        return text if end < 0 else text[:end].rstrip()
+    
+    def _show(self, suggestion: str, cursor: QTextCursor):
+        """在光标后显示建议"""
+        widget = self._editor.editor
+        viewport = widget.viewport()
+        if self._label.parent() is not viewport:
+            self._label.setParent(viewport)
+        rect = widget.cursorRect(cursor)
+        left = rect.right() + 1
+        self._label.setFont(widget.font())
+        self._label.setStyleSheet(f"color: {widget.palette().placeholderText().color().name()};")
+        self._label.setText(suggestion)
+        self._label.setFixedWidth(max(viewport.width() - left, 50))
+        self._label.adjustSize()
+        self._label.move(left, rect.top())
+        self._label.show()
+        self._suggestion = suggestion
+        self._anchor = (cursor.document(), cursor.position())
+    
+    def accept(self) -> bool:
+        """采用正在显示的建议
+        
+        Returns:
+            是否有建议被采用
+        """
+        suggestion = self._suggestion
+        if not suggestion:
+            return False
+        self.dismiss()
+        self._editor.editor.textCursor().insertText(suggestion)
+        return True
+    
+    def eventFilter(self, watched, event) -> bool:
+        """Tab 采用建议，Esc 隐藏建议，其他按键取消进行中的请求"""
+        if event.type() == QEvent.Type.KeyPress and watched is self._editor.editor:
+            if self._suggestion and event.key() == Qt.Key.Key_Tab and not event.modifiers():
+                return self.accept()
+            if self._suggestion and event.key() == Qt.Key.Key_Escape:
+                self.dismiss()
+                return True
+            self._cancel()
+        return super().eventFilter(watched, event)
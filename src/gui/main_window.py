@@ -11,68 +11,131 @@
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, 
                            QVBoxLayout, QMenuBar, QMenu, QToolBar, 
-                           QStatusBar, QMessageBox, QInputDialog)
-from PyQt6.QtCore import Qt, QSize
+                           QStatusBar, QMessageBox, QInputDialog, QSplitter, QLabel)
+from PyQt6.QtCore import Qt, QSize, QTimer, QByteArray, QThread, pyqtSignal
 from PyQt6.QtGui import QAction, QIcon
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QProcess
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import TYPE_CHECKING, Tuple
 
 from database.operations import DatabaseManager
-from database.migrations import DatabaseMigration
-from .settings_dialog import SettingsDialog
+from utils.config import get_config_section
+from utils.logger import logger
+from utils.perf import timed
 from .project_list import ProjectList
 from .chapter_list import ChapterList
 from .editor import Editor
-from ai_services.deepseek import DeepSeekAIService
-from ai_services.prompt import PromptTemplate
+from .session_snapshot import SessionSnapshot
+from utils.memory import memory_profiler
+
+# 对话框、AI服务（requests）和数据库迁移在首次使用时才导入，不计入启动时间
+if TYPE_CHECKING:
+    from ai_services.deepseek import DeepSeekAIService
+    from ai_services.conversation import ConversationSession
+
+# 关闭窗口时未能及时结束的请求线程，保留引用直到线程结束
+_detached_workers = set()
 
 class MainWindow(QMainWindow):
     """主窗口类"""
     
+    # 定义信号
+    ai_request_logged = pyqtSignal(dict)  # AI调用记录，由AI服务在请求线程中发出，转到界面线程保存
+    
+    # 关闭窗口时等待每个AI请求线程结束的最长时间（毫秒）
+    WORKER_EXIT_TIMEOUT_MS = 2000
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("AI写作助手")
         self.setMinimumSize(1200, 800)
         
-        # 初始化数据库
+        # AI多轮对话会话（同一章节、同一上下文的请求复用，以命中服务端前缀缓存）
+        self._ai_service = None
+        self._ai_session = None
+        self._ai_session_key = None
+        self._ai_operation = None  # 当前AI调用的类型，写入调用记录
+        self._ai_worker = None  # 正在进行的流式请求
+        self._ai_buffer = None
+        self._suggestion_worker = None  # 进行中的行内建议请求
+        self._stream_fps = get_config_section('ai_dialog').get('stream_fps', 30)
+        
+        # 自动保存：停止输入一段时间后才取出全文写入数据库
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setSingleShot(True)
+        self._autosave_timer.setInterval(get_config_section('gui').get('autosave_delay_ms', 1000))
+        self._autosave_timer.timeout.connect(self._flush_autosave)
+        
+        # 工作区快照：存在时先按快照显示上次的工作区，窗口显示后再与数据库核对
+        snapshot_config = get_config_section('gui').get('session_snapshot') or {}
+        self._session_snapshot = SessionSnapshot() if snapshot_config.get('enabled', True) else None
+        self._snapshot_content_chars = snapshot_config.get('max_content_chars', 200000)
+        snapshot = self._session_snapshot.load() if self._session_snapshot else None
+        self._pending_snapshot = snapshot
+        
+        # 初始化数据库（从快照启动时，对话历史的清理推迟到核对时进行）
         self._init_database()
+        if snapshot is None:
+            self._apply_dialog_retention()
         
         # 初始化UI组件
-        self._init_ui()
+        self._init_ui(load_projects=snapshot is None)
         
         # 连接信号
         self._connect_signals()
         
         # 加载初始数据
-        self._load_initial_data()
+        if snapshot is None:
+            self._load_initial_data()
+        else:
+            self._restore_snapshot(snapshot)
+        
+        # 定时保存快照，异常退出时也能恢复到较近的工作区
+        if self._session_snapshot is not None:
+            self._snapshot_timer = QTimer(self)
+            self._snapshot_timer.setInterval(snapshot_config.get('interval_ms', 60000))
+            self._snapshot_timer.timeout.connect(self._save_snapshot)
+            self._snapshot_timer.start()
     
+    @timed("gui.main_window.init_database")
     def _init_database(self):
         """初始化数据库"""
         # 执行数据库迁移
+        from database.migrations import DatabaseMigration
         migration = DatabaseMigration()
         migration.migrate()
         
         # 创建数据库管理器实例
         self.db = DatabaseManager()
     
+    def _apply_dialog_retention(self):
+        """按保留策略清理旧的AI对话历史"""
+        retention = get_config_section('ai_dialog').get('retention', {})
+        self.db.apply_dialog_retention(
+            max_messages=retention.get('max_messages', 0),
+            max_age_days=retention.get('max_age_days', 0),
+            archive=retention.get('archive', True)
+        )
+    
+    @timed("gui.main_window.load_initial_data")
     def _load_initial_data(self):
-        """加载初始数据"""
+        """加载初始数据（项目列表在创建时已加载）"""
         # 加载设置
         settings = self.db.get_settings()
         if settings and settings.last_project_id:
             # 加载上次打开的项目
             self.project_list.select_project(settings.last_project_id)
-        
-        # 加载项目列表
-        projects = self.db.get_all_projects()
-        for project in projects:
-            self.project_list.add_project(project.id, project.name)
     
-    def _init_ui(self):
-        """初始化UI组件"""
+    @timed("gui.main_window.init_ui")
+    def _init_ui(self, load_projects: bool = True):
+        """初始化UI组件
+        
+        Args:
+            load_projects: 是否立即从数据库加载项目列表（从快照启动时为False）
+        """
         # 创建中央窗口部件
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -83,19 +146,22 @@ class MainWindow(QMainWindow):
         main_layout.setContentsMargins(0, 0, 0, 0)
         
         # 创建三个主要组件
-        self.project_list = ProjectList()
+        self.project_list = ProjectList(load=load_projects)
         self.chapter_list = ChapterList()
         self.editor = Editor()
         
-        # 添加到主布局
-        main_layout.addWidget(self.project_list)
-        main_layout.addWidget(self.chapter_list)
-        main_layout.addWidget(self.editor)
+        # 三个面板放在分隔器中，可以拖动调整宽度（宽度保存在工作区快照中）
+        self.splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.splitter.setChildrenCollapsible(False)
+        self.splitter.addWidget(self.project_list)
+        self.splitter.addWidget(self.chapter_list)
+        self.splitter.addWidget(self.editor)
+        main_layout.addWidget(self.splitter)
         
-        # 设置布局的伸缩因子
-        main_layout.setStretch(0, 1)  # 项目列表
-        main_layout.setStretch(1, 2)  # 章节列表
-        main_layout.setStretch(2, 7)  # 编辑区域
+        # 设置面板的伸缩因子
+        self.splitter.setStretchFactor(0, 1)  # 项目列表
+        self.splitter.setStretchFactor(1, 2)  # 章节列表
+        self.splitter.setStretchFactor(2, 7)  # 编辑区域
         
         # 创建菜单栏
         self._create_menu_bar()
@@ -129,6 +195,11 @@ class MainWindow(QMainWindow):
         
         # 编辑菜单
         edit_menu = menubar.addMenu("编辑")
+        find_replace_action = QAction("全局查找替换", self)
+        find_replace_action.setShortcut("Ctrl+Shift+H")
+        find_replace_action.setStatusTip("在当前项目的所有章节中查找替换")
+        find_replace_action.triggered.connect(self._show_find_replace_dialog)
+        edit_menu.addAction(find_replace_action)
         
         # 视图菜单
         view_menu = menubar.addMenu("视图")
@@ -141,6 +212,17 @@ class MainWindow(QMainWindow):
         ai_settings_action.triggered.connect(self._show_settings_dialog)
         settings_menu.addAction(ai_settings_action)
         
+        # 诊断菜单
+        diagnostics_menu = menubar.addMenu("诊断")
+        perf_action = QAction("性能统计", self)
+        perf_action.setStatusTip("查看热点操作的耗时分布")
+        perf_action.triggered.connect(self._show_diagnostics_dialog)
+        diagnostics_menu.addAction(perf_action)
+        ai_stats_action = QAction("AI调用统计", self)
+        ai_stats_action.setStatusTip("查看AI调用的用量、耗时和费用")
+        ai_stats_action.triggered.connect(self._show_ai_stats_dialog)
+        diagnostics_menu.addAction(ai_stats_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu("帮助")
         about_action = QAction("关于", self)
@@ -178,6 +260,13 @@ class MainWindow(QMainWindow):
         status_bar = QStatusBar()
         self.setStatusBar(status_bar)
         status_bar.showMessage("就绪")
+        
+        # 当前章节的文本统计（常驻在状态栏右侧，不会被临时消息覆盖）
+        stats_config = get_config_section('gui').get('text_stats') or {}
+        self._reading_speed = (stats_config.get('chars_per_minute', 400),
+                               stats_config.get('words_per_minute', 200))
+        self.stats_label = QLabel()
+        status_bar.addPermanentWidget(self.stats_label)
     
     def _connect_signals(self):
         """连接信号"""
@@ -192,17 +281,56 @@ class MainWindow(QMainWindow):
         self.chapter_list.chapter_created.connect(self._on_chapter_created)
         self.chapter_list.chapter_deleted.connect(self._on_chapter_deleted)
         self.chapter_list.chapter_renamed.connect(self._on_chapter_renamed)
-        self.chapter_list.chapters_reordered.connect(self._on_chapters_reordered)
+        self.chapter_list.chapter_moved.connect(self._on_chapter_moved)
         
         # 编辑器信号
         self.editor.content_changed.connect(self._on_content_changed)
+        self.editor.document_evicted.connect(self._on_document_evicted)
+        self.editor.text_stats_changed.connect(self._on_text_stats_changed)
         self.editor.ai_request.connect(self._on_ai_request)
+        self.ai_request_logged.connect(self._record_ai_request)
+        self.editor.inline_suggestion.requested.connect(self._on_suggestion_requested)
+        self.editor.inline_suggestion.cancelled.connect(self._cancel_suggestion)
     
     def _show_settings_dialog(self):
         """显示设置对话框"""
+        from .settings_dialog import SettingsDialog
         dialog = SettingsDialog(self)
         dialog.exec()
     
+    def _show_find_replace_dialog(self):
+        """显示全局查找替换对话框"""
+        project_id = self.chapter_list.current_project_id
+        if not project_id:
+            self.statusBar().showMessage("请先选择项目", 3000)
+            return
+        # 批量替换直接修改数据库，先写入编辑器中未保存的修改
+        self._flush_autosave()
+        from .find_replace_dialog import FindReplaceDialog
+        dialog = FindReplaceDialog(self.db.db_path, project_id, self)
+        dialog.chapters_changed.connect(self._reload_current_chapter)
+        dialog.exec()
+    
+    def _reload_current_chapter(self):
+        """章节内容被批量修改后重新加载编辑器中的章节"""
+        chapter_id = self.editor.current_chapter_id
+        # 缓存的章节文档都可能已过期
+        self.editor.discard_documents()
+        if chapter_id:
+            self._on_chapter_selected(chapter_id)
+    
+    def _show_diagnostics_dialog(self):
+        """显示性能诊断对话框"""
+        from .diagnostics_dialog import DiagnosticsDialog
+        dialog = DiagnosticsDialog(self)
+        dialog.exec()
+    
+    def _show_ai_stats_dialog(self):
+        """显示AI调用统计对话框"""
+        from .ai_stats_dialog import AIStatsDialog
+        dialog = AIStatsDialog(self.db, self)
+        dialog.exec()
+    
     def _show_about_dialog(self):
         """显示关于对话框"""
         QMessageBox.about(
@@ -215,14 +343,180 @@ class MainWindow(QMainWindow):
     
     def _save_current_chapter(self):
         """保存当前章节"""
+        if self.editor.is_loading:
+            self.statusBar().showMessage("章节正在载入，请稍后保存", 3000)
+            return
         if self.editor.current_chapter_id:
+            self._autosave_timer.stop()
+            revision = self.editor.revision
             content = self.editor.get_content()
             if self.db.update_chapter(self.editor.current_chapter_id, content=content):
+                self.editor.mark_saved(revision)
                 self.statusBar().showMessage("保存成功", 3000)
     
+    def _flush_autosave(self):
+        """将编辑器中未保存的修改写入数据库"""
+        self._autosave_timer.stop()
+        if not self.editor.current_chapter_id or not self.editor.is_dirty:
+            return
+        revision = self.editor.revision
+        if self.db.update_chapter(self.editor.current_chapter_id, content=self.editor.get_content()):
+            self.editor.mark_saved(revision)
+    
+    def _on_text_stats_changed(self, counts):
+        """在状态栏显示当前章节的字数、对话比例和阅读时间
+        
+        Args:
+            counts: 文本统计（TextCounts），统计中或没有打开章节时为None
+        """
+        if counts is None:
+            self.stats_label.clear()
+            self.stats_label.setToolTip("")
+            return
+        minutes = counts.reading_minutes(*self._reading_speed)
+        self.stats_label.setText(
+            f"字数 {counts.total_words}  对话 {counts.dialogue_ratio:.0%}  "
+            f"段落 {counts.paragraphs}  阅读约 {max(1, round(minutes)) if counts.total_words else 0} 分钟"
+        )
+        self.stats_label.setToolTip(
+            f"汉字 {counts.chinese}，英文单词 {counts.words}，标点 {counts.punctuation}\n"
+            f"对话 {counts.dialogue} 字，{counts.dialogue_lines} 段"
+        )
+    
+    def _on_document_evicted(self, chapter_id: int, content: str):
+        """保存被移出文档缓存的章节中未保存的修改"""
+        self.db.update_chapter(chapter_id, content=content)
+    
+    def closeEvent(self, event):
+        """关闭窗口前保存未保存的修改"""
+        # 等待后台的AI请求结束，避免线程对象随窗口销毁时仍在运行
+        # （AI请求线程都直接以主窗口为父对象，对话框中的线程由对话框自行处理）
+        # 取消时断开连接，线程很快结束；仍在等待响应头的请求最多等待 WORKER_EXIT_TIMEOUT_MS，不阻塞关闭
+        workers = self.findChildren(QThread, options=Qt.FindChildOption.FindDirectChildrenOnly)
+        for worker in workers:
+            if hasattr(worker, 'cancel'):
+                worker.cancel()
+            else:
+                worker.requestInterruption()
+        for worker in workers:
+            if not worker.wait(self.WORKER_EXIT_TIMEOUT_MS):
+                logger.warning(f"AI请求线程未能在{self.WORKER_EXIT_TIMEOUT_MS}ms内结束，不再等待")
+                # 线程对象随窗口销毁时若仍在运行会导致进程中止，这里改为无父对象，结束后自行释放
+                worker.setParent(None)
+                worker.finished.connect(worker.deleteLater)
+                _detached_workers.add(worker)
+                worker.finished.connect(lambda worker=worker: _detached_workers.discard(worker))
+        self._flush_autosave()
+        self._save_snapshot()
+        super().closeEvent(event)
+    
+    def showEvent(self, event):
+        """首次显示后与数据库核对按快照显示的工作区"""
+        super().showEvent(event)
+        if self._pending_snapshot is not None:
+            snapshot, self._pending_snapshot = self._pending_snapshot, None
+            QTimer.singleShot(0, lambda: self._reconcile_snapshot(snapshot))
+    
+    # 工作区快照
+    @timed("gui.main_window.restore_snapshot")
+    def _restore_snapshot(self, snapshot: dict):
+        """按快照显示上次的工作区（不访问数据库）"""
+        window = snapshot.get('window') or {}
+        if window.get('geometry'):
+            self.restoreGeometry(QByteArray.fromBase64(window['geometry'].encode()))
+        if window.get('splitter'):
+            self.splitter.setSizes(window['splitter'])
+        
+        self.project_list.model.set_projects(snapshot.get('projects') or [])
+        project = snapshot.get('project')
+        if not project or not self.project_list.select_project(project['id']):
+            return
+        self.chapter_list.set_project(project['id'], project['name'],
+                                      project.get('chapters') or [], project.get('total', 0))
+        
+        chapter = snapshot.get('chapter')
+        if chapter and chapter.get('content') is not None:
+            self.editor.set_chapter(chapter['id'], chapter['content'])
+            self.editor.restore_view_state(chapter['cursor'], chapter['scroll'])
+            self.chapter_list.select_chapter(chapter['id'])
+    
+    @timed("gui.main_window.reconcile_snapshot")
+    def _reconcile_snapshot(self, snapshot: dict):
+        """用数据库中的数据校正按快照显示的工作区
+        
+        项目列表和章节列表重新加载；快照中的章节正文与数据库不一致（或快照中没有正文）时
+        重新载入，保留光标位置。快照中的项目或章节已不存在时关闭它们。
+        """
+        self._apply_dialog_retention()
+        self.project_list.reload()
+        
+        project = snapshot.get('project')
+        project_id = project['id'] if project else None
+        if project_id is None or self.project_list.current_project_id != project_id:
+            # 快照中没有打开的项目，或用户已经切换到其他项目
+            return
+        name = self.project_list.model.name_of(project_id)
+        if name is None:
+            self.project_list.current_project_id = None
+            self.chapter_list.clear_chapters()
+            self.editor.discard_documents()
+            return
+        self.chapter_list.set_project(project_id, name)
+        
+        state = snapshot.get('chapter')
+        if not state:
+            return
+        chapter = self.db.get_chapter(state['id'])
+        if chapter is None or chapter.project_id != project_id:
+            self.editor.discard_documents([state['id']])
+            return
+        content = chapter.content or ""
+        if self.editor.current_chapter_id != chapter.id:
+            # 快照中没有保存正文（过长或有未保存的修改）
+            self.editor.set_chapter(chapter.id, content)
+            self.editor.restore_view_state(state['cursor'], state['scroll'])
+        elif not self.editor.is_dirty and self.editor.get_content() != content:
+            cursor, scroll = self.editor.view_state()
+            self.editor.set_chapter(chapter.id, content)
+            self.editor.restore_view_state(cursor, scroll)
+        self.chapter_list.select_chapter(chapter.id)
+    
+    def _save_snapshot(self):
+        """保存当前工作区的快照（不访问数据库）"""
+        if self._session_snapshot is None:
+            return
+        state = {
+            'window': {
+                'geometry': bytes(self.saveGeometry().toBase64()).decode(),
+                'splitter': self.splitter.sizes()
+            },
+            'projects': self.project_list.model.summaries()
+        }
+        project_id = self.chapter_list.current_project_id
+        name = self.project_list.model.name_of(project_id) if project_id else None
+        if name is not None:
+            model = self.chapter_list.model
+            state['project'] = {
+                'id': project_id,
+                'name': name,
+                'total': model.total,
+                'chapters': model.chapters[:model.page_size]
+            }
+            chapter_id = self.editor.current_chapter_id
+            if chapter_id and not self.editor.is_loading:
+                cursor, scroll = self.editor.view_state()
+                state['chapter'] = {'id': chapter_id, 'cursor': cursor, 'scroll': scroll}
+                # 只保存与数据库一致且不太长的正文，其余在启动后从数据库载入
+                if (not self.editor.is_dirty and
+                        self.editor.editor.document().characterCount() <= self._snapshot_content_chars):
+                    state['chapter']['content'] = self.editor.get_content()
+        self._session_snapshot.save(state)
+    
     # 项目相关的槽函数
+    @timed("gui.main_window.on_project_selected")
     def _on_project_selected(self, project_id: int):
         """处理项目选中事件"""
+        self._flush_autosave()
         project = self.db.get_project(project_id)
         if project:
             # 设置当前项目
@@ -241,11 +535,18 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"项目 '{project.name}' 创建成功", 3000)
     
     def _on_project_deleted(self, project_id: int):
-        """处理项目删除事件"""
-        if self.db.delete_project(project_id):
+        """处理项目删除事件（项目列表已从数据库删除项目）"""
+        self._flush_autosave()
+        if self.chapter_list.current_project_id == project_id:
             self.chapter_list.clear_chapters()
-            self.editor.clear_content()
-            self.statusBar().showMessage("项目删除成功", 3000)
+            self.editor.discard_documents()
+        else:
+            # 编辑器不记录文档所属的项目，保留当前章节，其余缓存的文档全部丢弃
+            # （被删除章节的ID可能被新章节重用）
+            current_id = self.editor.current_chapter_id
+            self.editor.discard_documents([chapter_id for chapter_id in self.editor.cached_chapter_ids()
+                                           if chapter_id != current_id])
+        self.statusBar().showMessage("项目删除成功", 3000)
     
     def _on_project_renamed(self, project_id: int, new_name: str):
         """处理项目重命名事件"""
@@ -253,8 +554,12 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"项目重命名为 '{new_name}'", 3000)
     
     # 章节相关的槽函数
+    @timed("gui.main_window.on_chapter_selected")
     def _on_chapter_selected(self, chapter_id: int):
         """处理章节选中事件"""
+        self._flush_autosave()
+        if self.editor.show_cached_chapter(chapter_id):
+            return
         chapter = self.db.get_chapter(chapter_id)
         if chapter:
             self.editor.set_chapter(chapter_id, chapter.content or "")
@@ -266,44 +571,90 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"章节 '{chapter.title}' 创建成功", 3000)
     
     def _on_chapter_deleted(self, chapter_id: int):
-        """处理章节删除事件"""
-        if self.db.delete_chapter(chapter_id):
-            self.editor.clear_content()
-            self.statusBar().showMessage("章节删除成功", 3000)
+        """处理章节删除事件（章节列表已从数据库删除章节）"""
+        # 丢弃该章节的文档；删除的是当前章节时编辑器被清空（未保存的修改随之放弃）
+        self.editor.discard_documents([chapter_id])
+        self.statusBar().showMessage("章节删除成功", 3000)
     
     def _on_chapter_renamed(self, chapter_id: int, new_name: str):
         """处理章节重命名事件"""
         if self.db.update_chapter(chapter_id, title=new_name):
             self.statusBar().showMessage(f"章节重命名为 '{new_name}'", 3000)
     
-    def _on_chapters_reordered(self):
-        """处理章节重新排序事件"""
-        # TODO: 实现章节重新排序的数据库操作
-        self.statusBar().showMessage("章节顺序已更新", 3000)
+    def _on_chapter_moved(self, chapter_id: int, row: int):
+        """处理章节移动事件（章节列表已更新数据库中的顺序）"""
+        self.statusBar().showMessage(f"章节已移动到第{row + 1}位", 3000)
     
     # 编辑器相关的槽函数
-    def _on_content_changed(self, content: str):
-        """处理内容变更事件"""
+    @timed("gui.main_window.on_content_changed")
+    def _on_content_changed(self, revision: int):
+        """处理内容变更事件（每次按键调用，只重新开始自动保存计时）"""
         if self.editor.current_chapter_id:
-            # 自动保存内容
-            self.db.update_chapter(self.editor.current_chapter_id, content=content)
+            self._autosave_timer.start()
     
     def _on_ai_request(self, request: dict):
-        """处理AI请求"""
+        """处理AI请求
+        
+        请求在工作线程中流式进行，收到的内容按帧率合并后同时显示在对话框和编辑器中。
+        """
         dialog = request.get("dialog")
         if not dialog:
             return
-            
-        # 调用AI服务生成内容
+        if self._ai_worker is not None:
+            dialog.handle_ai_response({"error": "上一次生成尚未结束，请稍后重试"})
+            return
+        
         try:
-            generated_content = self._generate_content(request)
-            dialog.handle_ai_response({"text": generated_content})
-            self.editor._insert_generated_content(generated_content)
+            session, prompt = self._prepare_ai_request(request)
         except Exception as e:
-            dialog.handle_ai_response({"error": str(e)})
+            dialog.handle_ai_response({"error": f"AI 内容生成失败：{str(e)}"})
+            return
+        
+        from .ai_stream import StreamRenderBuffer, AIStreamWorker
+        buffer = StreamRenderBuffer(self._stream_fps, self)
+        buffer.flushed.connect(dialog.append_stream)
+        buffer.flushed.connect(self._on_stream_flushed)
+        worker = AIStreamWorker(session, prompt, buffer, parent=self)
+        worker.completed.connect(lambda result: self._on_ai_completed(dialog, result))
+        # 关闭对话框时取消请求
+        dialog.finished.connect(worker.cancel)
+        self._ai_worker = worker
+        self._ai_buffer = buffer
+        
+        dialog.begin_stream()
+        self.editor.begin_stream_insert()
+        buffer.start()
+        worker.start()
+    
+    def _on_stream_flushed(self, reasoning: str, content: str):
+        """将一帧生成的正文插入编辑器"""
+        if content:
+            self.editor.append_stream_text(content)
+    
+    def _on_ai_completed(self, dialog, result: dict):
+        """处理流式请求结束"""
+        worker, self._ai_worker = self._ai_worker, None
+        buffer, self._ai_buffer = self._ai_buffer, None
+        # 先刷新剩余的增量，再显示最终结果
+        buffer.finish()
+        dialog.finished.disconnect(worker.cancel)
+        worker.wait()
+        worker.deleteLater()
+        buffer.deleteLater()
+        
+        if "error" in result:
+            self.editor.end_stream_insert(keep=False)
+            dialog.handle_ai_response({"error": f"AI 内容生成失败：{result['error']}"})
+            return
+        inserted = self.editor.end_stream_insert()
+        cache_hit = (result.get("usage") or {}).get("prompt_cache_hit_tokens")
+        if cache_hit:
+            self.statusBar().showMessage(f"提示词缓存命中 {cache_hit} tokens", 5000)
+        dialog.handle_ai_response({"text": result["text"], "inserted": inserted})
 
-    def _generate_content(self, request: dict) -> str:
-        """生成AI内容
+    @timed("gui.main_window.prepare_ai_request")
+    def _prepare_ai_request(self, request: dict) -> Tuple["ConversationSession", str]:
+        """准备AI请求的会话和本轮提示词
         
         Args:
             request: 请求参数字典，包含：
@@ -311,23 +662,21 @@ class MainWindow(QMainWindow):
                 - prompt: 提示词
                 - word_count: 生成字数
                 - context: 上下文内容（续写时使用）
+                - history: 当前章节最近的对话消息列表（可选）
                 
         Returns:
-            生成的内容
+            (对话会话, 本轮提示词)
         """
+        from ai_services.prompt import PromptTemplate
+        
         # 获取 API 设置
         settings = self.db.get_settings()
         if not settings or not settings.api_key:
             raise ValueError("请先在设置中配置 API 密钥")
 
-        # 创建 AI 服务实例
-        ai_service = DeepSeekAIService(
-            api_key=settings.api_key,
-            model="Pro/deepseek-ai/DeepSeek-R1",
-            api_url="https://api.siliconflow.cn/v1/chat/completions"
-        )
-        
-        # 准备提示词
+        # 准备本轮提示词：有章节上下文时已作为会话前缀发送，这里只引用；
+        # 没有上下文时会话中也没有上下文消息，不能引用
+        context = request.get("context", "")
         if request["type"] == "generate":
             # 使用生成内容的提示词模板
             prompt = PromptTemplate.get_generation_prompt(
@@ -339,24 +688,116 @@ class MainWindow(QMainWindow):
         else:
             # 使用续写的提示词模板
             prompt = PromptTemplate.get_continuation_prompt(
-                context=request.get("context", ""),
+                context=PromptTemplate.CONTEXT_REFERENCE if context else context,
                 custom_template=settings.continuation_template,
                 min_words=request["word_count"],
                 max_words=request["word_count"] + 200
             )
             prompt += f"\n\n用户提示：{request['prompt']}"
         
-        # 调用 AI 服务生成内容
-        try:
-            result = ai_service.generate_content(prompt)
-            if "error" in result:
-                raise Exception(result["error"])
-            return result["text"]
-        except Exception as e:
-            raise Exception(f"AI 内容生成失败：{str(e)}")
+        session = self._get_ai_session(settings.api_key, request)
+        self._ai_operation = request["type"]
+        return session, prompt
+    
+    def _on_suggestion_requested(self, request_id: int, context: str):
+        """在后台请求行内续写建议（未配置API密钥时不请求）"""
+        self._cancel_suggestion()
+        settings = self.db.get_settings()
+        if not settings or not settings.api_key:
+            return
+        from ai_services.prompt import PromptTemplate
+        from .ai_stream import InlineSuggestionWorker
+        messages = [
+            {"role": "system", "content": PromptTemplate.get_system_prompt()},
+            {"role": "user", "content": PromptTemplate.get_suggestion_prompt(context)}
+        ]
+        suggestion = self.editor.inline_suggestion
+        worker = InlineSuggestionWorker(self._get_ai_service(settings.api_key), messages, request_id,
+                                        suggestion.max_tokens, parent=self)
+        worker.completed.connect(suggestion.show_result)
+        worker.finished.connect(self._on_suggestion_finished)
+        self._suggestion_worker = worker
+        worker.start()
+    
+    def _on_suggestion_finished(self):
+        """行内建议请求线程结束后释放"""
+        worker = self.sender()
+        if worker is self._suggestion_worker:
+            self._suggestion_worker = None
+        worker.deleteLater()
+    
+    def _cancel_suggestion(self):
+        """取消进行中的行内建议请求（线程在断开连接后自行结束）"""
+        if self._suggestion_worker is not None:
+            self._suggestion_worker.cancel()
+            self._suggestion_worker = None
+    
+    def _get_ai_service_options(self):
+        """从配置文件读取默认提供商的模型、API地址和模型单价
+        
+        Returns:
+            (模型名称, API地址, 单价)，未配置时使用 DeepSeekAIService 的默认值，单价为None
+        """
+        from ai_services.deepseek import DeepSeekAIService
+        ai_config = get_config_section('ai_services')
+        default = ai_config.get('default') or {}
+        model = default.get('model') or DeepSeekAIService.DEFAULT_MODEL
+        api_url = DeepSeekAIService.DEFAULT_API_URL
+        pricing = None
+        for provider in ai_config.get('supported_models') or []:
+            if provider.get('key') == default.get('provider'):
+                api_url = provider.get('api_url') or api_url
+                pricing = (provider.get('pricing') or {}).get(model)
+                break
+        return model, api_url, pricing
+    
+    def _record_ai_request(self, record: dict):
+        """保存一次AI调用记录（AI服务的 telemetry 回调经 ai_request_logged 信号转到界面线程）"""
+        record = dict(record)
+        operation = record.pop('operation', None) or self._ai_operation
+        self.db.add_ai_request_log(
+            record,
+            project_id=self.chapter_list.current_project_id,
+            chapter_id=self.editor.current_chapter_id,
+            operation=operation
+        )
+    
+    def _get_ai_service(self, api_key: str) -> "DeepSeekAIService":
+        """获取AI服务实例（API密钥变化时重新创建，原有的对话会话随之作废）"""
+        if self._ai_service is None or self._ai_service.api_key != api_key.strip():
+            from ai_services.deepseek import DeepSeekAIService
+            model, api_url, pricing = self._get_ai_service_options()
+            self._ai_service = DeepSeekAIService(api_key=api_key, model=model, api_url=api_url,
+                                                 telemetry=self.ai_request_logged.emit, pricing=pricing)
+            self._ai_session = None
+        return self._ai_service
+    
+    def _get_ai_session(self, api_key: str, request: dict) -> "ConversationSession":
+        """获取当前章节的AI对话会话
+        
+        章节或上下文变化时创建新会话（消息前缀已不同，缓存无法命中），
+        新会话用数据库中该章节最近的对话初始化。
+        """
+        from ai_services.conversation import ConversationSession
+        from ai_services.prompt import PromptTemplate
+        service = self._get_ai_service(api_key)
+        
+        context = request.get("context", "")
+        session_key = (self.editor.current_chapter_id, context)
+        if self._ai_session is None or self._ai_session_key != session_key:
+            self._ai_session = ConversationSession(
+                service,
+                PromptTemplate.get_system_prompt(),
+                PromptTemplate.get_context_message(context) if context else None,
+                history=request.get("history")
+            )
+            self._ai_session_key = session_key
+            memory_profiler.register_cache("AI对话会话", self._ai_session, ConversationSession.memory_usage)
+        return self._ai_session
 
     def _backup_database(self):
         """备份数据库"""
+        self._flush_autosave()
         backup_path = self.db.backup_database()
         if backup_path:
             QMessageBox.information(
@@ -425,7 +866,14 @@ class MainWindow(QMainWindow):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
+                # 恢复会覆盖所有数据，放弃编辑器中未保存的修改，避免退出时写入恢复后的数据库
+                self._autosave_timer.stop()
+                self.editor.mark_saved(self.editor.revision)
                 if self.db.restore_database(str(backup_path)):
+                    # 快照描述的是恢复前的数据，重启后从数据库加载
+                    if self._session_snapshot is not None:
+                        self._session_snapshot.clear()
+                        self._session_snapshot = None
                     QMessageBox.information(
                         self,
                         "恢复成功",
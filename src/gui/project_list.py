@@ -3,16 +3,154 @@
 
 """
 项目列表组件
-显示所有创建的写作项目，支持项目的创建、删除、重命名等操作
+显示所有创建的写作项目，支持项目的创建、删除、重命名、搜索和排序等操作
 """
 
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListWidget, 
-                           QListWidgetItem, QPushButton, QInputDialog,
-                           QMessageBox, QMenu)
-from PyQt6.QtCore import Qt, pyqtSignal
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListView, QAbstractItemView,
+                           QPushButton, QInputDialog, QMessageBox, QMenu,
+                           QLineEdit, QComboBox)
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractListModel, QModelIndex
 from PyQt6.QtGui import QIcon, QAction
 
 from database.operations import DatabaseManager
+from utils.memory import memory_profiler
+from utils.perf import timed
+from utils.text_index import NgramIndex
+
+class ProjectListModel(QAbstractListModel):
+    """项目列表数据模型
+    
+    保存所有项目的摘要，按名称和描述建立 n-gram 索引，过滤时只查索引；
+    同时维护项目ID到行号的映射，选中项目不需要逐行查找。
+    """
+    
+    IdRole = Qt.ItemDataRole.UserRole
+    
+    SORTS = [
+        ('recent', "最近编辑"),
+        ('words', "字数"),
+        ('name', "名称")
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._projects: Dict[int, Dict[str, Any]] = {}
+        self._index = NgramIndex()
+        self._rows: List[int] = []  # 显示的项目ID，按排序顺序
+        self._row_of: Dict[int, int] = {}  # 项目ID -> 行号
+        self.filter_text = ""
+        self.sort_key = 'recent'
+        memory_profiler.register_cache("项目搜索索引", self._index, NgramIndex.memory_usage)
+    
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """显示的项目数量"""
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        """获取项目数据"""
+        if not index.isValid():
+            return None
+        project = self._projects[self._rows[index.row()]]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return project['name']
+        if role == self.IdRole:
+            return project['id']
+        if role == Qt.ItemDataRole.ToolTipRole:
+            lines = [project['description']] if project['description'] else []
+            lines.append(f"{project['chapter_count']}章，{project['word_count']}字")
+            if project['last_edited']:
+                # 数据库中的时间为UTC，显示为本地时间
+                local_time = project['last_edited'].replace(tzinfo=timezone.utc).astimezone()
+                lines.append(f"最后编辑: {local_time.strftime('%Y-%m-%d %H:%M')}")
+            return "\n".join(lines)
+        return None
+    
+    def set_projects(self, summaries: List[Dict[str, Any]]):
+        """替换全部项目（get_project_summaries 的返回值）"""
+        self.beginResetModel()
+        self._projects = {summary['id']: summary for summary in summaries}
+        self._index.clear()
+        for summary in summaries:
+            self._index.add(summary['id'], summary['name'], summary['description'])
+        self._update_rows()
+        self.endResetModel()
+    
+    def set_filter(self, text: str):
+        """设置过滤文本（匹配名称或描述的任意位置，空格分隔多个关键词）"""
+        if text == self.filter_text:
+            return
+        self.filter_text = text
+        self._refresh()
+    
+    def add_project(self, project_id: int, name: str, description: str = None):
+        """添加新建的项目"""
+        self._projects[project_id] = {
+            'id': project_id,
+            'name': name,
+            'description': description,
+            'chapter_count': 0,
+            'word_count': 0,
+            'last_edited': datetime.utcnow()
+        }
+        self._index.add(project_id, name, description)
+        self._refresh()
+    
+    def rename_project(self, project_id: int, name: str):
+        """修改项目名称"""
+        project = self._projects.get(project_id)
+        if project is None:
+            return
+        project['name'] = name
+        self._index.add(project_id, name, project['description'])
+        self._refresh()
+    
+    def remove_project(self, project_id: int):
+        """移除项目"""
+        if self._projects.pop(project_id, None) is None:
+            return
+        self._index.remove(project_id)
+        self._refresh()
+    
+    def row_of(self, project_id: int) -> int:
+        """项目所在的行号，不存在或被过滤掉时返回-1"""
+        return self._row_of.get(project_id, -1)
+    
+    def contains(self, project_id: int) -> bool:
+        """是否存在该项目（不考虑过滤）"""
+        return project_id in self._projects
+    
+    def name_of(self, project_id: int) -> Optional[str]:
+        """项目名称，不存在时返回None"""
+        project = self._projects.get(project_id)
+        return project['name'] if project else None
+    
+    def summaries(self) -> List[Dict[str, Any]]:
+        """全部项目的摘要（格式同 get_project_summaries 的返回值）"""
+        return list(self._projects.values())
+    
+    def _refresh(self):
+        """重新过滤和排序"""
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+    
+    def _update_rows(self):
+        """按过滤文本和排序方式计算显示的项目及行号映射"""
+        matched = self._index.search(self.filter_text)
+        projects = [self._projects[project_id] for project_id in
+                    (self._projects if matched is None else matched)]
+        if self.sort_key == 'words':
+            projects.sort(key=lambda project: (-project['word_count'], project['id']))
+        elif self.sort_key == 'name':
+            projects.sort(key=lambda project: (project['name'].casefold(), project['id']))
+        else:
+            projects.sort(key=lambda project: (project['last_edited'] or datetime.min, project['id']),
+                          reverse=True)
+        self._rows = [project['id'] for project in projects]
+        self._row_of = {project_id: row for row, project_id in enumerate(self._rows)}
 
 class ProjectList(QWidget):
     """项目列表组件"""
@@ -23,23 +161,35 @@ class ProjectList(QWidget):
     project_deleted = pyqtSignal(int)   # 项目删除信号，参数为被删除的项目ID
     project_renamed = pyqtSignal(int, str)  # 项目重命名信号，参数为项目ID和新名称
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, load: bool = True):
+        """初始化
+        
+        Args:
+            parent: 父窗口
+            load: 是否立即从数据库加载项目（从工作区快照启动时由主窗口稍后调用 reload）
+        """
         super().__init__(parent)
         self.setObjectName("ProjectList")
+        self.current_project_id = None
         
         # 创建数据库管理器实例
         self.db = DatabaseManager()
+        self.model = ProjectListModel(self)
         
         self._init_ui()
         
         # 加载现有项目
-        self._load_projects()
+        if load:
+            self._load_projects()
     
+    @timed("gui.project_list.load_projects")
     def _load_projects(self):
-        """加载现有项目"""
-        projects = self.db.get_all_projects()
-        for project in projects:
-            self.add_project(project.id, project.name)
+        """加载现有项目（含章节数、字数和最后编辑时间，用于排序）"""
+        self.model.set_projects(self.db.get_project_summaries())
+    
+    def reload(self):
+        """重新从数据库加载项目列表（保留当前项目的选中状态）"""
+        self._load_projects()
     
     def _init_ui(self):
         """初始化UI"""
@@ -52,12 +202,32 @@ class ProjectList(QWidget):
         new_project_btn.clicked.connect(self._create_new_project)
         layout.addWidget(new_project_btn)
         
+        # 搜索框（边输入边过滤）
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("搜索项目名称或描述")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.model.set_filter)
+        layout.addWidget(self.filter_edit)
+        
+        # 排序方式
+        self.sort_combo = QComboBox()
+        for key, title in ProjectListModel.SORTS:
+            self.sort_combo.addItem(f"按{title}排序", key)
+        self.sort_combo.currentIndexChanged.connect(self._on_sort_changed)
+        layout.addWidget(self.sort_combo)
+        
         # 创建项目列表
-        self.list_widget = QListWidget()
-        self.list_widget.itemClicked.connect(self._on_project_selected)
-        self.list_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.list_widget.customContextMenuRequested.connect(self._show_context_menu)
-        layout.addWidget(self.list_widget)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        # 过滤和排序会重置模型，视图处理完重置后恢复当前项目的选中状态
+        self.model.modelReset.connect(self._restore_selection)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.list_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.list_view.clicked.connect(self._on_project_selected)
+        self.list_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.list_view.customContextMenuRequested.connect(self._show_context_menu)
+        layout.addWidget(self.list_view)
         
         # 设置布局
         self.setLayout(layout)
@@ -75,23 +245,32 @@ class ProjectList(QWidget):
             # 调用数据库接口创建新项目
             project = self.db.create_project(name)
             if project:
-                # 创建列表项
-                item = QListWidgetItem(name)
-                item.setData(Qt.ItemDataRole.UserRole, project.id)
-                self.list_widget.addItem(item)
+                self.model.add_project(project.id, name)
                 
                 # 发送项目创建信号
                 self.project_created.emit(project.id)
     
-    def _on_project_selected(self, item):
+    def _on_project_selected(self, index: QModelIndex):
         """处理项目选中事件"""
-        project_id = item.data(Qt.ItemDataRole.UserRole)
+        project_id = index.data(ProjectListModel.IdRole)
+        self.current_project_id = project_id
         self.project_selected.emit(project_id)
     
+    def _on_sort_changed(self):
+        """切换排序方式（重新查询字数和最后编辑时间）"""
+        self.model.sort_key = self.sort_combo.currentData()
+        self._load_projects()
+    
+    def _restore_selection(self):
+        """模型重置后重新选中当前项目"""
+        row = self.model.row_of(self.current_project_id)
+        if row >= 0:
+            self.list_view.setCurrentIndex(self.model.index(row))
+    
     def _show_context_menu(self, position):
         """显示右键菜单"""
-        item = self.list_widget.itemAt(position)
-        if not item:
+        item = self.list_view.indexAt(position)
+        if not item.isValid():
             return
             
         menu = QMenu(self)
@@ -107,11 +286,11 @@ class ProjectList(QWidget):
         menu.addAction(delete_action)
         
         # 显示菜单
-        menu.exec(self.list_widget.mapToGlobal(position))
+        menu.exec(self.list_view.viewport().mapToGlobal(position))
     
-    def _rename_project(self, item):
+    def _rename_project(self, item: QModelIndex):
         """重命名项目"""
-        old_name = item.text()
+        old_name = item.data()
         new_name, ok = QInputDialog.getText(
             self,
             "重命名项目",
@@ -120,43 +299,50 @@ class ProjectList(QWidget):
         )
         
         if ok and new_name and new_name != old_name:
-            project_id = item.data(Qt.ItemDataRole.UserRole)
+            project_id = item.data(ProjectListModel.IdRole)
             # 更新数据库
             if self.db.update_project(project_id, name=new_name):
-                item.setText(new_name)
+                self.model.rename_project(project_id, new_name)
                 self.project_renamed.emit(project_id, new_name)
     
-    def _delete_project(self, item):
+    def _delete_project(self, item: QModelIndex):
         """删除项目"""
         reply = QMessageBox.question(
             self,
             "删除项目",
-            f'确定要删除项目"{item.text()}"吗？\n此操作不可撤销。',
+            f'确定要删除项目"{item.data()}"吗？\n此操作不可撤销。',
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            project_id = item.data(Qt.ItemDataRole.UserRole)
+            project_id = item.data(ProjectListModel.IdRole)
             # 从数据库删除
             if self.db.delete_project(project_id):
-                self.list_widget.takeItem(self.list_widget.row(item))
+                if project_id == self.current_project_id:
+                    self.current_project_id = None
+                self.model.remove_project(project_id)
                 self.project_deleted.emit(project_id)
     
     def add_project(self, project_id: int, name: str):
         """添加项目到列表"""
-        item = QListWidgetItem(name)
-        item.setData(Qt.ItemDataRole.UserRole, project_id)
-        self.list_widget.addItem(item)
+        self.model.add_project(project_id, name)
     
     def clear_projects(self):
         """清空项目列表"""
-        self.list_widget.clear()
-    
-    def select_project(self, project_id: int):
-        """选中指定项目"""
-        for i in range(self.list_widget.count()):
-            item = self.list_widget.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == project_id:
-                self.list_widget.setCurrentItem(item)
-                break
+        self.current_project_id = None
+        self.model.set_projects([])
+    
+    def select_project(self, project_id: int) -> bool:
+        """选中指定项目（被搜索过滤掉时清空搜索框）
+        
+        Returns:
+            bool: 项目是否存在
+        """
+        if not self.model.contains(project_id):
+            return False
+        self.current_project_id = project_id
+        if self.model.row_of(project_id) < 0:
+            self.filter_edit.clear()
+        self._restore_selection()
+        return True
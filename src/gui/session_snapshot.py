@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工作区快照模块
+退出时和定时将当前工作区（打开的项目和章节、光标、面板尺寸、项目和章节标题列表）
+写入一个小的JSON文件，下次启动时先按快照显示，再与数据库核对
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.logger import logger
+
+class SessionSnapshot:
+    """工作区快照文件
+    
+    快照内容只用于加快启动时的首次显示，数据以数据库为准：
+    文件缺失、损坏或版本不符时 load() 返回None，按正常流程从数据库加载。
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path: Optional[str] = None):
+        """初始化
+        
+        Args:
+            path: 快照文件路径（默认为 data/session.json）
+        """
+        if path is None:
+            path = str(Path(__file__).parent.parent.parent / "data" / "session.json")
+        self.path = path
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取快照
+        
+        Returns:
+            快照内容（项目摘要中的 last_edited 已转换为 datetime），不可用时返回None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if not isinstance(state, dict) or state.get('version') != self.VERSION:
+                return None
+            for summary in state.get('projects') or []:
+                if summary.get('last_edited'):
+                    summary['last_edited'] = datetime.fromisoformat(summary['last_edited'])
+            return state
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"读取工作区快照失败: {e}")
+            return None
+    
+    def save(self, state: Dict[str, Any]) -> bool:
+        """写入快照（先写临时文件再替换，中途退出不会留下不完整的快照）
+        
+        Args:
+            state: 快照内容，项目摘要中的 last_edited 可以是 datetime
+        
+        Returns:
+            bool: 是否写入成功
+        """
+        state = dict(state, version=self.VERSION, saved_at=datetime.now().isoformat())
+        temp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, default=self._encode)
+            os.replace(temp_path, self.path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"写入工作区快照失败: {e}")
+            return False
+    
+    def clear(self):
+        """删除快照文件"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除工作区快照失败: {e}")
+    
+    @staticmethod
+    def _encode(value):
+        """JSON编码 datetime"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"无法编码的类型: {type(value).__name__}")
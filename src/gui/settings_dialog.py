@@ -14,6 +14,7 @@ import yaml
 from pathlib import Path
 
 from database.operations import DatabaseManager
+from utils.config import load_config
 from ai_services.deepseek import DeepSeekAIService
 
 class SettingsDialog(QDialog):
@@ -292,6 +293,7 @@ class SettingsDialog(QDialog):
                 
                 with open(config_path, "w", encoding="utf-8") as f:
                     yaml.dump(config, f, allow_unicode=True)
+                load_config(reload=True)
             
             # 发送设置更新信号
             self.settings_updated.emit(settings)
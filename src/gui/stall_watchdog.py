@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+界面卡顿监测
+主线程定时器定期更新心跳，后台线程检查心跳间隔；事件循环卡住超过阈值时
+抓取主线程的Python调用栈，记录卡顿时长并按调用位置汇总
+"""
+
+import sys
+import threading
+import traceback
+from pathlib import Path
+from time import monotonic
+from typing import Any, Dict, List
+
+from PyQt6.QtCore import QTimer
+
+from utils.logger import logger
+
+# 源码目录，用于从调用栈中找出应用自身的代码位置
+SRC_DIR = str(Path(__file__).parent.parent)
+
+class StallStats:
+    """单个调用位置的卡顿统计"""
+    
+    def __init__(self, stack: str):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stack = stack  # 最长一次卡顿时的调用栈
+    
+    def add(self, seconds: float, stack: str):
+        """添加一次卡顿"""
+        self.count += 1
+        self.total += seconds
+        if seconds >= self.max:
+            self.max = seconds
+            self.stack = stack
+
+class StallWatchdog:
+    """界面卡顿监测器
+    
+    心跳定时器运行在主线程的事件循环中，事件循环被同步操作阻塞时心跳停止更新。
+    监测线程发现心跳超过阈值未更新时抓取主线程调用栈（此时主线程仍在执行
+    阻塞的代码），待心跳恢复后记录卡顿时长。
+    """
+    
+    def __init__(self, threshold_ms: int = 200, interval_ms: int = 50):
+        """初始化监测器
+        
+        Args:
+            threshold_ms: 卡顿阈值（毫秒）
+            interval_ms: 心跳间隔（毫秒）
+        """
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self.running = False
+        self._timer = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._main_thread_id = None
+        self._last_beat = 0.0
+        self._stall = None  # 当前卡顿: (开始时的心跳时间, 调用栈, 调用位置)
+        self._sites: Dict[str, StallStats] = {}
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """开始监测（需在主线程中调用）"""
+        if self.running:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = monotonic()
+        self._timer = QTimer()
+        self._timer.setInterval(self.interval_ms)
+        self._timer.timeout.connect(self._beat)
+        self._timer.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        self.running = True
+        logger.info(f"界面卡顿监测已开启: 阈值{self.threshold_ms}ms")
+    
+    def stop(self):
+        """停止监测"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._timer.stop()
+        self._timer = None
+        self._thread = None
+        self._stall = None
+        self.running = False
+    
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._sites.clear()
+    
+    def _beat(self):
+        """心跳（主线程）"""
+        self._last_beat = monotonic()
+    
+    def _run(self):
+        """监测线程"""
+        interval = self.interval_ms / 1000
+        threshold = self.threshold_ms / 1000
+        while not self._stop_event.wait(interval / 2):
+            last_beat = self._last_beat
+            # 心跳间隔本身不算卡顿
+            lag = monotonic() - last_beat - interval
+            if self._stall is None:
+                if lag >= threshold:
+                    stack, site = self._capture_main_stack()
+                    self._stall = (last_beat, stack, site)
+                    logger.warning(f"界面卡顿超过{self.threshold_ms}ms，位置: {site}\n主线程调用栈:\n{stack}")
+            elif last_beat != self._stall[0]:
+                # 心跳已恢复，卡顿时长为两次心跳之间的间隔
+                start_beat, stack, site = self._stall
+                self._stall = None
+                self._record(site, stack, max(last_beat - start_beat - interval, threshold))
+    
+    def _capture_main_stack(self):
+        """抓取主线程调用栈
+        
+        Returns:
+            (调用栈文本, 调用位置)，调用位置为栈中最内层的应用代码
+        """
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return "", "(未知)"
+        frames = traceback.extract_stack(frame)
+        del frame
+        site = "(Qt内部)"
+        for entry in reversed(frames):
+            if entry.filename.startswith(SRC_DIR) and not entry.filename.endswith("stall_watchdog.py"):
+                site = f"{Path(entry.filename).relative_to(SRC_DIR)}:{entry.lineno} {entry.name}"
+                break
+        return "".join(traceback.format_list(frames)), site
+    
+    def _record(self, site: str, stack: str, seconds: float):
+        """记录一次卡顿"""
+        with self._lock:
+            stats = self._sites.get(site)
+            if stats is None:
+                stats = self._sites[site] = StallStats(stack)
+            stats.add(seconds, stack)
+        logger.warning(f"界面卡顿结束: 持续{seconds * 1000:.0f}ms，位置: {site}")
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """获取按调用位置汇总的卡顿统计，按总时长降序排列
+        
+        Returns:
+            统计列表，时间单位为毫秒
+        """
+        with self._lock:
+            rows = [
+                {
+                    'site': site,
+                    'count': stats.count,
+                    'total_ms': stats.total * 1000,
+                    'max_ms': stats.max * 1000,
+                    'stack': stats.stack
+                }
+                for site, stats in self._sites.items()
+            ]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+# 全局卡顿监测器（由配置或"诊断"菜单开启）
+stall_watchdog = StallWatchdog()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文本统计模块
+按文本块（段落）增量统计章节的汉字数、英文单词数、标点数和对话，
+编辑时只重新统计变化的段落，章节合计随之增减，不需要每次按键扫描全文
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextBlock, QTextBlockUserData, QTextDocument
+
+# 汉字（基本区、扩展A区、兼容区和扩展B区以后）
+_CHINESE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f]')
+# 英文单词和数字（以撇号或连字符连接的算作一个词）
+_WORD = re.compile(r"[A-Za-z0-9]+(?:['’-][A-Za-z0-9]+)*")
+# 标点和符号
+_PUNCTUATION = re.compile(r'[^\w\s]')
+# 引号中的对话（对话跨段落时前一段通常不写后引号，因此后引号可以省略）
+_DIALOGUE = re.compile(r'“[^”]*”?|「[^」]*」?|『[^』]*』?|"[^"]*"?')
+
+def count_text(text: str) -> Tuple[int, int, int, int, int, int]:
+    """统计一段文本
+    
+    Args:
+        text: 文本（一个段落）
+    
+    Returns:
+        (汉字数, 英文单词数, 标点数, 对话字数, 对话段落数, 段落数)，
+        对话段落数和段落数为0或1，对话字数为引号中的汉字数和英文单词数
+    """
+    if not text or text.isspace():
+        return 0, 0, 0, 0, 0, 0
+    dialogue = 0
+    for match in _DIALOGUE.finditer(text):
+        quoted = match.group()
+        dialogue += len(_CHINESE.findall(quoted)) + len(_WORD.findall(quoted))
+    return (len(_CHINESE.findall(text)), len(_WORD.findall(text)), len(_PUNCTUATION.findall(text)),
+            dialogue, 1 if dialogue else 0, 1)
+
+class TextCounts:
+    """一组文本统计量（章节合计），各项的顺序与 count_text 的返回值相同"""
+    
+    def __init__(self, values: Optional[Sequence[int]] = None):
+        self.values: List[int] = list(values) if values is not None else [0] * 6
+    
+    def add(self, values: Sequence[int], sign: int = 1):
+        """加上（sign 为 -1 时减去）一个文本块的统计量"""
+        totals = self.values
+        for index, value in enumerate(values):
+            totals[index] += sign * value
+    
+    def copy(self) -> "TextCounts":
+        """复制当前的统计量"""
+        return TextCounts(self.values)
+    
+    @property
+    def chinese(self) -> int:
+        """汉字数"""
+        return self.values[0]
+    
+    @property
+    def words(self) -> int:
+        """英文单词数（含数字）"""
+        return self.values[1]
+    
+    @property
+    def punctuation(self) -> int:
+        """标点和符号数"""
+        return self.values[2]
+    
+    @property
+    def dialogue(self) -> int:
+        """对话字数"""
+        return self.values[3]
+    
+    @property
+    def dialogue_lines(self) -> int:
+        """含对话的段落数"""
+        return self.values[4]
+    
+    @property
+    def paragraphs(self) -> int:
+        """非空段落数"""
+        return self.values[5]
+    
+    @property
+    def total_words(self) -> int:
+        """字数（汉字数加英文单词数，不含标点）"""
+        return self.values[0] + self.values[1]
+    
+    @property
+    def dialogue_ratio(self) -> float:
+        """对话字数占字数的比例"""
+        total = self.total_words
+        return self.dialogue / total if total else 0.0
+    
+    def reading_minutes(self, chars_per_minute: int = 400, words_per_minute: int = 200) -> float:
+        """估算阅读时间（分钟）
+        
+        Args:
+            chars_per_minute: 每分钟阅读的汉字数
+            words_per_minute: 每分钟阅读的英文单词数
+        """
+        return self.chinese / max(chars_per_minute, 1) + self.words / max(words_per_minute, 1)
+
+class BlockStats(QTextBlockUserData):
+    """保存在文本块用户数据中的段落统计量
+    
+    创建和更新时计入章节合计；文本块被删除时Qt析构用户数据，此时从合计中减去，
+    因此删除段落不需要知道被删除的是哪些块。
+    """
+    
+    def __init__(self, totals: TextCounts, values: Tuple[int, ...]):
+        super().__init__()
+        self._totals = totals
+        self.values = values
+        totals.add(values)
+    
+    def update(self, values: Tuple[int, ...]):
+        """更新段落的统计量"""
+        if values != self.values:
+            self._totals.add(self.values, -1)
+            self._totals.add(values)
+            self.values = values
+    
+    def __del__(self):
+        self._totals.add(self.values, -1)
+
+class DocumentStats(QObject):
+    """一个章节文档的文本统计
+    
+    contentsChange 只记录变化的位置区间（与 Editor 记录修改区间的方式相同），
+    定时器触发后逐块重新统计这些区间内的段落，每轮最多处理 batch_blocks 个块，
+    其余的在下一轮事件循环中继续，载入长章节时界面也保持响应。
+    输入期间定时器不会被重新计时，统计结果每隔 delay_ms 更新一次。
+    """
+    
+    # 定义信号
+    changed = pyqtSignal()  # 统计完成（没有待统计的区间）
+    
+    # 待统计区间数超过该值时合并为一个区间
+    MAX_PENDING_RANGES = 64
+    
+    def __init__(self, document: QTextDocument, delay_ms: int = 300, batch_blocks: int = 2000):
+        """初始化并开始统计文档的现有内容
+        
+        Args:
+            document: 章节文档（同时作为父对象）
+            delay_ms: 内容变化后到重新统计的延迟
+            batch_blocks: 每轮事件循环最多统计的文本块数
+        """
+        super().__init__(document)
+        self._document = document
+        self.delay_ms = delay_ms
+        self.batch_blocks = max(batch_blocks, 1)
+        self.totals = TextCounts()
+        self._pending: List[Tuple[int, int]] = []  # 按位置排序、互不重叠的 [开始, 结束] 区间
+        
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._process)
+        
+        document.contentsChange.connect(self._on_contents_change)
+        self._on_contents_change(0, 0, document.characterCount())
+    
+    @property
+    def pending(self) -> bool:
+        """是否有尚未统计的修改"""
+        return bool(self._pending)
+    
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        """记录需要重新统计的区间"""
+        delta = added - removed
+        removed_end = position + removed
+        merged_start, merged_end = position, position + added
+        before, after = [], []
+        for start, end in self._pending:
+            if end < position:
+                before.append((start, end))
+            elif start > removed_end:
+                after.append((start + delta, end + delta))
+            else:
+                merged_start = min(merged_start, start)
+                merged_end = max(merged_end, end + delta)
+        ranges = before + [(merged_start, merged_end)] + after
+        if len(ranges) > self.MAX_PENDING_RANGES:
+            ranges = [(ranges[0][0], ranges[-1][1])]
+        self._pending = ranges
+        if not self._timer.isActive():
+            self._timer.start(self.delay_ms)
+    
+    def _process(self):
+        """统计一批待统计的段落，还有剩余时在下一轮事件循环继续"""
+        self._update(self.batch_blocks)
+        if self._pending:
+            self._timer.start(0)
+        else:
+            self.changed.emit()
+    
+    def flush(self):
+        """立即统计所有待统计的段落"""
+        if not self._pending:
+            return
+        self._timer.stop()
+        self._update(None)
+        self.changed.emit()
+    
+    def _update(self, budget: Optional[int]):
+        """重新统计待统计区间内的段落
+        
+        Args:
+            budget: 最多统计的文本块数（None表示不限制）
+        """
+        document = self._document
+        while self._pending and budget != 0:
+            start, end = self._pending[0]
+            block = document.findBlock(start)
+            while block.isValid() and block.position() <= end and budget != 0:
+                self._update_block(block)
+                if budget is not None:
+                    budget -= 1
+                block = block.next()
+            if block.isValid() and block.position() <= end:
+                self._pending[0] = (block.position(), end)
+            else:
+                self._pending.pop(0)
+    
+    def _update_block(self, block: QTextBlock):
+        """重新统计一个段落"""
+        values = count_text(block.text())
+        data = block.userData()
+        if isinstance(data, BlockStats):
+            data.update(values)
+        else:
+            block.setUserData(BlockStats(self.totals, values))
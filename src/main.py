@@ -9,7 +9,7 @@ import sys
 import os
 from pathlib import Path
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QEvent, QTimer
 
 # 在 macOS 上抑制 TSM 警告
 if sys.platform == 'darwin':
@@ -19,20 +19,45 @@ if sys.platform == 'darwin':
     with contextlib.redirect_stderr(open(os.devnull, 'w')):
         from PyQt6.QtGui import QGuiApplication
 
-from gui.main_window import MainWindow
-from utils.logger import setup_logger
+from utils.logger import setup_logger, logger
+from utils.config import get_config_section
+from utils.perf import perf
+from database.profiler import query_profiler
+from gui.stall_watchdog import stall_watchdog
+from utils.memory import memory_profiler
+from utils.startup_profiler import startup_profiler
+
+# 启动分析：统计到主窗口首次绘制为止的导入和初始化耗时，输出报告后退出
+PROFILE_STARTUP_FLAG = "--profile-startup"
 
 def create_application(argv):
     """创建并配置应用程序"""
     # 设置日志
     setup_logger()
     
+    # 性能统计默认关闭，可在配置文件或"诊断"菜单中开启
+    diagnostics = get_config_section('diagnostics')
+    # 启动分析时同时开启耗时统计，报告中列出初始化期间的各项操作
+    perf.enabled = diagnostics.get('timing', False) or startup_profiler.running
+    query_profiler.threshold = diagnostics.get('n_plus_one_threshold', query_profiler.threshold)
+    if diagnostics.get('sql_profiler', False):
+        query_profiler.start()
+    # 内存分析尽早开启，以便记录界面和数据库初始化时的分配
+    memory_profiler.frames = diagnostics.get('memory_frames', memory_profiler.frames)
+    if diagnostics.get('memory_profiler', False):
+        memory_profiler.start()
+    
     # 创建应用
     app = QApplication(argv)
     
     # 设置应用样式
     app.setStyle("Fusion")
     
+    # 界面卡顿监测需要在事件循环所在的主线程中启动
+    stall_watchdog.threshold_ms = diagnostics.get('stall_threshold_ms', stall_watchdog.threshold_ms)
+    if diagnostics.get('stall_watchdog', False):
+        stall_watchdog.start()
+    
     return app
 
 def load_stylesheet(app):
@@ -51,22 +76,71 @@ def load_stylesheet(app):
 
 def create_main_window():
     """创建主窗口"""
+    # 主窗口模块依赖数据库和各界面组件，在创建窗口时才导入，
+    # 以便 QApplication 先创建，启动分析也能单独统计这部分导入耗时
+    from gui.main_window import MainWindow
     return MainWindow()
 
-def main():
-    """主程序入口函数"""
+class FirstPaintWatcher(QObject):
+    """启动分析时记录主窗口的首次绘制，随后输出报告并退出"""
+    
+    def __init__(self, window, app):
+        super().__init__(window)
+        self._app = app
+        window.installEventFilter(self)
+    
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Type.Paint and startup_profiler.first_paint_ms is None:
+            startup_profiler.mark_first_paint()
+            watched.removeEventFilter(self)
+            # 窗口显示后排队的延迟任务（如工作区快照的核对）先执行，再输出报告
+            QTimer.singleShot(0, self._finish)
+        return super().eventFilter(watched, event)
+    
+    def _finish(self):
+        """输出启动分析报告并退出"""
+        startup_profiler.stop()
+        operations = perf.snapshot()
+        print(startup_profiler.report(operations))
+        path = startup_profiler.dump(operations)
+        logger.info(f"启动分析结果已保存到: {path}")
+        self._app.quit()
+
+def run(argv) -> int:
+    """创建应用和主窗口并运行事件循环
+    
+    Args:
+        argv: 命令行参数，包含 --profile-startup 时输出启动分析报告后退出
+    
+    Returns:
+        事件循环的退出码
+    """
+    # 由 run.py 启动时分析已在导入本模块之前开始
+    if PROFILE_STARTUP_FLAG in argv:
+        startup_profiler.start()
+    
     # 创建应用
-    app = create_application(sys.argv)
+    with startup_profiler.phase("创建应用"):
+        app = create_application(argv)
     
     # 加载样式表
-    load_stylesheet(app)
+    with startup_profiler.phase("加载样式表"):
+        load_stylesheet(app)
     
-    # 创建主窗口
-    window = create_main_window()
-    window.show()
+    # 创建并显示主窗口
+    with startup_profiler.phase("创建主窗口"):
+        window = create_main_window()
+    if startup_profiler.running:
+        FirstPaintWatcher(window, app)
+    with startup_profiler.phase("显示主窗口"):
+        window.show()
     
     # 运行应用
-    sys.exit(app.exec())
+    return app.exec()
+
+def main():
+    """主程序入口函数"""
+    sys.exit(run(sys.argv))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
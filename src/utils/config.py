@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+配置模块
+读取 config/config.yaml 中的应用配置
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from utils.logger import logger
+
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config" / "config.yaml"
+
+_config_cache: Optional[Dict[str, Any]] = None
+
+def load_config(reload: bool = False) -> Dict[str, Any]:
+    """加载配置文件（结果会被缓存）
+    
+    Args:
+        reload: 是否忽略缓存重新读取
+        
+    Returns:
+        配置字典，读取失败时返回空字典
+    """
+    global _config_cache
+    if _config_cache is None or reload:
+        _config_cache = {}
+        if CONFIG_PATH.exists():
+            try:
+                with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                    _config_cache = yaml.safe_load(f) or {}
+            except Exception as e:
+                logger.error(f"加载配置文件失败: {e}")
+    return _config_cache
+
+def get_config_section(name: str) -> Dict[str, Any]:
+    """获取配置文件中的一个配置节
+    
+    Args:
+        name: 配置节名称，如 "logging"、"ai_dialog"
+        
+    Returns:
+        配置节字典，不存在时返回空字典
+    """
+    return load_config().get(name) or {}
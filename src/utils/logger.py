@@ -3,21 +3,110 @@
 
 """
 日志模块
-提供统一的日志记录功能
+提供统一的日志记录功能，日志级别、文件大小、保留数量和输出格式由配置文件决定
 """
 
 import sys
+import threading
 from pathlib import Path
+from time import monotonic
+from typing import Any, Dict
 from loguru import logger
 
+# 项目根目录
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+# 未配置时使用的默认值（与 config/config.yaml 中的 logging 节对应）
+DEFAULT_LOGGING_CONFIG = {
+    'level': "INFO",
+    'file_level': "DEBUG",
+    'file': "logs/app.log",
+    'max_size': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'json': False,
+    'enqueue': True,
+    'rate_limit_interval': 5.0
+}
+
+class RateLimitedLogger:
+    """限流日志记录器
+    
+    用于热点路径（如编辑时的自动保存）上的日志：同一个键在一个时间间隔内
+    只输出第一条，其余的只计数，并在下一次输出时附上被省略的条数。
+    消息使用 loguru 的 {} 占位符延迟格式化，被省略的消息不会被格式化。
+    """
+    
+    def __init__(self, interval: float = DEFAULT_LOGGING_CONFIG['rate_limit_interval']):
+        """初始化限流日志记录器
+        
+        Args:
+            interval: 同一个键两次输出之间的最小间隔（秒），0表示不限流
+        """
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def log(self, key: str, level: str, message: str, *args, **kwargs):
+        """按键限流输出一条日志
+        
+        Args:
+            key: 限流键，通常为调用位置的名称
+            level: 日志级别
+            message: 日志消息（可包含 {} 占位符）
+            *args: 占位符参数
+            **kwargs: 占位符参数
+        """
+        self._emit(key, level, message, args, kwargs)
+    
+    def debug(self, key: str, message: str, *args, **kwargs):
+        """按键限流输出DEBUG日志"""
+        self._emit(key, "DEBUG", message, args, kwargs)
+    
+    def info(self, key: str, message: str, *args, **kwargs):
+        """按键限流输出INFO日志"""
+        self._emit(key, "INFO", message, args, kwargs)
+    
+    def warning(self, key: str, message: str, *args, **kwargs):
+        """按键限流输出WARNING日志"""
+        self._emit(key, "WARNING", message, args, kwargs)
+    
+    def _emit(self, key: str, level: str, message: str, args: tuple, kwargs: Dict[str, Any]):
+        """限流判断并输出（日志中的调用位置为公开方法的调用方）"""
+        now = monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            message = f"{message}（此前省略{suppressed}条同类日志）"
+        logger.opt(depth=2).log(level, message, *args, **kwargs)
+
+# 热点路径使用的限流日志记录器
+hot_logger = RateLimitedLogger()
+
+def _logging_config() -> Dict[str, Any]:
+    """读取日志配置并补全默认值"""
+    # 配置模块依赖本模块的 logger，因此在函数内导入
+    from utils.config import get_config_section
+    
+    config = dict(DEFAULT_LOGGING_CONFIG)
+    config.update({key: value for key, value in get_config_section('logging').items()
+                   if value is not None})
+    return config
+
 def setup_logger():
-    """配置日志记录器"""
-    # 创建日志目录
-    log_dir = Path(__file__).parent.parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
+    """根据配置文件配置日志记录器"""
+    config = _logging_config()
     
     # 设置日志文件路径
-    log_file = log_dir / "app.log"
+    log_file = Path(config['file'])
+    if not log_file.is_absolute():
+        log_file = ROOT_DIR / log_file
+    log_file.parent.mkdir(parents=True, exist_ok=True)
     
     # 配置日志格式
     log_format = (
@@ -34,21 +123,26 @@ def setup_logger():
     logger.add(
         sys.stderr,
         format=log_format,
-        level="INFO",
-        colorize=True
+        level=str(config['level']).upper(),
+        colorize=True,
+        enqueue=config['enqueue']
     )
     
-    # 添加文件输出
+    # 添加文件输出（enqueue 时由后台线程写入，调用方只需将记录放入队列）
     logger.add(
         str(log_file),
         format=log_format,
-        level="DEBUG",
-        rotation="10 MB",  # 当日志文件达到10MB时轮换
-        retention="1 month",  # 保留1个月的日志
+        level=str(config['file_level']).upper(),
+        rotation=int(config['max_size']),  # 日志文件达到该字节数时轮换
+        retention=int(config['backup_count']),  # 保留的旧日志文件数
         compression="zip",  # 压缩旧的日志文件
-        encoding="utf-8"
+        encoding="utf-8",
+        serialize=bool(config['json']),  # 以JSON行格式输出结构化日志
+        enqueue=config['enqueue']
     )
     
+    hot_logger.interval = float(config['rate_limit_interval'])
+    
     logger.info("日志系统初始化完成")
     
     return logger
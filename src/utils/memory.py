@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存分析模块
+按需拍摄 tracemalloc 快照，将分配归属到应用的子系统（gui、database、ai_services 等）
+并与之前的快照对比；同时汇总应用自身缓存的大小，用于确定内存预算
+"""
+
+import json
+import os
+import sys
+import threading
+import tracemalloc
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import logger
+
+# 源码目录，用于将分配归属到子系统
+SRC_DIR = str(Path(__file__).parent.parent)
+
+# 不属于应用代码的分配
+OTHER_SUBSYSTEM = "other"
+
+class MemorySummary:
+    """一次快照按子系统和分配位置汇总的结果（不保留原始快照，以免分析本身占用大量内存）"""
+    
+    def __init__(self, label: str, traced: int, peak: int):
+        self.label = label
+        self.created_at = datetime.now()
+        self.traced = traced
+        self.peak = peak
+        self.subsystems: Dict[str, List[int]] = {}  # 子系统 -> [字节数, 块数]
+        self.sites: Dict[str, List[Any]] = {}  # 分配位置 -> [子系统, 字节数, 块数]
+    
+    def add(self, subsystem: str, site: str, size: int, count: int):
+        """累加一组分配"""
+        totals = self.subsystems.setdefault(subsystem, [0, 0])
+        totals[0] += size
+        totals[1] += count
+        entry = self.sites.setdefault(site, [subsystem, 0, 0])
+        entry[1] += size
+        entry[2] += count
+
+class MemoryProfiler:
+    """内存分析器
+    
+    tracemalloc 开启后每次分配都会记录调用栈，开销较大，因此默认关闭，
+    只在需要排查内存增长时通过配置或"诊断"菜单开启。
+    """
+    
+    # 保留的快照汇总数（第一个快照作为基线始终保留）
+    MAX_SNAPSHOTS = 10
+    
+    def __init__(self, frames: int = 25):
+        """初始化分析器
+        
+        Args:
+            frames: 每次分配记录的调用栈深度，过浅时经由第三方库的分配无法归属到应用代码
+        """
+        self.frames = frames
+        self._snapshots: List[MemorySummary] = []
+        self._caches: List[Tuple[str, weakref.ref, Callable[[Any], Tuple[int, int]]]] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self) -> bool:
+        """是否正在跟踪内存分配"""
+        return tracemalloc.is_tracing()
+    
+    def start(self):
+        """开始跟踪内存分配"""
+        if tracemalloc.is_tracing():
+            return
+        tracemalloc.start(self.frames)
+        logger.info(f"内存分析已开启: 调用栈深度{self.frames}")
+    
+    def stop(self):
+        """停止跟踪内存分配（已有的快照汇总保留）"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def reset(self):
+        """清空快照汇总"""
+        with self._lock:
+            self._snapshots.clear()
+    
+    def register_cache(self, name: str, owner: Any, sizer: Callable[[Any], Tuple[int, int]]):
+        """登记一个应用缓存
+        
+        只保存所有者的弱引用，所有者被销毁后自动移除。
+        
+        Args:
+            name: 缓存名称，同名缓存的多个实例合并显示
+            owner: 持有缓存的对象
+            sizer: 接收所有者，返回 (条目数, 估算字节数)
+        """
+        with self._lock:
+            self._caches.append((name, weakref.ref(owner), sizer))
+    
+    def cache_sizes(self) -> List[Dict[str, Any]]:
+        """获取各应用缓存的大小，按估算大小降序排列"""
+        with self._lock:
+            self._caches = [cache for cache in self._caches if cache[1]() is not None]
+            caches = list(self._caches)
+        
+        totals: Dict[str, List[int]] = {}
+        for name, ref, sizer in caches:
+            owner = ref()
+            if owner is None:
+                continue
+            try:
+                entries, size = sizer(owner)
+            except RuntimeError:
+                # 所有者对应的Qt对象已被删除
+                continue
+            total = totals.setdefault(name, [0, 0, 0])
+            total[0] += 1
+            total[1] += entries
+            total[2] += size
+        
+        rows = [
+            {'name': name, 'instances': instances, 'entries': entries, 'size_kb': size / 1024}
+            for name, (instances, entries, size) in totals.items()
+        ]
+        rows.sort(key=lambda row: row['size_kb'], reverse=True)
+        return rows
+    
+    def take_snapshot(self, label: Optional[str] = None) -> Optional[MemorySummary]:
+        """拍摄快照并按子系统汇总
+        
+        Args:
+            label: 快照名称（默认为拍摄时间）
+        
+        Returns:
+            快照汇总，未开启跟踪时返回None
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ])
+        traced, peak = tracemalloc.get_traced_memory()
+        summary = MemorySummary(label or datetime.now().strftime('%H:%M:%S'), traced, peak)
+        for stat in snapshot.statistics('traceback'):
+            subsystem, site = self._classify(stat.traceback)
+            summary.add(subsystem, site, stat.size, stat.count)
+        del snapshot
+        
+        with self._lock:
+            self._snapshots.append(summary)
+            if len(self._snapshots) > self.MAX_SNAPSHOTS:
+                del self._snapshots[1]
+        logger.info(f"内存快照 {summary.label}: 跟踪到 {traced / 1024 / 1024:.1f}MB，"
+                    f"峰值 {peak / 1024 / 1024:.1f}MB")
+        return summary
+    
+    def _classify(self, traceback: tracemalloc.Traceback) -> Tuple[str, str]:
+        """找出分配调用栈中最内层的应用代码
+        
+        Returns:
+            (子系统, 分配位置)；调用栈中没有应用代码时子系统为 other，位置为最内层的帧
+        """
+        # tracemalloc 的调用栈按从外到内的顺序排列
+        for frame in reversed(traceback):
+            if frame.filename.startswith(SRC_DIR):
+                relative = Path(frame.filename).relative_to(SRC_DIR)
+                subsystem = relative.parts[0] if len(relative.parts) > 1 else relative.stem
+                return subsystem, f"{relative.as_posix()}:{frame.lineno}"
+        frame = traceback[-1]
+        return OTHER_SUBSYSTEM, f"{frame.filename}:{frame.lineno}"
+    
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """已拍摄的快照列表"""
+        with self._lock:
+            return [
+                {
+                    'label': summary.label,
+                    'created_at': summary.created_at.isoformat(),
+                    'traced_kb': summary.traced / 1024,
+                    'peak_kb': summary.peak / 1024
+                }
+                for summary in self._snapshots
+            ]
+    
+    def _latest(self) -> Tuple[Optional[MemorySummary], Optional[MemorySummary], Optional[MemorySummary]]:
+        """最新、上一个和第一个快照汇总"""
+        with self._lock:
+            if not self._snapshots:
+                return None, None, None
+            previous = self._snapshots[-2] if len(self._snapshots) > 1 else None
+            return self._snapshots[-1], previous, self._snapshots[0]
+    
+    def subsystem_stats(self) -> List[Dict[str, Any]]:
+        """最新快照按子系统汇总的占用，以及相对上一个快照和第一个快照的变化
+        
+        Returns:
+            统计列表，按占用降序排列，大小单位为KB
+        """
+        latest, previous, first = self._latest()
+        if latest is None:
+            return []
+        rows = []
+        for subsystem in set(latest.subsystems) | (set(previous.subsystems) if previous else set()):
+            size, count = latest.subsystems.get(subsystem, (0, 0))
+            rows.append({
+                'subsystem': subsystem,
+                'size_kb': size / 1024,
+                'count': count,
+                'diff_kb': (size - previous.subsystems.get(subsystem, (0, 0))[0]) / 1024 if previous else 0.0,
+                'growth_kb': (size - first.subsystems.get(subsystem, (0, 0))[0]) / 1024
+            })
+        rows.sort(key=lambda row: row['size_kb'], reverse=True)
+        return rows
+    
+    def top_allocators(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """最新快照中占用最多的分配位置，以及相对上一个快照和第一个快照的变化
+        
+        Args:
+            limit: 返回的位置数
+        
+        Returns:
+            统计列表，按占用降序排列，大小单位为KB
+        """
+        latest, previous, first = self._latest()
+        if latest is None:
+            return []
+        ordered = sorted(latest.sites.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        rows = []
+        for site, (subsystem, size, count) in ordered:
+            rows.append({
+                'site': site,
+                'subsystem': subsystem,
+                'size_kb': size / 1024,
+                'count': count,
+                'diff_kb': (size - previous.sites.get(site, (None, 0))[1]) / 1024 if previous else 0.0,
+                'growth_kb': (size - first.sites.get(site, (None, 0))[1]) / 1024
+            })
+        return rows
+    
+    def dump(self, path: Optional[str] = None) -> str:
+        """将内存统计写入JSON文件
+        
+        Args:
+            path: 文件路径（None表示写入 logs/memory_<时间>.json）
+        
+        Returns:
+            写入的文件路径
+        """
+        if path is None:
+            log_dir = Path(__file__).parent.parent.parent / "logs"
+            log_dir.mkdir(exist_ok=True)
+            path = str(log_dir / f"memory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        rss = current_rss()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'rss_kb': rss / 1024 if rss else None,
+                'snapshots': self.snapshots(),
+                'subsystems': self.subsystem_stats(),
+                'allocators': self.top_allocators(),
+                'caches': self.cache_sizes()
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+def current_rss() -> Optional[int]:
+    """当前进程的常驻内存（字节），无法获取时返回None
+    
+    Linux 读取 /proc/self/statm；Windows 使用 GetProcessMemoryInfo；
+    macOS 等没有 /proc 的平台退回到 getrusage 的 ru_maxrss，得到的是常驻内存峰值。
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if sys.platform == 'win32':
+        return _windows_rss()
+    try:
+        import resource
+    except ImportError:
+        return None
+    try:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (OSError, ValueError):
+        return None
+    # macOS 的单位是字节，其他系统是KB
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def _windows_rss() -> Optional[int]:
+    """Windows 下当前进程的工作集大小（字节）"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+        
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        return None
+
+def text_size(texts) -> int:
+    """估算一组字符串占用的字节数"""
+    return sum(sys.getsizeof(text) for text in texts)
+
+# 全局内存分析器（由配置或"诊断"菜单开启）
+memory_profiler = MemoryProfiler()
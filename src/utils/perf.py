@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能统计模块
+记录热点操作的调用次数和耗时分布，关闭时开销仅为一次属性判断
+"""
+
+import json
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+class OperationStats:
+    """单个操作的耗时统计"""
+    
+    # 每个操作保留的最近样本数，用于计算分位数
+    MAX_SAMPLES = 2048
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+    
+    def add(self, seconds: float):
+        """添加一个样本"""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+    
+    def percentile(self, p: float) -> float:
+        """计算最近样本的分位数（秒）"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+class PerfRegistry:
+    """性能统计注册表
+    
+    除耗时统计外，还可以跟踪每个线程当前正在执行的操作（调用栈），
+    供SQL查询分析等工具将底层事件归属到最外层的界面操作或管理器调用。
+    """
+    
+    def __init__(self):
+        self._enabled = False
+        self._tracking = 0
+        # 装饰器只检查这一个属性：耗时统计或操作跟踪任一开启时为True
+        self.active = False
+        self._stats: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root_exit_callbacks: List[Callable[[str], None]] = []
+    
+    @property
+    def enabled(self) -> bool:
+        """是否记录耗时统计"""
+        return self._enabled
+    
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = bool(value)
+        self.active = self._enabled or self._tracking > 0
+    
+    def add_operation_tracker(self, on_root_exit: Callable[[str], None]):
+        """开启操作跟踪
+        
+        Args:
+            on_root_exit: 最外层操作结束时的回调，参数为操作名称（在操作所在线程中调用）
+        """
+        self._root_exit_callbacks.append(on_root_exit)
+        self._tracking += 1
+        self.active = True
+    
+    def remove_operation_tracker(self, on_root_exit: Callable[[str], None]):
+        """关闭由 add_operation_tracker 开启的操作跟踪"""
+        if on_root_exit in self._root_exit_callbacks:
+            self._root_exit_callbacks.remove(on_root_exit)
+            self._tracking -= 1
+            self.active = self._enabled or self._tracking > 0
+    
+    def current_operation(self) -> Optional[str]:
+        """当前线程最外层正在执行的操作名称"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[0] if stack else None
+    
+    def _enter(self, name: str):
+        """进入一个操作"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+    
+    def _exit(self, name: str, seconds: float):
+        """离开一个操作"""
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack.pop()
+        if self._enabled:
+            self.record(name, seconds)
+        if not stack:
+            for callback in list(self._root_exit_callbacks):
+                callback(name)
+    
+    def record(self, name: str, seconds: float):
+        """记录一次操作耗时
+        
+        Args:
+            name: 操作名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = OperationStats()
+            stats.add(seconds)
+    
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._stats.clear()
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """获取所有操作的统计摘要，按总耗时降序排列
+        
+        Returns:
+            统计列表，时间单位为毫秒
+        """
+        with self._lock:
+            items = list(self._stats.items())
+            rows = [
+                {
+                    'name': name,
+                    'count': stats.count,
+                    'total_ms': stats.total * 1000,
+                    'p50_ms': stats.percentile(50) * 1000,
+                    'p95_ms': stats.percentile(95) * 1000,
+                    'p99_ms': stats.percentile(99) * 1000,
+                    'max_ms': stats.max * 1000
+                }
+                for name, stats in items
+            ]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+    
+    def dump(self, path: Optional[str] = None) -> str:
+        """将统计摘要写入JSON文件
+        
+        Args:
+            path: 文件路径（None表示写入 logs/perf_<时间>.json）
+        
+        Returns:
+            写入的文件路径
+        """
+        if path is None:
+            log_dir = Path(__file__).parent.parent.parent / "logs"
+            log_dir.mkdir(exist_ok=True)
+            path = str(log_dir / f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'operations': self.snapshot()
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+# 全局性能统计注册表
+perf = PerfRegistry()
+
+def timed(name: Optional[str] = None) -> Callable:
+    """记录函数耗时的装饰器
+    
+    Args:
+        name: 操作名称（默认为 模块.函数限定名）
+    """
+    def decorator(func: Callable) -> Callable:
+        operation = name or f"{func.__module__}.{func.__qualname__}"
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not perf.active:
+                return func(*args, **kwargs)
+            perf._enter(operation)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                perf._exit(operation, perf_counter() - start)
+        return wrapper
+    return decorator
+
+@contextmanager
+def measure(name: str):
+    """记录代码块耗时的上下文管理器
+    
+    Args:
+        name: 操作名称
+    """
+    if not perf.active:
+        yield
+        return
+    perf._enter(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        perf._exit(name, perf_counter() - start)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动分析模块
+以 --profile-startup 启动时统计从进程启动到主窗口首次绘制的各阶段耗时和模块导入耗时，
+输出报告后退出。本模块只依赖标准库，以免自身的导入影响统计结果
+"""
+
+import builtins
+import importlib.util
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+class StartupProfiler:
+    """启动耗时分析器
+    
+    导入耗时通过替换 builtins.__import__ 统计：只记录主线程中首次导入的模块，
+    每个模块记录累计耗时（包括其导入的其他模块）和自身耗时，与 python -X importtime 的口径相同。
+    初始化耗时分为 phase() 标记的启动阶段和启动期间 @timed 记录的操作两部分。
+    """
+    
+    def __init__(self):
+        self.running = False
+        self._started_at = 0.0
+        self._thread = None
+        self._original_import = None
+        self._stack: List[List[Any]] = []  # 正在导入的模块: [模块名, 开始时间, 子模块耗时]
+        self.imports: List[Dict[str, Any]] = []
+        self.phases: List[Dict[str, Any]] = []
+        self.first_paint_ms: Optional[float] = None
+    
+    def start(self):
+        """开始统计（应在导入界面模块之前调用）"""
+        if self.running:
+            return
+        self.running = True
+        self._started_at = perf_counter()
+        self._thread = threading.get_ident()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+    
+    def stop(self):
+        """停止统计导入耗时"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        self.running = False
+    
+    def elapsed_ms(self) -> float:
+        """从开始统计到现在的毫秒数"""
+        return (perf_counter() - self._started_at) * 1000
+    
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """记录首次导入的模块的耗时"""
+        original = self._original_import
+        if threading.get_ident() != self._thread:
+            return original(name, globals, locals, fromlist, level)
+        module = name
+        if level:
+            try:
+                package = (globals or {}).get('__package__') or ''
+                module = importlib.util.resolve_name('.' * level + name, package)
+            except (ImportError, ValueError):
+                return original(name, globals, locals, fromlist, level)
+        if module in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        
+        frame = [module, perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            self._stack.pop()
+            cumulative = perf_counter() - frame[1]
+            if self._stack:
+                self._stack[-1][2] += cumulative
+            self.imports.append({
+                'module': module,
+                'self_ms': (cumulative - frame[2]) * 1000,
+                'cumulative_ms': cumulative * 1000,
+                'depth': len(self._stack)
+            })
+    
+    @contextmanager
+    def phase(self, name: str):
+        """记录一个启动阶段的耗时（未开始统计时不记录）
+        
+        Args:
+            name: 阶段名称
+        """
+        if not self.running:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'name': name,
+                'start_ms': (start - self._started_at) * 1000,
+                'duration_ms': (perf_counter() - start) * 1000
+            })
+    
+    def mark_first_paint(self):
+        """记录主窗口首次绘制的时间"""
+        if self.first_paint_ms is None:
+            self.first_paint_ms = self.elapsed_ms()
+    
+    def import_summary(self) -> List[Dict[str, Any]]:
+        """按顶层包汇总的导入耗时（自身耗时之和），按耗时降序排列"""
+        packages: Dict[str, Dict[str, Any]] = {}
+        for item in self.imports:
+            package = item['module'].split('.')[0]
+            row = packages.setdefault(package, {'package': package, 'modules': 0, 'self_ms': 0.0})
+            row['modules'] += 1
+            row['self_ms'] += item['self_ms']
+        return sorted(packages.values(), key=lambda row: row['self_ms'], reverse=True)
+    
+    def slowest_imports(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """累计耗时最长的模块"""
+        return sorted(self.imports, key=lambda item: item['cumulative_ms'], reverse=True)[:limit]
+    
+    def report(self, operations: Optional[List[Dict[str, Any]]] = None) -> str:
+        """生成文本报告
+        
+        Args:
+            operations: 启动期间 @timed 记录的操作（perf.snapshot() 的返回值）
+        
+        Returns:
+            报告文本
+        """
+        total_import = sum(item['self_ms'] for item in self.imports)
+        lines = ["启动分析"]
+        if self.first_paint_ms is not None:
+            lines.append(f"  首次绘制: {self.first_paint_ms:.1f} ms")
+        lines.append(f"  模块导入: {total_import:.1f} ms（{len(self.imports)}个模块）")
+        
+        lines.append("")
+        lines.append("启动阶段                            开始(ms)    耗时(ms)")
+        for row in self.phases:
+            lines.append(f"  {row['name']:<30} {row['start_ms']:>10.1f} {row['duration_ms']:>10.1f}")
+        
+        lines.append("")
+        lines.append("按包统计导入耗时                    模块数    自身(ms)")
+        for row in self.import_summary()[:15]:
+            lines.append(f"  {row['package']:<30} {row['modules']:>8} {row['self_ms']:>10.1f}")
+        
+        lines.append("")
+        lines.append("累计耗时最长的导入                  自身(ms)    累计(ms)")
+        for item in self.slowest_imports():
+            name = "  " * min(item['depth'], 4) + item['module']
+            lines.append(f"  {name:<30} {item['self_ms']:>10.1f} {item['cumulative_ms']:>10.1f}")
+        
+        if operations:
+            lines.append("")
+            lines.append("初始化操作                          次数      总计(ms)")
+            for row in operations:
+                lines.append(f"  {row['name']:<30} {row['count']:>8} {row['total_ms']:>10.1f}")
+        return "\n".join(lines)
+    
+    def dump(self, operations: Optional[List[Dict[str, Any]]] = None, path: Optional[str] = None) -> str:
+        """将分析结果写入JSON文件
+        
+        Args:
+            operations: 启动期间 @timed 记录的操作
+            path: 文件路径（None表示写入 logs/startup_<时间>.json）
+        
+        Returns:
+            写入的文件路径
+        """
+        if path is None:
+            log_dir = Path(__file__).parent.parent.parent / "logs"
+            log_dir.mkdir(exist_ok=True)
+            path = str(log_dir / f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'first_paint_ms': self.first_paint_ms,
+                'phases': self.phases,
+                'packages': self.import_summary(),
+                'imports': self.imports,
+                'operations': operations or []
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+# 全局启动分析器（以 --profile-startup 启动时开启）
+startup_profiler = StartupProfiler()
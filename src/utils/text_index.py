@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存文本索引模块
+为短文本（项目名称、描述等）建立 n-gram 倒排索引，支持边输入边过滤的子串搜索
+"""
+
+import sys
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from utils.memory import text_size
+
+class NgramIndex:
+    """n-gram 倒排索引
+    
+    为每个文档的所有单字和相邻双字建立倒排表。查询时取查询词各双字（单字查询取单字）
+    倒排表的交集作为候选，再逐个确认包含查询词，因此支持任意位置的子串匹配（包括前缀），
+    中文不需要分词。多个以空格分隔的查询词之间为"与"的关系。
+    """
+    
+    def __init__(self):
+        self._texts: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def add(self, key: Hashable, *texts: Optional[str]):
+        """添加或替换一个文档
+        
+        Args:
+            key: 文档键
+            texts: 文档的各个字段（None 忽略），字段之间不会组成跨字段的匹配
+        """
+        self.remove(key)
+        text = "\n".join(text for text in texts if text).casefold()
+        self._texts[key] = text
+        for gram in self._grams(text):
+            self._postings.setdefault(gram, set()).add(key)
+    
+    def remove(self, key: Hashable):
+        """移除一个文档（不存在时忽略）"""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in self._grams(text):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+    
+    def clear(self):
+        """清空索引"""
+        self._texts.clear()
+        self._postings.clear()
+    
+    def search(self, query: str) -> Optional[Set[Hashable]]:
+        """搜索包含所有查询词的文档
+        
+        Args:
+            query: 查询文本，以空白分隔多个查询词，不区分大小写
+        
+        Returns:
+            匹配的文档键集合；查询为空时返回None（表示不过滤）
+        """
+        terms = query.casefold().split()
+        if not terms:
+            return None
+        result = None
+        for term in terms:
+            matched = self._search_term(term)
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result
+    
+    def _search_term(self, term: str) -> Set[Hashable]:
+        """搜索包含单个查询词的文档"""
+        grams = [term] if len(term) == 1 else [term[i:i + 2] for i in range(len(term) - 1)]
+        postings = []
+        for gram in set(grams):
+            keys = self._postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        # 从最短的倒排表开始求交集
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+            if not candidates:
+                return candidates
+        if len(term) <= 2:
+            return candidates
+        return {key for key in candidates if term in self._texts[key]}
+    
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        """文本的所有单字和相邻双字"""
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+    
+    def memory_usage(self) -> Tuple[int, int]:
+        """索引的 (文档数, 估算字节数)，供内存分析使用"""
+        postings = sum(sys.getsizeof(keys) for keys in self._postings.values())
+        return len(self._texts), text_size(self._texts.values()) + text_size(self._postings) + postings
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+测试公共配置
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from database.migrations import DatabaseMigration
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    """已执行迁移的临时数据库路径"""
+    path = str(tmp_path / "test.db")
+    assert DatabaseMigration(path).migrate()
+    return path
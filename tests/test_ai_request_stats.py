@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI调用统计测试
+主动取消的调用（如被按键打断的行内建议）单独计数，不计入失败次数
+"""
+
+from database.operations import DatabaseManager
+
+def test_cancelled_requests_not_counted_as_errors(db_path):
+    """cancelled 不计入 errors"""
+    db = DatabaseManager(db_path)
+    for outcome in ('ok', 'ok', 'cancelled', 'cancelled', 'cancelled', 'error', 'timeout'):
+        assert db.add_ai_request_log({'model': "deepseek-chat", 'outcome': outcome}, operation='suggest')
+    
+    stats = db.get_ai_request_stats('model', days=0)
+    assert len(stats) == 1
+    row = stats[0]
+    assert row['requests'] == 7
+    assert row['errors'] == 2
+    assert row['cancelled'] == 3
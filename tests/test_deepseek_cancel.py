@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI请求取消和重试测试
+使用本地模拟服务，确认取消后不再重试，正在读取的流式响应由取消方直接断开，
+以及重试后的流式请求仍记录真实的首字时间
+"""
+
+import threading
+import time
+
+from ai_services.deepseek import CancelToken, DeepSeekAIService
+from tools.stub_llm_server import StubLLMServer, StubOptions
+
+MESSAGES = [{'role': 'user', 'content': "你好"}]
+
+def _cancel_during(options: StubOptions, delay: float, token: CancelToken):
+    """请求开始 delay 秒后取消，返回 (取消后到返回的秒数, 返回值, 调用记录)"""
+    records = []
+    with StubLLMServer(options=options) as server:
+        service = DeepSeekAIService("test", api_url=server.url, timeout=30, telemetry=records.append)
+        timer = threading.Timer(delay, token.cancel)
+        timer.start()
+        start = time.perf_counter()
+        result = service.chat_stream(MESSAGES, 200, is_cancelled=token)
+        timer.join()
+    return time.perf_counter() - start - delay, result, records[0]
+
+def test_cancel_stops_retry_backoff():
+    """重试等待期间取消，立即返回且不再重试"""
+    elapsed, result, record = _cancel_during(StubOptions(error_rate=1.0), 0.3, CancelToken())
+    assert elapsed < 0.5
+    assert "error" in result
+    assert record['outcome'] == 'cancelled'
+    assert record['retries'] == 0
+
+def test_cancel_closes_stream():
+    """读取流式响应时取消，不必等到下一个增量"""
+    elapsed, result, record = _cancel_during(StubOptions(tokens_per_second=1), 1.2, CancelToken())
+    assert elapsed < 0.5
+    assert "error" in result
+    assert record['outcome'] == 'cancelled'
+
+def test_cancel_callable_stops_retry_backoff():
+    """普通的取消检查函数同样在重试等待期间生效"""
+    cancelled = threading.Event()
+    records = []
+    with StubLLMServer(options=StubOptions(error_rate=1.0)) as server:
+        service = DeepSeekAIService("test", api_url=server.url, timeout=30, telemetry=records.append)
+        threading.Timer(0.3, cancelled.set).start()
+        start = time.perf_counter()
+        service.chat_stream(MESSAGES, 200, is_cancelled=cancelled.is_set)
+    assert time.perf_counter() - start < 1.0
+    assert records[0]['outcome'] == 'cancelled'
+
+def test_stream_ttft_after_retry():
+    """429 重试后的首字时间取自流式响应的第一个增量，而不是错误响应"""
+    records = []
+    with StubLLMServer(options=StubOptions(ttft=0.3, rate_limit_rate=1.0)) as server:
+        service = DeepSeekAIService("test", api_url=server.url, timeout=30, telemetry=records.append)
+        service.RETRY_DELAY = 0
+        wait_before_retry = service._wait_before_retry
+        
+        def recover(*args):
+            # 第一次请求返回429，之后恢复正常
+            server.options.rate_limit_rate = 0.0
+            wait_before_retry(*args)
+        
+        service._wait_before_retry = recover
+        result = service.chat_stream(MESSAGES, 200)
+    assert "error" not in result
+    assert records[0]['retries'] == 1
+    assert records[0]['ttft_ms'] >= 300
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+对话历史测试
+失败、取消等提示消息以 error 角色保存；保留策略的 max_messages 按作用域分别计算，归档记录包含作用域
+"""
+
+import json
+from pathlib import Path
+
+from sqlalchemy import text
+
+from database.migrations import DatabaseMigration
+from database.operations import DatabaseManager
+
+def _add_messages(db: DatabaseManager, count: int, chapter_id=None, project_id=None):
+    for i in range(count):
+        db.add_dialog_history("user" if i % 2 == 0 else "ai", f"消息{i}",
+                              project_id=project_id, chapter_id=chapter_id)
+
+def test_max_messages_per_scope(db_path):
+    """一个章节的大量对话不会挤掉其他章节的记录"""
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    busy = db.create_chapter(project.id, "第1章")
+    quiet = db.create_chapter(project.id, "第2章")
+    _add_messages(db, 4, chapter_id=quiet.id)
+    _add_messages(db, 20, chapter_id=busy.id)
+    
+    assert db.apply_dialog_retention(max_messages=5, archive=False) == 15
+    assert len(db.get_dialog_history_page(limit=100, chapter_id=busy.id)) == 5
+    assert len(db.get_dialog_history_page(limit=100, chapter_id=quiet.id)) == 4
+    # 保留的是最新的记录
+    assert db.get_dialog_history_page(limit=100, chapter_id=busy.id)[-1].content == "消息19"
+
+def test_archive_includes_scope(db_path):
+    """归档记录包含项目和章节ID"""
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    chapter = db.create_chapter(project.id, "第1章")
+    _add_messages(db, 3, chapter_id=chapter.id)
+    
+    assert db.apply_dialog_retention(max_messages=1) == 2
+    archives = list((Path(db_path).parent / "archives").glob("ai_dialog_history_*.jsonl"))
+    assert len(archives) == 1
+    lines = [json.loads(line) for line in archives[0].read_text(encoding='utf-8').splitlines()]
+    assert [line['content'] for line in lines] == ["消息0", "消息1"]
+    assert all(line['chapter_id'] == chapter.id for line in lines)
+    assert all(line['project_id'] == project.id for line in lines)
+
+def test_migration_marks_placeholders_as_error(tmp_path):
+    """迁移将已保存的失败提示改为 error 角色"""
+    path = str(tmp_path / "old.db")
+    migration = DatabaseMigration(path)
+    assert migration.migrate(9)
+    db = DatabaseManager(path)
+    db.add_dialog_history("user", "写一段")
+    db.add_dialog_history("ai", "错误：AI 内容生成失败：生成已取消")
+    db.add_dialog_history("ai", "生成的内容为空")
+    db.add_dialog_history("ai", "正常的回复")
+    
+    assert migration.migrate()
+    with db.engine.connect() as conn:
+        roles = [row[0] for row in conn.execute(text("SELECT role FROM ai_dialog_history ORDER BY id"))]
+    assert roles == ["user", "error", "error", "ai"]
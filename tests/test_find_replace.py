@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+全局查找替换测试
+替换和撤销在单个事务中进行，取消时整体回滚；撤销不覆盖替换后又被编辑过的章节
+"""
+
+from core.find_replace import FindReplaceEngine
+from database.operations import DatabaseManager
+
+def _build_project(db_path: str, chapters: int = 3):
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    ids = [db.create_chapter(project.id, f"第{i + 1}章", content=f"张三走进了第{i + 1}间屋子。").id
+           for i in range(chapters)]
+    return db, project.id, ids
+
+def _contents(db: DatabaseManager, ids):
+    return [db.get_chapter(chapter_id).content for chapter_id in ids]
+
+def test_apply_and_undo(db_path):
+    """替换后撤销恢复原内容"""
+    db, project_id, ids = _build_project(db_path)
+    original = _contents(db, ids)
+    engine = FindReplaceEngine(db_path)
+    batch_id, count = engine.apply(project_id, engine.compile_pattern("张三"), "李四")
+    assert count == 3
+    assert all(content.startswith("李四") for content in _contents(db, ids))
+    
+    assert engine.undo(batch_id) == (3, [])
+    assert _contents(db, ids) == original
+
+def test_undo_skips_chapters_edited_after_replace(db_path):
+    """替换后又被编辑过的章节不恢复"""
+    db, project_id, ids = _build_project(db_path)
+    engine = FindReplaceEngine(db_path)
+    batch_id, _ = engine.apply(project_id, engine.compile_pattern("张三"), "李四")
+    db.update_chapter(ids[1], content="替换后重新写的内容。")
+    
+    restored, skipped = engine.undo(batch_id)
+    assert restored == 2
+    assert skipped == ["第2章"]
+    contents = _contents(db, ids)
+    assert contents[0].startswith("张三")
+    assert contents[1] == "替换后重新写的内容。"
+
+def test_cancelled_apply_rolls_back(db_path):
+    """中途取消替换时不修改任何章节"""
+    db, project_id, ids = _build_project(db_path, chapters=5)
+    original = _contents(db, ids)
+    engine = FindReplaceEngine(db_path)
+    processed = []
+    result = engine.apply(project_id, engine.compile_pattern("张三"), "李四",
+                          progress=lambda done, total: processed.append(done),
+                          is_cancelled=lambda: len(processed) >= 2)
+    assert result is None
+    assert _contents(db, ids) == original
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQL查询数量回归测试
+在 QueryProfiler 下执行典型的管理器调用，语句数随数据量增长时（N+1查询）测试失败
+"""
+
+from core.project import ProjectManager
+from database.operations import DatabaseManager
+from database.profiler import QueryProfiler
+
+PROJECTS = 5
+CHAPTERS_PER_PROJECT = 20
+
+def _build_library(db_path: str) -> DatabaseManager:
+    """创建若干项目，每个项目若干章节"""
+    db = DatabaseManager(db_path)
+    for p in range(PROJECTS):
+        project = db.create_project(f"项目{p}")
+        for c in range(CHAPTERS_PER_PROJECT):
+            db.create_chapter(project.id, f"第{c + 1}章", content="正文" * 10)
+    return db
+
+def test_chapter_summaries_single_statement(db_path):
+    """分页获取章节摘要只执行一条语句"""
+    db = _build_library(db_path)
+    project_id = db.get_all_projects()[0].id
+    
+    with QueryProfiler() as profiler:
+        page = db.get_chapter_summaries(project_id, limit=10)
+        db.get_chapter_summaries(project_id, after=(page[-1][2], page[-1][0]), limit=10)
+    
+    stats = profiler.action_stats("db.get_chapter_summaries")
+    assert stats is not None
+    assert stats['invocations'] == 2
+    assert stats['max_statements'] == 1
+    assert profiler.statement_count == 2
+    assert not profiler.warnings
+
+def test_project_listing_statement_count_constant(db_path):
+    """项目列表（含章节数）的语句数不随项目数增长"""
+    _build_library(db_path)
+    manager = ProjectManager(db_path)
+    
+    with QueryProfiler() as profiler:
+        projects = manager.get_all_projects()
+    
+    assert len(projects) == PROJECTS
+    assert all(project['chapter_count'] == CHAPTERS_PER_PROJECT for project in projects)
+    stats = profiler.action_stats("core.get_all_projects")
+    assert stats is not None
+    assert stats['max_statements'] <= 2
+    assert not profiler.warnings
+
+def test_project_summaries_single_statement(db_path):
+    """项目摘要用一次聚合查询获取"""
+    db = _build_library(db_path)
+    
+    with QueryProfiler() as profiler:
+        summaries = db.get_project_summaries()
+    
+    assert len(summaries) == PROJECTS
+    assert profiler.statement_count == 1
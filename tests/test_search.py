@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+章节全文检索测试
+FTS索引随章节的增删改同步（触发器见迁移版本4），少于3个字的关键词退回到 LIKE 匹配
+"""
+
+from database.operations import DatabaseManager
+
+def _chapter_ids(results):
+    return [result['chapter_id'] for result in results]
+
+def test_fts_follows_insert_update_delete(db_path):
+    """新建、修改和删除章节后索引同步更新"""
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    chapter = db.create_chapter(project.id, "第一章", content="月光洒在青石板路上。")
+    
+    results = db.search("青石板")
+    assert _chapter_ids(results) == [chapter.id]
+    assert "【青石板】" in results[0]['snippet']
+    
+    db.update_chapter(chapter.id, content="雨水打湿了屋檐。")
+    assert db.search("青石板") == []
+    assert _chapter_ids(db.search("打湿了")) == [chapter.id]
+    
+    db.update_chapter(chapter.id, title="雨夜归人")
+    assert _chapter_ids(db.search("雨夜归")) == [chapter.id]
+    
+    db.delete_chapter(chapter.id)
+    assert db.search("打湿了") == []
+    assert db.search("雨夜归") == []
+
+def test_short_term_fallback_highlights_match(db_path):
+    """短关键词的片段与FTS一样用【】标出关键词"""
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    content = "前" * 40 + "月光" + "后" * 40
+    chapter = db.create_chapter(project.id, "第一章", content=content)
+    
+    results = db.search("月光")
+    assert _chapter_ids(results) == [chapter.id]
+    snippet = results[0]['snippet']
+    assert "【月光】" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) < len(content)
+
+def test_short_term_fallback_title_only(db_path):
+    """关键词只出现在标题中时，片段使用标题"""
+    db = DatabaseManager(db_path)
+    project = db.create_project("项目")
+    db.create_chapter(project.id, "雨夜", content="这一章的正文里没有这个词。")
+    
+    results = db.search("雨夜")
+    assert len(results) == 1
+    assert results[0]['snippet'] == "【雨夜】"
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+开发工具
+用于负载测试、规模测试等场景的辅助脚本
+"""
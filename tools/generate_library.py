@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成章节库生成器
+按给定的项目数、章节数、章节长度分布、中文文本统计特征和对话历史规模，
+通过批量插入生成 writing_assistant.db 格式的数据库。相同的种子生成相同的内容。
+
+用法：
+    python tools/generate_library.py --output data/large.db --projects 3 --chapters 2000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加src目录到Python路径
+src_path = Path(__file__).parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from sqlalchemy import create_engine, insert, text
+
+from database.migrations import DatabaseMigration
+from database.models import AIDialogHistory, Chapter, Project
+from utils.logger import logger
+
+# 按常见程度排列的汉字，按齐普夫分布取样以接近真实文本的字频
+COMMON_CHARS = (
+    "的一是了不在有人这他我中来上大为和国地到以说时要就出会可也你对生能而子那得于着下自之"
+    "年过发后作里用道行所然家种事成方多经么去法学如都同现当没动面起看定天分还进好小部其些"
+    "主样理心她本前开但因只从想实日军者意无力它与长把机十民第公此已工使情明性知全三又关点"
+    "正业外将两高间由问很最重并物手应战向头文体政美相见被利什二等产或新己制身果加西斯月话"
+    "合回特代内信表化老给世位次度门任常先海通教儿原东声提立及比员解水名真论处走义各入几口"
+    "认条平系气题活尔更别打女变四神总何电数安少报才结反受目太量再感建务做接必场件计管期市"
+    "直德资命山金指克许统区保至队形社便空决治展马科司五基眼书非则听白却界达光放强即像难且"
+    "权思王象完设式色路记南品住告类求据程北边死张该交规万取拉格望觉术领共确传师观清今切院"
+    "让识候带导争运笑飞风步改收根干造言联持组每济车亲极林服快办议往元英士证近失转夫令准布"
+)
+
+# 句末标点及其权重
+SENTENCE_ENDINGS = "。。。。。。！？…"
+
+class LibraryGenerator:
+    """合成章节库生成器"""
+    
+    def __init__(self, seed: int = 42, median_chars: int = 3000, sigma: float = 0.6,
+                 huge_ratio: float = 0.0, huge_chars: int = 2_000_000, zipf: float = 1.0,
+                 sentence_chars: int = 18, dialogue_ratio: float = 0.25,
+                 paragraph_sentences: int = 5):
+        """初始化生成器
+        
+        Args:
+            seed: 随机种子
+            median_chars: 章节字数的中位数
+            sigma: 章节字数对数正态分布的σ（0表示所有章节等长）
+            huge_ratio: 超长章节（如整本书粘贴进一个章节）的比例
+            huge_chars: 超长章节的字数
+            zipf: 字频齐普夫分布的指数（越大高频字越集中）
+            sentence_chars: 平均句长（字）
+            dialogue_ratio: 对白句（带引号）的比例
+            paragraph_sentences: 平均每段句数
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.median_chars = median_chars
+        self.sigma = sigma
+        self.huge_ratio = huge_ratio
+        self.huge_chars = huge_chars
+        self.sentence_chars = sentence_chars
+        self.dialogue_ratio = dialogue_ratio
+        self.paragraph_sentences = paragraph_sentences
+        self._chars = list(COMMON_CHARS)
+        self._cum_weights = []
+        total = 0.0
+        for rank in range(len(self._chars)):
+            total += 1.0 / (rank + 1) ** zipf
+            self._cum_weights.append(total)
+    
+    def chapter_length(self) -> int:
+        """按长度分布取一个章节字数"""
+        if self.huge_ratio and self.rng.random() < self.huge_ratio:
+            return self.huge_chars
+        if self.sigma <= 0:
+            return self.median_chars
+        return max(1, int(self.rng.lognormvariate(math.log(self.median_chars), self.sigma)))
+    
+    def text(self, length: int) -> str:
+        """生成指定长度的中文正文
+        
+        Args:
+            length: 字数（含标点和换行）
+        
+        Returns:
+            str: 由句子和段落组成的正文
+        """
+        rng = self.rng
+        # 一次取出全部正文字符，再按句长切分并加上标点
+        chars = rng.choices(self._chars, cum_weights=self._cum_weights, k=length)
+        endings = rng.choices(SENTENCE_ENDINGS, k=length // self.sentence_chars + 1)
+        parts = []
+        position = 0
+        sentence_index = 0
+        sentences_left = self._paragraph_length()
+        while position < length:
+            n = int(rng.expovariate(1.0 / self.sentence_chars)) + 2
+            words = "".join(chars[position:position + n])
+            position += n
+            if n > 10:
+                # 长句中间加一个逗号
+                cut = rng.randint(4, n - 4)
+                words = f"{words[:cut]}，{words[cut:]}"
+            sentence = words + endings[sentence_index % len(endings)]
+            sentence_index += 1
+            if rng.random() < self.dialogue_ratio:
+                sentence = f"“{sentence}”"
+            parts.append(sentence)
+            sentences_left -= 1
+            if sentences_left <= 0:
+                parts.append("\n\n")
+                sentences_left = self._paragraph_length()
+        return "".join(parts)[:length]
+    
+    def _paragraph_length(self) -> int:
+        """随机取一个段落的句数"""
+        return max(1, int(self.rng.expovariate(1.0 / self.paragraph_sentences)) + 1)
+    
+    def generate(self, db_path: str, projects: int = 1, chapters: int = 100,
+                 chapter_spread: float = 0.0, dialog_messages: int = 0,
+                 batch_size: int = 500,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """生成章节库
+        
+        Args:
+            db_path: 数据库文件路径（表结构由迁移创建，已有数据会保留）
+            projects: 项目数
+            chapters: 每个项目的平均章节数
+            chapter_spread: 各项目章节数的相对浮动（0.5表示在 ±50% 内均匀分布）
+            dialog_messages: 每个章节的平均对话历史消息数
+            batch_size: 每批插入的行数
+            progress: 进度回调，参数为已生成章节数和章节总数
+        
+        Returns:
+            Dict[str, Any]: 生成结果，包含 projects（每项含 id 和 chapter_ids）、
+                chapters、characters、dialog_messages 和 seconds
+        """
+        start = perf_counter()
+        DatabaseMigration(db_path).migrate()
+        engine = create_engine(f"sqlite:///{db_path}")
+        
+        rng = self.rng
+        counts = [
+            max(1, int(chapters * (1 + rng.uniform(-chapter_spread, chapter_spread))))
+            for _ in range(projects)
+        ]
+        total_chapters = sum(counts)
+        now = datetime.now()
+        summary = {'projects': [], 'chapters': 0, 'characters': 0, 'dialog_messages': 0}
+        
+        with engine.begin() as conn:
+            # 生成期间不需要断电保护，关闭同步写入以加快批量插入
+            conn.execute(text("PRAGMA synchronous = OFF"))
+            # 批量写入期间推迟全文索引的段合并（由触发器逐行写入），完成后恢复默认值
+            conn.execute(text("INSERT INTO chapters_fts(chapters_fts, rank) VALUES ('automerge', 0)"))
+            conn.execute(text("INSERT INTO chapters_fts(chapters_fts, rank) VALUES ('crisismerge', 64)"))
+            for project_index, chapter_count in enumerate(counts):
+                project_id = conn.execute(insert(Project).values(
+                    name=f"合成项目{project_index + 1}",
+                    description=f"合成数据（种子{self.seed}，{chapter_count}章）",
+                    created_at=now,
+                    updated_at=now
+                )).inserted_primary_key[0]
+                
+                for batch_start in range(0, chapter_count, batch_size):
+                    rows = []
+                    for order in range(batch_start, min(batch_start + batch_size, chapter_count)):
+                        content = self.text(self.chapter_length())
+                        summary['characters'] += len(content)
+                        created_at = now - timedelta(minutes=chapter_count - order)
+                        rows.append({
+                            'project_id': project_id,
+                            'title': f"第{order + 1}章",
+                            'content': content,
+                            'order': order,
+                            'created_at': created_at,
+                            'updated_at': created_at
+                        })
+                    conn.execute(insert(Chapter), rows)
+                    summary['chapters'] += len(rows)
+                    if progress:
+                        progress(summary['chapters'], total_chapters)
+                
+                chapter_ids = [row[0] for row in conn.execute(
+                    text('SELECT id FROM chapters WHERE project_id = :project_id ORDER BY "order"'),
+                    {'project_id': project_id}
+                )]
+                if dialog_messages:
+                    summary['dialog_messages'] += self._insert_dialog_history(
+                        conn, project_id, chapter_ids, dialog_messages, now, batch_size
+                    )
+                summary['projects'].append({'id': project_id, 'chapter_ids': chapter_ids})
+            conn.execute(text("INSERT INTO chapters_fts(chapters_fts, rank) VALUES ('automerge', 4)"))
+            conn.execute(text("INSERT INTO chapters_fts(chapters_fts, rank) VALUES ('crisismerge', 16)"))
+        engine.dispose()
+        
+        summary['seconds'] = perf_counter() - start
+        return summary
+    
+    def _insert_dialog_history(self, conn, project_id: int, chapter_ids: List[int],
+                               mean_messages: int, now: datetime, batch_size: int) -> int:
+        """为项目的各章节插入对话历史，返回插入的消息数"""
+        rng = self.rng
+        rows = []
+        inserted = 0
+        # 时间戳从最早的章节到最近均匀分布在过去一年内
+        step = timedelta(days=365) / max(len(chapter_ids), 1)
+        for index, chapter_id in enumerate(chapter_ids):
+            count = int(rng.expovariate(1.0 / mean_messages)) if mean_messages else 0
+            base_time = now - step * (len(chapter_ids) - index)
+            for i in range(count):
+                role = 'user' if i % 2 == 0 else 'ai'
+                length = rng.randint(10, 60) if role == 'user' else rng.randint(100, 800)
+                rows.append({
+                    'project_id': project_id,
+                    'chapter_id': chapter_id,
+                    'role': role,
+                    'content': self.text(length),
+                    'created_at': base_time + timedelta(seconds=30 * i)
+                })
+            if len(rows) >= batch_size:
+                conn.execute(insert(AIDialogHistory), rows)
+                inserted += len(rows)
+                rows = []
+        if rows:
+            conn.execute(insert(AIDialogHistory), rows)
+            inserted += len(rows)
+        return inserted
+
+def main(argv=None) -> int:
+    """命令行入口函数"""
+    parser = argparse.ArgumentParser(description="生成用于负载测试的合成章节库")
+    parser.add_argument('--output', required=True, help="数据库文件路径")
+    parser.add_argument('--force', action='store_true', help="覆盖已存在的数据库文件")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--projects', type=int, default=1, help="项目数")
+    parser.add_argument('--chapters', type=int, default=1000, help="每个项目的平均章节数")
+    parser.add_argument('--chapter-spread', type=float, default=0.0,
+                        help="各项目章节数的相对浮动（0~1）")
+    parser.add_argument('--median-chars', type=int, default=3000, help="章节字数中位数")
+    parser.add_argument('--sigma', type=float, default=0.6, help="章节字数对数正态分布的σ")
+    parser.add_argument('--huge-ratio', type=float, default=0.0, help="超长章节的比例")
+    parser.add_argument('--huge-chars', type=int, default=2_000_000, help="超长章节的字数")
+    parser.add_argument('--zipf', type=float, default=1.0, help="字频齐普夫分布的指数")
+    parser.add_argument('--sentence-chars', type=int, default=18, help="平均句长")
+    parser.add_argument('--dialogue-ratio', type=float, default=0.25, help="对白句比例")
+    parser.add_argument('--paragraph-sentences', type=int, default=5, help="平均每段句数")
+    parser.add_argument('--dialog-messages', type=int, default=0, help="每章平均对话历史消息数")
+    args = parser.parse_args(argv)
+    
+    # 只输出警告以上的日志（迁移等步骤的INFO日志会打断进度显示）
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    if os.path.exists(args.output):
+        if not args.force:
+            print(f"文件已存在: {args.output}（使用 --force 覆盖）")
+            return 1
+        os.remove(args.output)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    
+    generator = LibraryGenerator(
+        seed=args.seed,
+        median_chars=args.median_chars,
+        sigma=args.sigma,
+        huge_ratio=args.huge_ratio,
+        huge_chars=args.huge_chars,
+        zipf=args.zipf,
+        sentence_chars=args.sentence_chars,
+        dialogue_ratio=args.dialogue_ratio,
+        paragraph_sentences=args.paragraph_sentences
+    )
+    
+    def report(done: int, total: int):
+        print(f"\r生成章节: {done}/{total}", end="", flush=True)
+    
+    summary = generator.generate(
+        args.output,
+        projects=args.projects,
+        chapters=args.chapters,
+        chapter_spread=args.chapter_spread,
+        dialog_messages=args.dialog_messages,
+        progress=report
+    )
+    size_mb = os.path.getsize(args.output) / 1024 / 1024
+    print(f"\n完成: {len(summary['projects'])}个项目，{summary['chapters']}章，"
+          f"{summary['characters']}字，{summary['dialog_messages']}条对话历史，"
+          f"{size_mb:.1f}MB，用时{summary['seconds']:.1f}秒")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
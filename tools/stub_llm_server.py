@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地 OpenAI 兼容的模拟大模型服务
+实现 DeepSeekAIService 使用的 /v1/chat/completions 接口（含 SSE 流式输出和
+reasoning_content），可配置首字延迟、生成速度和用量字段，并可按比例注入
+429、5xx 和超时故障。用于离线测试和负载测试。
+
+用法：
+    python tools/stub_llm_server.py --port 8000 --ttft 0.8 --tps 40 --error-rate 0.05
+    然后将 config/config.yaml 中 ai_services 的 api_url 指向
+    http://127.0.0.1:8000/v1/chat/completions
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# 默认的回复内容（按需循环拼接到要求的长度）
+DEFAULT_REPLY = (
+    "夜色渐深，城中的灯火一盏盏熄灭。她站在窗前，望着远处的山影，心里反复盘算着明天要说的话。"
+    "风从街角卷起落叶，像是替她把没说出口的犹豫一并带走。"
+)
+
+DEFAULT_REASONING = "先回顾前文的情节和人物关系，再确定这一段的叙事节奏，最后注意与前文语气保持一致。"
+
+class StubOptions:
+    """模拟服务的行为参数"""
+    
+    def __init__(self, ttft: float = 0.0, tokens_per_second: float = 0.0,
+                 completion_tokens: int = 200, reasoning_tokens: int = 0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 timeout_rate: float = 0.0, hang_seconds: float = 120.0,
+                 reply: str = DEFAULT_REPLY, seed: Optional[int] = None):
+        """初始化行为参数
+        
+        Args:
+            ttft: 首个token前的延迟（秒）
+            tokens_per_second: 生成速度，0表示不限速
+            completion_tokens: 每次回复的token数（不超过请求的 max_tokens）
+            reasoning_tokens: 每次回复前输出的推理token数（reasoning_content）
+            error_rate: 返回500/502/503错误的概率
+            rate_limit_rate: 返回429错误的概率
+            timeout_rate: 挂起请求（不返回）以触发客户端超时的概率
+            hang_seconds: 注入超时故障时挂起的时长（秒）
+            reply: 回复内容
+            seed: 故障注入的随机种子（None表示不固定）
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.reasoning_tokens = reasoning_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.reply = reply
+        self.rng = random.Random(seed)
+
+def count_tokens(text: str) -> int:
+    """粗略估算token数：每个非ASCII字符计1个，ASCII字符每4个计1个"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+def make_tokens(source: str, count: int) -> List[str]:
+    """从源文本循环取出指定数量的token（每个汉字为一个token）"""
+    if not source or count <= 0:
+        return []
+    return [source[i % len(source)] for i in range(count)]
+
+class PrefixCache:
+    """模拟服务端的前缀（KV）缓存
+    
+    记录见过的消息前缀，命中的token数为本次请求与之前请求的最长公共消息前缀的token数。
+    """
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._seen = set()
+        self._lock = threading.Lock()
+    
+    def lookup(self, messages: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """记录本次请求并返回 (缓存命中token数, 未命中token数)"""
+        digest = hashlib.sha1()
+        hit = 0
+        total = 0
+        matched = True
+        keys = []
+        for message in messages:
+            content = message.get('content') or ""
+            tokens = count_tokens(content)
+            digest.update(f"{message.get('role')}\0{content}\0".encode('utf-8'))
+            key = digest.hexdigest()
+            keys.append(key)
+            with self._lock:
+                if matched and key in self._seen:
+                    hit += tokens
+                else:
+                    matched = False
+            total += tokens
+        with self._lock:
+            if len(self._seen) + len(keys) > self.max_entries:
+                self._seen.clear()
+            self._seen.update(keys)
+        return hit, total - hit
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """chat/completions 请求处理器"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    @property
+    def options(self) -> StubOptions:
+        return self.server.options
+    
+    def log_message(self, format, *args):
+        """只在详细模式下输出访问日志"""
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def do_GET(self):
+        """模型列表"""
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {
+                'object': "list",
+                'data': [{'id': "stub-model", 'object': "model", 'owned_by': "stub"}]
+            })
+        else:
+            self._send_error(404, "not_found", "未知的接口")
+    
+    def do_POST(self):
+        """对话补全"""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_error(400, "invalid_request_error", "请求体不是有效的JSON")
+            return
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_error(404, "not_found", "未知的接口")
+            return
+        messages = payload.get('messages')
+        if not isinstance(messages, list) or not messages:
+            self._send_error(400, "invalid_request_error", "messages 不能为空")
+            return
+        
+        if self._inject_fault():
+            return
+        
+        options = self.options
+        completion_count = min(options.completion_tokens, payload.get('max_tokens') or options.completion_tokens)
+        reasoning = make_tokens(DEFAULT_REASONING, options.reasoning_tokens)
+        completion = make_tokens(options.reply, completion_count)
+        cache_hit, cache_miss = self.server.prefix_cache.lookup(messages)
+        usage = {
+            'prompt_tokens': cache_hit + cache_miss,
+            'completion_tokens': len(reasoning) + len(completion),
+            'total_tokens': cache_hit + cache_miss + len(reasoning) + len(completion),
+            'prompt_cache_hit_tokens': cache_hit,
+            'prompt_cache_miss_tokens': cache_miss,
+            'completion_tokens_details': {'reasoning_tokens': len(reasoning)}
+        }
+        model = payload.get('model') or "stub-model"
+        
+        if options.ttft > 0:
+            time.sleep(options.ttft)
+        if payload.get('stream'):
+            self._stream(model, reasoning, completion, usage,
+                         include_usage=bool((payload.get('stream_options') or {}).get('include_usage', True)))
+        else:
+            self._sleep_for_tokens(len(reasoning) + len(completion))
+            message = {'role': "assistant", 'content': "".join(completion)}
+            if reasoning:
+                message['reasoning_content'] = "".join(reasoning)
+            self._send_json(200, {
+                'id': f"chatcmpl-{uuid.uuid4().hex}",
+                'object': "chat.completion",
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': message, 'finish_reason': "stop"}],
+                'usage': usage
+            })
+        self.server.record_request()
+    
+    def _inject_fault(self) -> bool:
+        """按概率（或请求头 X-Stub-Fault 指定）注入故障，已处理时返回True"""
+        options = self.options
+        fault = self.headers.get('X-Stub-Fault')
+        if fault is None:
+            roll = options.rng.random()
+            if roll < options.rate_limit_rate:
+                fault = '429'
+            elif roll < options.rate_limit_rate + options.error_rate:
+                fault = options.rng.choice(['500', '502', '503'])
+            elif roll < options.rate_limit_rate + options.error_rate + options.timeout_rate:
+                fault = 'timeout'
+        if not fault:
+            return False
+        if fault != 'timeout' and not (fault.isdigit() and 400 <= int(fault) <= 599):
+            self._send_error(400, "invalid_request_error",
+                             f"无法识别的 X-Stub-Fault: {fault}（应为 timeout 或 4xx/5xx 状态码）")
+            return True
+        
+        self.server.record_request(fault)
+        if fault == 'timeout':
+            time.sleep(options.hang_seconds)
+            self.close_connection = True
+            return True
+        status = int(fault)
+        if status == 429:
+            self._send_error(429, "rate_limit_exceeded", "请求过于频繁，请稍后重试",
+                             headers={'Retry-After': "1"})
+        else:
+            self._send_error(status, "server_error", "模拟的服务端错误")
+        return True
+    
+    def _sleep_for_tokens(self, count: int):
+        """按生成速度等待"""
+        if self.options.tokens_per_second > 0:
+            time.sleep(count / self.options.tokens_per_second)
+    
+    def _stream(self, model: str, reasoning: List[str], completion: List[str],
+                usage: Dict[str, Any], include_usage: bool):
+        """以SSE格式逐token输出"""
+        self.send_response(200)
+        self.send_header('Content-Type', "text/event-stream; charset=utf-8")
+        self.send_header('Cache-Control', "no-cache")
+        self.send_header('Connection', "close")
+        self.end_headers()
+        self.close_connection = True
+        
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        interval = 1.0 / self.options.tokens_per_second if self.options.tokens_per_second > 0 else 0.0
+        
+        def send(delta: Dict[str, Any], finish_reason: Optional[str] = None, extra: Optional[Dict] = None):
+            chunk = {
+                'id': chunk_id,
+                'object': "chat.completion.chunk",
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            if extra:
+                chunk.update(extra)
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        
+        try:
+            send({'role': "assistant", 'content': ""})
+            for token in reasoning:
+                send({'reasoning_content': token, 'content': None})
+                if interval:
+                    time.sleep(interval)
+            for token in completion:
+                send({'content': token})
+                if interval:
+                    time.sleep(interval)
+            send({}, finish_reason="stop", extra={'usage': usage} if include_usage else None)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端取消了请求
+            pass
+    
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        """发送JSON响应"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_error(self, status: int, error_type: str, message: str,
+                    headers: Optional[Dict[str, str]] = None):
+        """发送OpenAI格式的错误响应"""
+        self._send_json(status, {'error': {'message': message, 'type': error_type, 'code': status}},
+                        headers=headers)
+
+class StubLLMServer(ThreadingHTTPServer):
+    """模拟大模型服务
+    
+    可在后台线程中运行（作为上下文管理器）::
+        
+        with StubLLMServer(options=StubOptions(ttft=0.2)) as server:
+            service = DeepSeekAIService("test", api_url=server.url)
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 options: Optional[StubOptions] = None, verbose: bool = False):
+        """初始化服务
+        
+        Args:
+            host: 监听地址
+            port: 监听端口（0表示自动分配）
+            options: 行为参数
+            verbose: 是否输出访问日志
+        """
+        super().__init__((host, port), StubRequestHandler)
+        self.options = options or StubOptions()
+        self.verbose = verbose
+        self.prefix_cache = PrefixCache()
+        self.stats = {'requests': 0, 'faults': {}}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """chat/completions 接口地址"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+    
+    def record_request(self, fault: Optional[str] = None):
+        """记录请求数和注入的故障数"""
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            if fault:
+                self.stats['faults'][fault] = self.stats['faults'].get(fault, 0) + 1
+    
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止服务"""
+        self.shutdown()
+        self.server_close()
+    
+    def __enter__(self) -> 'StubLLMServer':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+def main(argv=None) -> int:
+    """命令行入口函数"""
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容的模拟大模型服务")
+    parser.add_argument('--host', default="127.0.0.1", help="监听地址")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口")
+    parser.add_argument('--ttft', type=float, default=0.5, help="首个token前的延迟（秒）")
+    parser.add_argument('--tps', type=float, default=30.0, help="每秒生成的token数，0表示不限速")
+    parser.add_argument('--completion-tokens', type=int, default=200, help="每次回复的token数")
+    parser.add_argument('--reasoning-tokens', type=int, default=0, help="每次回复前的推理token数")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回5xx错误的概率")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="返回429错误的概率")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="挂起请求的概率")
+    parser.add_argument('--hang-seconds', type=float, default=120.0, help="挂起请求的时长（秒）")
+    parser.add_argument('--seed', type=int, help="故障注入的随机种子")
+    parser.add_argument('--verbose', action='store_true', help="输出访问日志")
+    args = parser.parse_args(argv)
+    
+    options = StubOptions(
+        ttft=args.ttft,
+        tokens_per_second=args.tps,
+        completion_tokens=args.completion_tokens,
+        reasoning_tokens=args.reasoning_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed
+    )
+    server = StubLLMServer(args.host, args.port, options=options, verbose=args.verbose)
+    print(f"模拟服务已启动: {server.url}（Ctrl+C 停止）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n共处理{server.stats['requests']}个请求，注入故障: {server.stats['faults']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())